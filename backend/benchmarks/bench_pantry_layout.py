@@ -0,0 +1,138 @@
+"""
+Compara a latência de escrita dos dois layouts da despensa (itens embutidos
+vs. um documento por item) à medida que o número de itens do usuário cresce.
+
+Precisa de um MongoDB de verdade (SMARTKITCHEN_MONGO_URI) e usa um banco
+próprio, apagado ao final:
+
+    SMARTKITCHEN_MONGO_URI=mongodb://localhost:27017 \\
+        python -m benchmarks.bench_pantry_layout --sizes 0 1000 10000
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from bson import ObjectId
+
+from models.connection_options.connections import create_db_handler
+from models.connection_options.mongo_db_config import mongo_db_infos
+from models.repository.collections import CollectionHandler
+from models.repository.indexes import ensure_indexes
+from models.repository.item_stores import EmbeddedItemStore, SeparateItemStore
+from src.api.endpoints.pantry import create_categories
+
+COLLECTIONS = mongo_db_infos["COLLECTIONS"]
+PREFILL_CHUNK = 500
+
+
+def _item(index: int) -> dict:
+    return {
+        "item_id": str(ObjectId()),
+        "item_name": f"item {index}",
+        "quantity": 1,
+        "unit": "un",
+    }
+
+
+def _stores(db_connection) -> dict:
+    pantry = CollectionHandler(
+        db_connection, COLLECTIONS["collection_pantry"], versioned=True
+    )
+    pantry_items = CollectionHandler(
+        db_connection, COLLECTIONS["collection_pantry_items"]
+    )
+    return {
+        "embedded": EmbeddedItemStore(pantry, "pantry"),
+        "items": SeparateItemStore(pantry, pantry_items, "pantry"),
+    }
+
+
+async def _timed(operation) -> float:
+    start = time.perf_counter()
+    await operation
+    return (time.perf_counter() - start) * 1000
+
+
+def _summary(samples: list[float]) -> dict:
+    samples = sorted(samples)
+    return {
+        "p50_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[int(len(samples) * 0.95) - 1], 3),
+        "mean_ms": round(statistics.fmean(samples), 3),
+    }
+
+
+async def bench_store(store: EmbeddedItemStore, size: int, operations: int) -> dict:
+    user_id = ObjectId()
+    await create_categories(store, user_id, f"bench-{user_id}")
+
+    # Distribui os itens iniciais entre as 15 categorias.
+    for start in range(0, size, PREFILL_CHUNK):
+        chunk = range(start, min(start + PREFILL_CHUNK, size))
+        await store.add_items(user_id, [(101 + i % 15, _item(i)) for i in chunk])
+
+    added = [(101 + i % 15, _item(size + i)) for i in range(operations)]
+    results = {"add": [], "update": [], "delete": []}
+
+    for category_value, item in added:
+        results["add"].append(
+            await _timed(store.add_items(user_id, [(category_value, item)]))
+        )
+    for category_value, item in added:
+        results["update"].append(
+            await _timed(
+                store.update_item(
+                    user_id, category_value, item["item_id"], {"quantity": 2}
+                )
+            )
+        )
+    for category_value, item in added:
+        results["delete"].append(
+            await _timed(store.delete_item(user_id, category_value, item["item_id"]))
+        )
+
+    return {operation: _summary(samples) for operation, samples in results.items()}
+
+
+async def _main(sizes: list[int], operations: int, db_name: str, output: str | None):
+    db_handler = create_db_handler()
+    db_handler.connect_to_db(db_name)
+    db_connection = db_handler.get_db_connection()
+
+    report = []
+    try:
+        await ensure_indexes(db_connection)
+
+        for size in sizes:
+            for layout, store in _stores(db_connection).items():
+                result = await bench_store(store, size, operations)
+                report.append({"layout": layout, "items": size, **result})
+                print(
+                    f"{layout:<9} {size:>7} itens  "
+                    + "  ".join(
+                        f"{operation} p50={stats['p50_ms']:.2f}ms "
+                        f"p95={stats['p95_ms']:.2f}ms"
+                        for operation, stats in result.items()
+                    )
+                )
+    finally:
+        await db_handler.get_db_client().drop_database(db_name)
+        db_handler.close()
+
+    if output:
+        with open(output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[0, 100, 1000, 5000])
+    parser.add_argument("--operations", type=int, default=200)
+    parser.add_argument("--db", default="smartkitchen_bench")
+    parser.add_argument("--output", help="Grava o resultado em JSON")
+    args = parser.parse_args()
+
+    asyncio.run(_main(args.sizes, args.operations, args.db, args.output))
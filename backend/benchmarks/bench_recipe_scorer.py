@@ -0,0 +1,99 @@
+"""
+Compara o RecipeMatrix (NumPy) com a pontuação em laços Python (naive_score)
+em dados sintéticos, e confere que os dois dão o mesmo resultado. Não precisa
+de banco:
+
+    python -m benchmarks.bench_recipe_scorer --users 2000 --recipes 5000
+"""
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+from models.repository.recipe_scorer import RecipeMatrix, naive_score
+
+
+def synthetic_data(users: int, recipes: int, vocabulary: int, seed: int):
+    rng = random.Random(seed)
+    names = [f"ingredient {i}" for i in range(vocabulary)]
+    # Alguns ingredientes (sal, ovos...) aparecem em muitas receitas.
+    weights = [1 / (rank + 1) for rank in range(vocabulary)]
+
+    recipe_list = [
+        (
+            str(index),
+            {
+                "title": f"recipe {index}",
+                "ingredients": [
+                    {
+                        "name": name,
+                        "quantity": rng.randint(1, 5) * 100,
+                        "unit": rng.choice(["g", "kg", "un"]),
+                    }
+                    for name in set(rng.choices(names, weights, k=rng.randint(3, 12)))
+                ],
+            },
+        )
+        for index in range(recipes)
+    ]
+    pantries = [
+        [
+            {
+                "item_name": name,
+                "quantity": rng.randint(0, 6) * 100,
+                "unit": rng.choice(["g", "kg", "un"]),
+            }
+            for name in set(rng.choices(names, weights, k=rng.randint(10, 120)))
+        ]
+        for _ in range(users)
+    ]
+    return recipe_list, pantries
+
+
+def main(users: int, recipes: int, vocabulary: int, batch_size: int, seed: int):
+    recipe_list, pantries = synthetic_data(users, recipes, vocabulary, seed)
+
+    start = time.perf_counter()
+    matrix = RecipeMatrix(recipe_list)
+    build_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batches = [
+        matrix.score(pantries[offset : offset + batch_size])
+        for offset in range(0, users, batch_size)
+    ]
+    vectorized_seconds = time.perf_counter() - start
+
+    # A versão ingênua é medida em uma amostra e extrapolada.
+    sample = min(users, 100)
+    start = time.perf_counter()
+    naive = [naive_score(recipe_list, pantry) for pantry in pantries[:sample]]
+    naive_seconds = (time.perf_counter() - start) * users / sample
+
+    coverage = np.concatenate([batch.coverage for batch in batches])
+    missing = np.concatenate([batch.missing for batch in batches])
+    sufficient = np.concatenate([batch.sufficient for batch in batches])
+    expected = np.asarray(naive)
+    assert np.allclose(coverage[:sample], expected[:, :, 0])
+    assert np.array_equal(missing[:sample], expected[:, :, 1])
+    assert np.allclose(sufficient[:sample], expected[:, :, 2])
+
+    print(f"{users} usuários × {recipes} receitas ({matrix.indices.size} ingredientes)")
+    print(f"montagem da matriz   {build_seconds * 1000:10.1f} ms")
+    print(f"numpy (lotes de {batch_size}) {vectorized_seconds * 1000:10.1f} ms")
+    print(f"naive (estimado)     {naive_seconds * 1000:10.1f} ms")
+    print(f"speedup              {naive_seconds / vectorized_seconds:10.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark do RecipeMatrix")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--recipes", type=int, default=5000)
+    parser.add_argument("--vocabulary", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    main(args.users, args.recipes, args.vocabulary, args.batch_size, args.seed)
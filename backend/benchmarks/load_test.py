@@ -0,0 +1,445 @@
+"""
+Teste de carga da API: N clientes concorrentes executam uma mistura de
+cenários (cadastro, leitura da despensa, escrita de itens, carrinho) e o
+relatório traz, por rota, requisições/s, taxa de erro e p50/p95/p99.
+
+Sem --base-url a app roda no mesmo processo (httpx.ASGITransport, com o
+lifespan de main.py), usando o banco configurado em mongo_db_config.py, por
+exemplo um mongod local com os dados de generatorDataFake.py:
+
+    SMARTKITCHEN_MONGO_URI=mongodb://localhost:27017 \\
+        python -m benchmarks.load_test --duration 30 --concurrency 50 \\
+        --mix read_pantry=60,add_item=15,update_item=10,delete_item=5,read_cart=10 \\
+        --output load_results.json
+
+Com SMARTKITCHEN_DB_BACKEND=memory não há banco nenhum: --seed-users popula
+o backend em memória com os mesmos dados do generatorDataFake.py.
+
+    SMARTKITCHEN_DB_BACKEND=memory python -m benchmarks.load_test \\
+        --seed-users 10000 --duration 30 --concurrency 50
+
+Com --base-url as requisições vão para um servidor já rodando (uvicorn).
+
+Uma rota com taxa de erro acima de --max-error-rate faz o comando sair com
+status 1: latências medidas sobre 404 não dizem nada sobre o caminho real.
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import statistics
+import time
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict
+
+import httpx
+
+CATEGORY_VALUES = range(101, 116)
+DEFAULT_MIX = (
+    "read_pantry=40,read_category=10,add_item=10,update_item=10,delete_item=5,"
+    "read_cart=10,add_cart_item=5,cart_totals=5,signup=5"
+)
+
+
+class Recorder:
+    """Latências e status por rota (método + caminho com os parâmetros)."""
+
+    def __init__(self) -> None:
+        self.latencies: Dict[str, list[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def request(
+        self, client: httpx.AsyncClient, method: str, route: str, url: str, **kwargs
+    ) -> httpx.Response | None:
+        name = f"{method} {route}"
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            response = None
+        self.latencies[name].append((time.perf_counter() - start) * 1000)
+
+        # 304 é sucesso (revalidação); 4xx e 5xx contam como erro.
+        if response is None or response.status_code >= 400:
+            self.errors[name] += 1
+        return response
+
+    def report(self, elapsed: float) -> Dict:
+        routes = {}
+        for name, samples in sorted(self.latencies.items()):
+            routes[name] = {
+                "requests": len(samples),
+                "errors": self.errors[name],
+                "error_rate": round(self.errors[name] / len(samples), 4),
+                "rps": round(len(samples) / elapsed, 2),
+                **_percentiles(samples),
+            }
+
+        total = sum(len(samples) for samples in self.latencies.values())
+        errors = sum(self.errors.values())
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "requests": total,
+            "errors": errors,
+            "error_rate": round(errors / total, 4) if total else 0.0,
+            "rps": round(total / elapsed, 2),
+            "routes": routes,
+        }
+
+
+def _percentiles(samples: list[float]) -> Dict:
+    if len(samples) < 2:
+        value = round(samples[0], 3) if samples else 0.0
+        return {"p50_ms": value, "p95_ms": value, "p99_ms": value, "max_ms": value}
+
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {
+        "p50_ms": round(cuts[49], 3),
+        "p95_ms": round(cuts[94], 3),
+        "p99_ms": round(cuts[98], 3),
+        "max_ms": round(max(samples), 3),
+    }
+
+
+class Session:
+    """Estado compartilhado pelos clientes virtuais."""
+
+    def __init__(self, client: httpx.AsyncClient, user_ids: list[str], seed: int):
+        self.client = client
+        self.user_ids = user_ids
+        self.recorder = Recorder()
+        self.rng = random.Random(seed)
+        self.signups = 0
+
+    def user_id(self) -> str:
+        return self.rng.choice(self.user_ids)
+
+    def item(self) -> Dict:
+        return {
+            "item_name": f"item {self.rng.randrange(1000)}",
+            "quantity": self.rng.randint(1, 5),
+            "unit": "un",
+        }
+
+    async def random_pantry_item(self, user_id: str) -> tuple[int, Dict] | None:
+        # Leitura da despensa para escolher o item: também entra no relatório.
+        response = await self.recorder.request(
+            self.client, "GET", "/api/pantry/{user_id}", f"/api/pantry/{user_id}"
+        )
+        if response is None or response.status_code != 200:
+            return None
+
+        items = [
+            (category["category_value"], item)
+            for document in response.json()["data"]
+            for category in document["pantry"]
+            for item in category["items"]
+        ]
+        return self.rng.choice(items) if items else None
+
+
+async def read_pantry(session: Session) -> None:
+    user_id = session.user_id()
+    await session.recorder.request(
+        session.client, "GET", "/api/pantry/{user_id}", f"/api/pantry/{user_id}"
+    )
+
+
+async def read_category(session: Session) -> None:
+    user_id = session.user_id()
+    await session.recorder.request(
+        session.client,
+        "GET",
+        "/api/pantry/category/{user_id}",
+        f"/api/pantry/category/{user_id}",
+        params={"category_value": session.rng.choice(CATEGORY_VALUES)},
+    )
+
+
+async def add_item(session: Session) -> None:
+    user_id, category_value = session.user_id(), session.rng.choice(CATEGORY_VALUES)
+    await session.recorder.request(
+        session.client,
+        "POST",
+        "/api/pantry/{user_id}/category/{category_value}",
+        f"/api/pantry/{user_id}/category/{category_value}",
+        json=session.item(),
+    )
+
+
+async def update_item(session: Session) -> None:
+    user_id = session.user_id()
+    picked = await session.random_pantry_item(user_id)
+    if picked is None:
+        return
+
+    category_value, item = picked
+    await session.recorder.request(
+        session.client,
+        "PATCH",
+        "/api/pantry/{user_id}/category_value/{category_value}",
+        f"/api/pantry/{user_id}/category_value/{category_value}",
+        params={"item_id": item["item_id"]},
+        # Mantém a unidade do item: trocar g/kg/l por "un" deformaria os dados.
+        json={"quantity": session.rng.randint(1, 10), "unit": item["unit"]},
+    )
+
+
+async def delete_item(session: Session) -> None:
+    user_id = session.user_id()
+    picked = await session.random_pantry_item(user_id)
+    if picked is None:
+        return
+
+    category_value, item = picked
+    await session.recorder.request(
+        session.client,
+        "DELETE",
+        "/api/pantry/{item_id}",
+        f"/api/pantry/{item['item_id']}",
+        params={"user_id": user_id, "category_value": category_value},
+    )
+
+
+async def read_cart(session: Session) -> None:
+    user_id = session.user_id()
+    await session.recorder.request(
+        session.client,
+        "GET",
+        "/api/shopping_cart/{user_id}",
+        f"/api/shopping_cart/{user_id}",
+    )
+
+
+async def add_cart_item(session: Session) -> None:
+    user_id = session.user_id()
+    await session.recorder.request(
+        session.client,
+        "POST",
+        "/api/shopping_cart/{user_id}",
+        f"/api/shopping_cart/{user_id}",
+        params={"category_value": session.rng.choice(CATEGORY_VALUES)},
+        json={**session.item(), "price": f"{session.rng.uniform(1, 50):.2f}"},
+    )
+
+
+async def cart_totals(session: Session) -> None:
+    user_id = session.user_id()
+    await session.recorder.request(
+        session.client,
+        "GET",
+        "/api/shopping_cart/{user_id}/totals",
+        f"/api/shopping_cart/{user_id}/totals",
+    )
+
+
+async def signup(session: Session) -> None:
+    # Nomes únicos por execução: o prefixo aleatório evita colidir com execuções anteriores.
+    session.signups += 1
+    username = f"lt{session.rng.randrange(16**6):06x}{session.signups}"[:15]
+    await session.recorder.request(
+        session.client,
+        "POST",
+        "/api/users/",
+        "/api/users/",
+        json={
+            "username": username,
+            "email": f"{username}@loadtest.example.com",
+            "password": "LoadTest!2024",
+        },
+    )
+
+
+SCENARIOS: Dict[str, Callable[[Session], Awaitable[None]]] = {
+    scenario.__name__: scenario
+    for scenario in (
+        read_pantry,
+        read_category,
+        add_item,
+        update_item,
+        delete_item,
+        read_cart,
+        add_cart_item,
+        cart_totals,
+        signup,
+    )
+}
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for entry in mix.split(","):
+        name, _, weight = entry.partition("=")
+        if name not in SCENARIOS:
+            raise SystemExit(f"Cenário desconhecido: {name} ({', '.join(SCENARIOS)})")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+async def load_user_ids(client: httpx.AsyncClient, limit: int) -> list[str]:
+    """user_id das despensas existentes (dados semeados), pela rota paginada."""
+    user_ids, after = [], None
+    while len(user_ids) < limit:
+        params = {"limit": min(limit - len(user_ids), 1000)}
+        if after is not None:
+            params["after"] = after
+
+        response = await client.get("/api/pantry/", params=params)
+        if response.status_code != 200:
+            break
+
+        body = response.json()
+        user_ids.extend(str(document["user_id"]) for document in body["data"])
+        after = body.get("next_cursor")
+        if after is None:
+            break
+    return user_ids
+
+
+async def seed_users(db_connection, args: argparse.Namespace) -> None:
+    """Insere usuários gerados por generatorDataFake.py no banco da app in-process."""
+    from generatorDataFake import generate_batch
+
+    batch_size = 1000
+    for batch in range(-(-args.seed_users // batch_size)):
+        documents = generate_batch(
+            args.seed, batch, batch_size, args.seed_users, 0.01, 800
+        )
+        for name, docs in documents.items():
+            if docs:
+                await db_connection.get_collection(name).insert_many(
+                    docs, ordered=False
+                )
+
+
+async def run(client: httpx.AsyncClient, args: argparse.Namespace) -> Dict:
+    user_ids = await load_user_ids(client, args.users)
+    if not user_ids:
+        raise SystemExit(
+            "Nenhuma despensa encontrada: popule o banco com generatorDataFake.py."
+        )
+
+    weights = parse_mix(args.mix)
+    names, scenario_weights = list(weights), list(weights.values())
+    session = Session(client, user_ids, args.seed)
+
+    deadline = time.perf_counter() + args.duration
+    budget = args.requests
+
+    async def virtual_user() -> None:
+        nonlocal budget
+        while time.perf_counter() < deadline:
+            if budget is not None:
+                if budget <= 0:
+                    return
+                budget -= 1
+            scenario = session.rng.choices(names, weights=scenario_weights)[0]
+            await SCENARIOS[scenario](session)
+
+    # Aquecimento fora do relatório (pool de conexões, caches, JIT do driver).
+    warmup = Session(client, user_ids, args.seed + 1)
+    await asyncio.gather(*(read_pantry(warmup) for _ in range(args.concurrency)))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(virtual_user() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "target": args.base_url or "in-process",
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "concurrency": args.concurrency,
+        "users": len(user_ids),
+        "mix": weights,
+        "seed": args.seed,
+        **session.recorder.report(elapsed),
+    }
+
+
+async def _main(args: argparse.Namespace) -> Dict:
+    limits = httpx.Limits(max_connections=args.concurrency)
+
+    if args.base_url:
+        async with httpx.AsyncClient(
+            base_url=args.base_url, limits=limits, timeout=args.timeout
+        ) as client:
+            return await run(client, args)
+
+    from main import app
+
+    # O ASGITransport não dispara o lifespan: ele é executado aqui.
+    async with app.router.lifespan_context(app):
+        if args.seed_users:
+            await seed_users(app.state.db_handler.get_db_connection(), args)
+        async with httpx.AsyncClient(
+            # Exceções da app viram respostas 500 e entram na taxa de erro.
+            transport=httpx.ASGITransport(app=app, raise_app_exceptions=False),
+            base_url="http://loadtest",
+            timeout=args.timeout,
+        ) as client:
+            return await run(client, args)
+
+
+def failing_routes(result: Dict, max_error_rate: float) -> list[str]:
+    return [
+        f"{name} ({route['error_rate']:.2%})"
+        for name, route in result["routes"].items()
+        if route["error_rate"] > max_error_rate
+    ]
+
+
+def print_report(result: Dict) -> None:
+    print(
+        f"{result['requests']} requisições em {result['elapsed_s']} s "
+        f"({result['rps']} req/s), erros {result['error_rate']:.2%}"
+    )
+    print(
+        f"{'rota':58} {'req':>7} {'req/s':>8} {'erro':>7} {'p50':>8} {'p95':>8} {'p99':>8}"
+    )
+    for name, route in result["routes"].items():
+        print(
+            f"{name:58} {route['requests']:7} {route['rps']:8.1f} "
+            f"{route['error_rate']:7.2%} {route['p50_ms']:8.2f} "
+            f"{route['p95_ms']:8.2f} {route['p99_ms']:8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Teste de carga da API.")
+    parser.add_argument("--base-url", help="Servidor rodando; sem ele, in-process")
+    parser.add_argument("--duration", type=float, default=30, help="Segundos")
+    parser.add_argument("--requests", type=int, help="Para após N cenários")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--users", type=int, default=1000, help="Usuários sorteados")
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--output", help="Arquivo JSON com o resultado")
+    parser.add_argument(
+        "--max-error-rate",
+        type=float,
+        default=0.05,
+        help="Taxa de erro máxima por rota; acima dela o comando falha",
+    )
+    parser.add_argument(
+        "--seed-users",
+        type=int,
+        default=0,
+        help="In-process: gera N usuários antes do teste (ex.: backend em memória)",
+    )
+    args = parser.parse_args()
+
+    result = asyncio.run(_main(args))
+    print_report(result)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(result, file, indent=2)
+
+    failing = failing_routes(result, args.max_error_rate)
+    if failing:
+        raise SystemExit(
+            f"Taxa de erro acima de {args.max_error_rate:.2%}: {', '.join(failing)}"
+        )
@@ -0,0 +1,601 @@
+"""
+Microbenchmarks dos caminhos quentes: operações do CollectionHandler e dos
+stores de itens, e as rotas de pantry.py, shopping_cart.py e users.py
+chamadas in-process (httpx.ASGITransport, sem rede). Cada caso roda no
+backend em memória e, com SMARTKITCHEN_MONGO_URI, num mongod local, com
+despensas e carrinhos de 0, 100 e 10 mil itens.
+
+Por operação são medidos o tempo (p50/p95), os bytes alocados no pico
+(tracemalloc) e os bytes BSON enviados ao banco (filtros, updates,
+documentos e pipelines). Cada métrica tem a sua passada, para que o
+tracemalloc e a contagem de BSON não entrem no tempo.
+
+    python -m benchmarks.microbench --save-baseline microbench_baseline.json
+    python -m benchmarks.microbench --baseline microbench_baseline.json
+
+Com --baseline, casos que pioraram são marcados e o script termina com
+código 1. O tempo varia entre execuções e máquinas (--time-tolerance, 30%);
+bytes alocados e BSON quase não variam (--bytes-tolerance, 5%). Compare
+execuções feitas na mesma máquina.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Awaitable, Callable, Dict, NamedTuple
+
+import bson
+import httpx
+from bson import ObjectId
+
+from models.connection_options.connections import DBConnectionHandler
+from models.connection_options.in_memory import InMemoryConnectionHandler
+from models.connection_options.mongo_db_config import mongo_db_infos, storage_options
+from models.repository.collections import CollectionHandler
+from models.repository.indexes import ensure_indexes
+from models.repository.pipelines import cart_totals_pipeline
+from models.repository.recipe_index import RecipeIndex
+from models.repository.shopping_list import push_by_category
+from src.api.dependencies import get_pantry_store
+from src.api.schema.units import with_base_quantity
+
+COLLECTIONS = mongo_db_infos["COLLECTIONS"]
+CATEGORY_VALUES = range(101, 116)
+PREFILL_CHUNK = 500
+METRICS = ("p50_us", "alloc_bytes", "bson_bytes")
+
+
+# --------------------------------------------------------------------------
+# Contagem de BSON enviado
+# --------------------------------------------------------------------------
+
+
+def _bson_size(value) -> int:
+    if isinstance(value, dict):
+        return len(bson.encode(value))
+    if isinstance(value, list):
+        return sum(_bson_size(item) for item in value)
+    return 0
+
+
+class BsonCounter:
+    def __init__(self) -> None:
+        self.active = False
+        self.bytes = 0
+
+    def count(self, *values) -> None:
+        if self.active:
+            self.bytes += sum(_bson_size(value) for value in values)
+
+
+class _CountingCollection:
+    """Repassa as chamadas à collection somando o BSON dos argumentos."""
+
+    def __init__(self, collection, counter: BsonCounter) -> None:
+        self._collection = collection
+        self._counter = counter
+
+    def find(self, filter=None, projection=None, *args, **kwargs):
+        self._counter.count(filter, projection)
+        return self._collection.find(filter, projection, *args, **kwargs)
+
+    async def find_one(self, filter=None, projection=None, *args, **kwargs):
+        self._counter.count(filter, projection)
+        return await self._collection.find_one(filter, projection, *args, **kwargs)
+
+    def aggregate(self, pipeline, *args, **kwargs):
+        self._counter.count(pipeline)
+        return self._collection.aggregate(pipeline, *args, **kwargs)
+
+    async def insert_one(self, document, *args, **kwargs):
+        self._counter.count(document)
+        return await self._collection.insert_one(document, *args, **kwargs)
+
+    async def update_one(self, filter, update, *args, **kwargs):
+        self._counter.count(filter, update, kwargs.get("array_filters"))
+        return await self._collection.update_one(filter, update, *args, **kwargs)
+
+    async def delete_one(self, filter, *args, **kwargs):
+        self._counter.count(filter)
+        return await self._collection.delete_one(filter, *args, **kwargs)
+
+    async def bulk_write(self, requests, *args, **kwargs):
+        for request in requests:
+            self._counter.count(
+                getattr(request, "_filter", None),
+                getattr(request, "_doc", None),
+                getattr(request, "_array_filters", None),
+            )
+        return await self._collection.bulk_write(requests, *args, **kwargs)
+
+    def __getattr__(self, name: str):
+        return getattr(self._collection, name)
+
+
+class _CountingDatabase:
+    def __init__(self, database, counter: BsonCounter) -> None:
+        self._database = database
+        self._counter = counter
+
+    def get_collection(self, name: str, **kwargs):
+        return _CountingCollection(
+            self._database.get_collection(name, **kwargs), self._counter
+        )
+
+    def __getattr__(self, name: str):
+        return getattr(self._database, name)
+
+
+class _CountingHandler:
+    """O db_handler que a app recebe: mesmo handler, banco com contagem."""
+
+    def __init__(self, db_handler, counter: BsonCounter) -> None:
+        self._db_handler = db_handler
+        self._database = _CountingDatabase(db_handler.get_db_connection(), counter)
+
+    def get_db_connection(self):
+        return self._database
+
+    def __getattr__(self, name: str):
+        return getattr(self._db_handler, name)
+
+
+# --------------------------------------------------------------------------
+# Dados e casos
+# --------------------------------------------------------------------------
+
+
+def _item(index: int) -> Dict:
+    return with_base_quantity(
+        {
+            "item_id": str(ObjectId()),
+            "item_name": f"item {index}",
+            "quantity": 1,
+            "unit": "un",
+        }
+    )
+
+
+class Fixture:
+    """Um usuário com despensa e carrinho de `size` itens num backend."""
+
+    def __init__(self, db_connection, client: httpx.AsyncClient, size: int) -> None:
+        self.client = client
+        self.size = size
+        self.users = CollectionHandler(db_connection, COLLECTIONS["collection_users"])
+        self.pantry = CollectionHandler(
+            db_connection, COLLECTIONS["collection_pantry"], versioned=True
+        )
+        self.cart = CollectionHandler(
+            db_connection, COLLECTIONS["collection_shopping_cart"], versioned=True
+        )
+        self.store = get_pantry_store(
+            self.pantry,
+            CollectionHandler(db_connection, COLLECTIONS["collection_pantry_items"]),
+        )
+        self.user_id: ObjectId | None = None
+        self.signups = 0
+        # Itens criados pelos casos de escrita, removidos fora da medição.
+        self.added: list[tuple[int, str]] = []
+
+    async def setup(self) -> None:
+        user = self.new_user()
+        response = await self.client.post("/api/users/", json=user)
+        response.raise_for_status()
+        document = await self.users.find_document_one({"username": user["username"]})
+        self.user_id = document[0]["_id"]
+
+        for start in range(0, self.size, PREFILL_CHUNK):
+            items = [
+                (CATEGORY_VALUES[i % 15], _item(i))
+                for i in range(start, min(start + PREFILL_CHUNK, self.size))
+            ]
+            await self.store.add_items(self.user_id, items)
+
+            by_category: Dict[int, list[Dict]] = {}
+            for category_value, item in items:
+                by_category.setdefault(category_value, []).append(
+                    {**item, "price": bson.Decimal128("2.50")}
+                )
+            request_attribute, array_filters = push_by_category(
+                "shoppingCart", by_category
+            )
+            await self.cart.update_document(
+                {"user_id": self.user_id}, request_attribute, array_filters
+            )
+
+    def new_user(self) -> Dict:
+        self.signups += 1
+        username = f"mb{self.size}u{self.signups}{ObjectId()}"[:15]
+        return {
+            "username": username,
+            "email": f"{username}@microbench.example.com",
+            "password": "MicroBench!2024",
+        }
+
+    async def add_tracked_item(self, category_value: int = 107) -> str:
+        item = _item(self.size)
+        await self.store.add_items(self.user_id, [(category_value, item)])
+        self.added.append((category_value, item["item_id"]))
+        return item["item_id"]
+
+    async def cleanup(self) -> None:
+        """Volta a despensa e o carrinho para `size` itens."""
+        while self.added:
+            category_value, item_id = self.added.pop()
+            await self.store.delete_item(self.user_id, category_value, item_id)
+
+        # Itens criados pelas rotas, cujo item_id só a rota conhece.
+        data = await self.store.read_category(
+            self.user_id, 107, name_prefix="microbench"
+        )
+        for category in data[0]["pantry"] if data else []:
+            for item in category["items"]:
+                await self.store.delete_item(self.user_id, 107, item["item_id"])
+        await self.cart.update_document(
+            {"user_id": self.user_id},
+            {"$pull": {"shoppingCart.$[].items": {"item_name": "microbench"}}},
+        )
+
+
+# Um caso recebe a fixture, faz o preparo fora da medição e devolve a
+# operação medida (uma função sem argumentos).
+Operation = Callable[[], Awaitable]
+Case = Callable[[Fixture], Awaitable[Operation]]
+
+
+def _request(fixture: Fixture, method: str, url: str, **kwargs) -> Operation:
+    async def operation():
+        response = await fixture.client.request(method, url, **kwargs)
+        if response.status_code >= 400:
+            raise RuntimeError(
+                f"{method} {url}: {response.status_code} {response.text}"
+            )
+
+    return operation
+
+
+async def repo_find_by_user(fixture: Fixture) -> Operation:
+    return lambda: fixture.pantry.find_document_one(
+        {"user_id": fixture.user_id}, {"_id": 0}
+    )
+
+
+async def repo_find_version(fixture: Fixture) -> Operation:
+    return lambda: fixture.pantry.find_version_by_user(fixture.user_id)
+
+
+async def repo_read_category(fixture: Fixture) -> Operation:
+    return lambda: fixture.store.read_category(fixture.user_id, 107)
+
+
+async def repo_add_item(fixture: Fixture) -> Operation:
+    await fixture.cleanup()
+    item = _item(fixture.size)
+    fixture.added.append((107, item["item_id"]))
+    return lambda: fixture.store.add_items(fixture.user_id, [(107, item)])
+
+
+async def repo_update_item(fixture: Fixture) -> Operation:
+    item_id = (
+        fixture.added[-1][1] if fixture.added else await fixture.add_tracked_item()
+    )
+    # Uma quantidade nova a cada chamada: repetir a mesma seria um update sem efeito.
+    quantities = itertools.count(2)
+    return lambda: fixture.store.update_item(
+        fixture.user_id, 107, item_id, {"quantity": next(quantities)}
+    )
+
+
+async def repo_delete_item(fixture: Fixture) -> Operation:
+    item_id = await fixture.add_tracked_item()
+    fixture.added.pop()
+    return lambda: fixture.store.delete_item(fixture.user_id, 107, item_id)
+
+
+async def repo_cart_totals(fixture: Fixture) -> Operation:
+    return lambda: fixture.cart.aggregate(
+        cart_totals_pipeline(fixture.user_id, "shoppingCart")
+    )
+
+
+async def route_read_pantry(fixture: Fixture) -> Operation:
+    return _request(fixture, "GET", f"/api/pantry/{fixture.user_id}")
+
+
+async def route_read_category(fixture: Fixture) -> Operation:
+    return _request(
+        fixture,
+        "GET",
+        f"/api/pantry/category/{fixture.user_id}",
+        params={"category_value": 107},
+    )
+
+
+async def route_add_item(fixture: Fixture) -> Operation:
+    await fixture.cleanup()
+    return _request(
+        fixture,
+        "POST",
+        f"/api/pantry/{fixture.user_id}/category/107",
+        json={"item_name": "microbench", "quantity": 1, "unit": "un"},
+    )
+
+
+async def route_update_item(fixture: Fixture) -> Operation:
+    item_id = (
+        fixture.added[-1][1] if fixture.added else await fixture.add_tracked_item()
+    )
+    quantities = itertools.count(3)
+
+    def operation():
+        return _request(
+            fixture,
+            "PATCH",
+            f"/api/pantry/{fixture.user_id}/category_value/107",
+            params={"item_id": item_id},
+            json={"quantity": next(quantities), "unit": "un"},
+        )()
+
+    return operation
+
+
+async def route_delete_item(fixture: Fixture) -> Operation:
+    item_id = await fixture.add_tracked_item()
+    fixture.added.pop()
+    return _request(
+        fixture,
+        "DELETE",
+        f"/api/pantry/{item_id}",
+        params={"user_id": str(fixture.user_id), "category_value": 107},
+    )
+
+
+async def route_read_cart(fixture: Fixture) -> Operation:
+    return _request(fixture, "GET", f"/api/shopping_cart/{fixture.user_id}")
+
+
+async def route_cart_totals(fixture: Fixture) -> Operation:
+    return _request(fixture, "GET", f"/api/shopping_cart/{fixture.user_id}/totals")
+
+
+async def route_add_cart_item(fixture: Fixture) -> Operation:
+    await fixture.cleanup()
+    return _request(
+        fixture,
+        "POST",
+        f"/api/shopping_cart/{fixture.user_id}",
+        params={"category_value": 107},
+        json={"item_name": "microbench", "quantity": 1, "unit": "un", "price": "2.50"},
+    )
+
+
+async def route_read_user(fixture: Fixture) -> Operation:
+    return _request(fixture, "GET", f"/api/users/{fixture.user_id}")
+
+
+async def route_signup(fixture: Fixture) -> Operation:
+    return _request(fixture, "POST", "/api/users/", json=fixture.new_user())
+
+
+CASES: Dict[str, Case] = {
+    case.__name__: case
+    for case in (
+        repo_find_by_user,
+        repo_find_version,
+        repo_read_category,
+        repo_add_item,
+        repo_update_item,
+        repo_delete_item,
+        repo_cart_totals,
+        route_read_pantry,
+        route_read_category,
+        route_add_item,
+        route_update_item,
+        route_delete_item,
+        route_read_cart,
+        route_cart_totals,
+        route_add_cart_item,
+        route_read_user,
+        route_signup,
+    )
+}
+
+
+# --------------------------------------------------------------------------
+# Medição
+# --------------------------------------------------------------------------
+
+
+class Measurement(NamedTuple):
+    p50_us: float
+    p95_us: float
+    alloc_bytes: int
+    bson_bytes: int
+
+
+async def measure(
+    case: Case, fixture: Fixture, counter: BsonCounter, args: argparse.Namespace
+) -> Measurement:
+    for _ in range(args.warmup):
+        await (await case(fixture))()
+
+    samples = []
+    for _ in range(args.iterations):
+        operation = await case(fixture)
+        started = time.perf_counter()
+        await operation()
+        samples.append((time.perf_counter() - started) * 1e6)
+
+    # Pico de memória alocada durante a operação (driver ou backend em memória,
+    # handler e serialização da resposta).
+    allocations = []
+    tracemalloc.start()
+    try:
+        for _ in range(args.alloc_iterations):
+            operation = await case(fixture)
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            await operation()
+            allocations.append(tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+
+    operation = await case(fixture)
+    counter.bytes, counter.active = 0, True
+    try:
+        await operation()
+    finally:
+        counter.active = False
+
+    await fixture.cleanup()
+
+    samples.sort()
+    return Measurement(
+        p50_us=round(statistics.median(samples), 1),
+        p95_us=round(samples[max(int(len(samples) * 0.95) - 1, 0)], 1),
+        alloc_bytes=int(statistics.median(allocations)) if allocations else 0,
+        bson_bytes=counter.bytes,
+    )
+
+
+def _backends(names: list[str]) -> Dict[str, Callable[[], object]]:
+    backends = {}
+    for name in names:
+        if name == "memory":
+            backends[name] = InMemoryConnectionHandler
+        elif not mongo_db_infos["CONNECTION_STRING"]:
+            # Sem URI explícita o handler apontaria para o cluster do Atlas.
+            print("mongo: defina SMARTKITCHEN_MONGO_URI (mongod local); ignorado")
+        else:
+            backends[name] = DBConnectionHandler
+    return backends
+
+
+async def run_backend(
+    name: str, handler_class, args: argparse.Namespace
+) -> Dict[str, Dict]:
+    from main import app
+
+    db_handler = handler_class()
+    db_handler.connect_to_db(args.db)
+    counter = BsonCounter()
+    counting_handler = _CountingHandler(db_handler, counter)
+
+    # O ASGITransport não dispara o lifespan: o estado da app é montado aqui.
+    app.state.db_handler = counting_handler
+    app.state.caches = {}
+    app.state.recipe_index = RecipeIndex()
+
+    results = {}
+    try:
+        await ensure_indexes(db_handler.get_db_connection())
+
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://microbench"
+        ) as client:
+            for size in args.sizes:
+                fixture = Fixture(counting_handler.get_db_connection(), client, size)
+                await fixture.setup()
+
+                for case_name in args.cases:
+                    result = await measure(CASES[case_name], fixture, counter, args)
+                    key = f"{name}/{case_name}/{size}"
+                    results[key] = result._asdict()
+                    print(
+                        f"{key:<42} p50={result.p50_us:>9.1f}us "
+                        f"p95={result.p95_us:>9.1f}us "
+                        f"alloc={result.alloc_bytes / 1024:>8.1f}KiB "
+                        f"bson={result.bson_bytes:>7}B"
+                    )
+    finally:
+        client = db_handler.get_db_client()
+        if client is not None:
+            await client.drop_database(args.db)
+        db_handler.close()
+
+    return results
+
+
+def compare(
+    results: Dict[str, Dict],
+    baseline: Dict[str, Dict],
+    time_tolerance: float,
+    bytes_tolerance: float,
+) -> list[str]:
+    """Casos em que alguma métrica passou de baseline × (1 + tolerância)."""
+    regressions = []
+    for key, result in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        for metric in METRICS:
+            tolerance = time_tolerance if metric == "p50_us" else bytes_tolerance
+            before, after = previous.get(metric, 0), result[metric]
+            if after > before * (1 + tolerance):
+                change = f"+{(after - before) / before:.0%}" if before else "novo"
+                regressions.append(f"{key} {metric}: {before} -> {after} ({change})")
+    return regressions
+
+
+async def _main(args: argparse.Namespace) -> int:
+    results = {}
+    for name, handler_class in _backends(args.backends).items():
+        results.update(await run_backend(name, handler_class, args))
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "pantry_layout": storage_options["PANTRY_LAYOUT"],
+        "iterations": args.iterations,
+        "results": results,
+    }
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+        print(f"Baseline gravada em {args.save_baseline}")
+
+    if not args.baseline:
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as file:
+        baseline = json.load(file)
+
+    regressions = compare(
+        results, baseline["results"], args.time_tolerance, args.bytes_tolerance
+    )
+    for line in regressions:
+        print(f"REGRESSÃO {line}")
+    if not regressions:
+        print(f"Sem regressões em relação a {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--backends",
+        nargs="+",
+        choices=["memory", "mongo"],
+        default=["memory", "mongo"],
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[0, 100, 10000])
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--alloc-iterations", type=int, default=20)
+    parser.add_argument("--db", default="smartkitchen_microbench")
+    parser.add_argument("--baseline", help="JSON de uma execução anterior")
+    parser.add_argument("--save-baseline", help="Grava o resultado como baseline")
+    parser.add_argument("--time-tolerance", type=float, default=0.3)
+    parser.add_argument("--bytes-tolerance", type=float, default=0.05)
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(_main(args)))
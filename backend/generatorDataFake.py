@@ -1,26 +1,392 @@
-import json
-from datetime import datetime
+"""
+Gera usuários fictícios com despensa e carrinho preenchidos, para testes de
+capacidade. Os documentos têm o mesmo formato dos criados pela API (layout
+embutido da despensa, preços em Decimal128, quantidades com base_quantity).
 
+A geração é feita em lotes por processos paralelos. Cada lote tem a sua semente
+(derivada de --seed e do número do lote), então o conteúdo é o mesmo qualquer
+que seja o número de workers, e só alguns lotes ficam em memória por vez.
+
+    # NDJSON (Extended JSON), um arquivo por collection, pronto para mongoimport:
+    python generatorDataFake.py --users 1000000 --output fake_data/
+
+    # Direto no banco configurado em mongo_db_config.py:
+    python generatorDataFake.py --users 1000000 --mongo --workers 8
+"""
+
+import argparse
+import os
+import random
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+from typing import Dict, NamedTuple
+
+import orjson
+from bson import Decimal128, ObjectId
 from faker import Faker
 
-# Inicializando o Faker
-fake = Faker()
+from models.connection_options.mongo_db_config import mongo_db_infos
+from models.repository.recipe_index import normalize_ingredient
+from src.api.schema.categories import CategoryValue, new_categories
+from src.api.schema.shopping_cart import price_to_decimal128
+from src.api.schema.units import with_base_quantity
+
+COLLECTIONS = mongo_db_infos["COLLECTIONS"]
+
+# Itens típicos de cada categoria: (nome, unidade, quantidades possíveis, preço máximo).
+CATALOG: Dict[CategoryValue, list[tuple[str, str, tuple, float]]] = {
+    CategoryValue.CANDY: [
+        ("Chocolate", "g", (90, 170, 250), 15.0),
+        ("Bala", "g", (100, 500), 8.0),
+        ("Biscoito", "un", (1, 2, 3), 6.0),
+        ("Doce de leite", "g", (400, 800), 14.0),
+    ],
+    CategoryValue.FROZEN: [
+        ("Pizza", "un", (1, 2), 25.0),
+        ("Sorvete", "l", (1, 1.5, 2), 30.0),
+        ("Lasanha", "g", (600, 1000), 22.0),
+        ("Batata frita", "kg", (1, 2), 20.0),
+    ],
+    CategoryValue.DRINKS: [
+        ("Suco", "l", (1, 1.5), 9.0),
+        ("Refrigerante", "l", (2, 3), 10.0),
+        ("Cerveja", "ml", (350, 600), 6.0),
+        ("Agua", "l", (1.5, 5), 4.0),
+        ("Cafe", "g", (250, 500), 18.0),
+    ],
+    CategoryValue.LAUNDRY: [
+        ("Sabao em po", "kg", (1, 2), 25.0),
+        ("Amaciante", "l", (1, 2), 15.0),
+        ("Alvejante", "l", (1, 2), 8.0),
+    ],
+    CategoryValue.MEAT_FISH: [
+        ("Frango", "kg", (1, 2), 20.0),
+        ("Carne moida", "g", (500, 1000), 35.0),
+        ("Picanha", "kg", (1, 1.5), 90.0),
+        ("Salmao", "g", (300, 500), 60.0),
+        ("Linguica", "g", (500, 1000), 25.0),
+    ],
+    CategoryValue.DAIRY_EGGS: [
+        ("Leite", "l", (1, 2, 6), 6.0),
+        ("Ovos", "un", (6, 12, 30), 20.0),
+        ("Queijo", "g", (200, 500), 30.0),
+        ("Iogurte", "g", (170, 900), 12.0),
+        ("Manteiga", "g", (200, 500), 15.0),
+    ],
+    CategoryValue.GROCERY_PRODUCTS: [
+        ("Acucar", "kg", (1, 2, 5), 6.0),
+        ("Farinha", "kg", (1, 2), 7.0),
+        ("Oleo", "ml", (900,), 9.0),
+        ("Sal", "kg", (1,), 3.0),
+    ],
+    CategoryValue.PERSONAL_HYGIENE: [
+        ("Sabonete", "un", (1, 4, 6), 12.0),
+        ("Shampoo", "ml", (300, 400), 20.0),
+        ("Creme dental", "g", (90, 180), 8.0),
+        ("Papel higienico", "un", (4, 12), 25.0),
+    ],
+    CategoryValue.GRAINS_CEREALS: [
+        ("Arroz", "kg", (1, 2, 5), 25.0),
+        ("Feijao", "kg", (1, 2), 10.0),
+        ("Aveia", "g", (250, 500), 8.0),
+        ("Lentilha", "g", (500,), 9.0),
+    ],
+    CategoryValue.CLEANING_MATERIALS: [
+        ("Detergente", "ml", (500,), 3.0),
+        ("Desinfetante", "l", (1, 2), 10.0),
+        ("Esponja", "un", (1, 3), 5.0),
+    ],
+    CategoryValue.FRUITS_VEGETABLES: [
+        ("Banana", "kg", (1, 2), 7.0),
+        ("Maca", "un", (4, 6), 8.0),
+        ("Tomate", "kg", (0.5, 1), 9.0),
+        ("Cebola", "kg", (1,), 6.0),
+        ("Alface", "un", (1,), 4.0),
+        ("Batata", "kg", (1, 2), 8.0),
+    ],
+    CategoryValue.CONDIMENTS_SAUCES: [
+        ("Ketchup", "g", (200, 400), 10.0),
+        ("Maionese", "g", (250, 500), 9.0),
+        ("Molho de tomate", "g", (340,), 4.0),
+        ("Azeite", "ml", (250, 500), 35.0),
+    ],
+    CategoryValue.PASTA_WHEAT_PRODUCTS: [
+        ("Macarrao", "g", (500,), 6.0),
+        ("Lasanha seca", "g", (500,), 8.0),
+        ("Farinha de rosca", "g", (500,), 6.0),
+    ],
+    CategoryValue.BREADS_BAKERY_PRODUCTS: [
+        ("Pao frances", "un", (6, 10), 8.0),
+        ("Pao de forma", "g", (400, 500), 10.0),
+        ("Bolo", "un", (1,), 20.0),
+    ],
+    CategoryValue.CANNED_GOODS_PRESERVES: [
+        ("Milho", "g", (170, 200), 5.0),
+        ("Ervilha", "g", (170, 200), 5.0),
+        ("Atum", "g", (170,), 12.0),
+        ("Palmito", "g", (300,), 18.0),
+    ],
+}
+CATEGORIES = list(CATALOG)
+
+
+class BatchResult(NamedTuple):
+    users: int
+    documents: int
+    generate_seconds: float
+    insert_seconds: float
+    # NDJSON por collection (vazio quando os documentos já foram inseridos).
+    lines: Dict[str, bytes]
+
+
+def _object_id(rng: random.Random) -> ObjectId:
+    # Determinístico, ao contrário de ObjectId(), que usa relógio e processo.
+    return ObjectId(rng.getrandbits(96).to_bytes(12, "big"))
+
+
+def _extended_json(value):
+    # Extended JSON (o formato do mongoimport); orjson só chama isto para os tipos BSON.
+    if isinstance(value, ObjectId):
+        return {"$oid": str(value)}
+    if isinstance(value, Decimal128):
+        return {"$numberDecimal": str(value)}
+    raise TypeError
 
-# Quantidade de registros a serem gerados
-num_records = 5
 
-# Gerando os dados fictícios
-data = []
-for _ in range(num_records):
-    record = {
-        "username": fake.name(),
-        "email": fake.email(),
-        "password": fake.password(),
+def _item_count(rng: random.Random, heavy_ratio: float, limit: int) -> int:
+    # Cauda longa: a maioria tem poucos itens; alguns usuários "pesados" têm centenas.
+    if rng.random() < heavy_ratio:
+        return rng.randint(limit // 4, limit)
+    return min(int(rng.paretovariate(1.5) * 4) - 3, limit)
+
+
+def _fill_categories(
+    rng: random.Random, array_field_count: int, with_price: bool
+) -> list[Dict]:
+    categories = new_categories()
+    by_value = {category["category_value"]: category for category in categories}
+
+    for _ in range(array_field_count):
+        category_value = rng.choice(CATEGORIES)
+        name, unit, quantities, max_price = rng.choice(CATALOG[category_value])
+
+        item = with_base_quantity(
+            {
+                # str, como nas rotas de escrita: é por str que PATCH/DELETE filtram.
+                "item_id": str(_object_id(rng)),
+                "item_name": name,
+                "quantity": rng.choice(quantities),
+                "unit": unit,
+            }
+        )
+        if with_price:
+            price = Decimal(str(round(rng.uniform(1, max_price), 2)))
+            item["price"] = price_to_decimal128(price)
+
+        by_value[category_value]["items"].append(item)
+
+    return categories
+
+
+def generate_batch(
+    seed: int,
+    batch: int,
+    batch_size: int,
+    total_users: int,
+    heavy_ratio: float,
+    max_items: int,
+) -> Dict[str, list[Dict]]:
+    """Documentos de users, pantry e shopping_cart dos usuários do lote `batch`."""
+    batch_seed = seed * 1_000_003 + batch
+    rng = random.Random(batch_seed)
+    fake = Faker("pt_BR")
+    fake.seed_instance(batch_seed)
+
+    documents: Dict[str, list[Dict]] = {
+        COLLECTIONS["collection_users"]: [],
+        COLLECTIONS["collection_pantry"]: [],
+        COLLECTIONS["collection_shopping_cart"]: [],
     }
-    data.append(record)
 
-# Salvando os dados em um arquivo JSON
-with open("fake_data.json", "w") as json_file:
-    json.dump(data, json_file, indent=4)
+    first = batch * batch_size
+    for index in range(first, min(first + batch_size, total_users)):
+        user_id = _object_id(rng)
+        # O índice garante username/email únicos (índices únicos em users); com
+        # até 5 letras + 4 ou mais dígitos fica dentro dos limites de UserIn.
+        first_name = normalize_ingredient(fake.first_name()).replace(" ", "")
+        username = f"{first_name[:5]}{index:04d}"
+
+        documents[COLLECTIONS["collection_users"]].append(
+            {
+                "_id": user_id,
+                "username": username,
+                "email": f"{username}@{fake.free_email_domain()}",
+                # Os especiais do Faker incluem "_", que UserIn não aceita.
+                "password": fake.password(length=11, special_chars=False) + "!",
+            }
+        )
+        documents[COLLECTIONS["collection_pantry"]].append(
+            {
+                "user_id": user_id,
+                "username": username,
+                "pantry": _fill_categories(
+                    rng, _item_count(rng, heavy_ratio, max_items), with_price=False
+                ),
+                "version": 0,
+            }
+        )
+        documents[COLLECTIONS["collection_shopping_cart"]].append(
+            {
+                "user_id": user_id,
+                "username": username,
+                "shoppingCart": _fill_categories(
+                    rng,
+                    _item_count(rng, heavy_ratio, max_items // 4),
+                    with_price=True,
+                ),
+                "version": 0,
+            }
+        )
+
+    return documents
+
+
+# Um cliente síncrono por processo, aberto no initializer do pool.
+_db = None
+
+
+def _connect_worker() -> None:
+    global _db
+
+    from pymongo import MongoClient
+    from pymongo.server_api import ServerApi
+
+    from models.connection_options.connections import DBConnectionHandler
+
+    client = MongoClient(
+        DBConnectionHandler().get_connection_string(), server_api=ServerApi("1")
+    )
+    _db = client[mongo_db_infos["DB_NAME"]]
+
+
+def _run_batch(batch: int, args: argparse.Namespace) -> BatchResult:
+    started = time.perf_counter()
+    documents = generate_batch(
+        args.seed,
+        batch,
+        args.batch_size,
+        args.users,
+        args.heavy_ratio,
+        args.max_items,
+    )
+    generated = time.perf_counter()
+
+    users = len(documents[COLLECTIONS["collection_users"]])
+    count = sum(len(docs) for docs in documents.values())
+
+    if _db is None:
+        # A serialização também roda no worker: o processo principal só escreve.
+        lines = {
+            name: b"".join(
+                orjson.dumps(
+                    document, default=_extended_json, option=orjson.OPT_APPEND_NEWLINE
+                )
+                for document in docs
+            )
+            for name, docs in documents.items()
+        }
+        return BatchResult(users, count, generated - started, 0.0, lines)
+
+    for name, docs in documents.items():
+        if docs:
+            _db[name].insert_many(docs, ordered=False)
+
+    return BatchResult(
+        users, count, generated - started, time.perf_counter() - generated, {}
+    )
+
+
+def _main(args: argparse.Namespace) -> None:
+    batches = range(-(-args.users // args.batch_size))
+
+    files = {}
+    if not args.mongo:
+        os.makedirs(args.output, exist_ok=True)
+        files = {
+            name: open(os.path.join(args.output, f"{name}.ndjson"), "wb")
+            for name in (
+                COLLECTIONS["collection_users"],
+                COLLECTIONS["collection_pantry"],
+                COLLECTIONS["collection_shopping_cart"],
+            )
+        }
+
+    totals = {"users": 0, "documents": 0, "generate": 0.0, "insert": 0.0}
+    started = time.perf_counter()
+
+    def consume(result: BatchResult) -> None:
+        for name, lines in result.lines.items():
+            files[name].write(lines)
+
+        totals["users"] += result.users
+        totals["documents"] += result.documents
+        totals["generate"] += result.generate_seconds
+        totals["insert"] += result.insert_seconds
+
+    try:
+        with ProcessPoolExecutor(
+            args.workers, initializer=_connect_worker if args.mongo else None
+        ) as executor:
+            # Janela limitada de lotes em andamento, consumidos em ordem: a saída é
+            # a mesma a cada execução e a memória não cresce com --users.
+            pending = deque()
+            for batch in batches:
+                pending.append(executor.submit(_run_batch, batch, args))
+                if len(pending) >= args.workers * 2:
+                    consume(pending.popleft().result())
+                    if batch % 100 == 0:
+                        print(f"{totals['users']} usuários")
+
+            while pending:
+                consume(pending.popleft().result())
+    finally:
+        for file in files.values():
+            file.close()
+
+    elapsed = time.perf_counter() - started
+    documents = totals["documents"]
+    print(f"{totals['users']} usuários, {documents} documentos em {elapsed:.1f} s")
+    print(f"total      {documents / elapsed:10.0f} docs/s")
+    # Por worker: documentos sobre o tempo somado da etapa em todos os processos.
+    print(
+        f"geração    {documents / max(totals['generate'], 1e-9):10.0f} docs/s por worker"
+    )
+    if args.mongo:
+        print(
+            f"insert     {documents / max(totals['insert'], 1e-9):10.0f} docs/s por worker"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Gera usuários fictícios com despensa e carrinho."
+    )
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--heavy-ratio",
+        type=float,
+        default=0.01,
+        help="Fração de usuários com centenas de itens",
+    )
+    parser.add_argument("--max-items", type=int, default=800)
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--output", default="fake_data", help="Diretório dos NDJSON")
+    target.add_argument("--mongo", action="store_true", help="Insere no banco")
+    args = parser.parse_args()
 
-print(f"{num_records} registros foram salvos no arquivo fake_data.json")
+    _main(args)
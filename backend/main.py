@@ -1,15 +1,102 @@
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from models.connection_options.connections import create_db_handler
+from models.connection_options.health import DBHealthMonitor
+from models.connection_options.mongo_db_config import (
+    cache_options,
+    health_options,
+    metrics_options,
+    mongo_db_infos,
+    mongo_index_options,
+    monitoring_options,
+    recipe_index_options,
+)
+from models.repository.cache import LRUCache
+from models.repository.collections import CollectionHandler
+from models.repository.indexes import IndexVerificationError, ensure_indexes
+from models.repository.recipe_index import RecipeIndex, RecipeIndexRefresher
+from src.api.endpoints.health import router as health_router
+from src.api.endpoints.metrics import router as metrics_router
+from src.api.metrics import MetricsMiddleware, MetricsRegistry
 from src.api.router import api_router
+from src.api.server_timing import ServerTimingMiddleware
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Um único cliente (e pool de conexões) por worker, compartilhado pelas rotas.
+    db_handler = create_db_handler()
+    db_handler.connect_to_db(mongo_db_infos["DB_NAME"])
+    await db_handler.warm_up_pool()
+
+    if mongo_index_options["MODE"] != "off":
+        try:
+            await ensure_indexes(
+                db_handler.get_db_connection(),
+                check_only=mongo_index_options["MODE"] == "check",
+            )
+        except IndexVerificationError as error:
+            # A app sobe mesmo assim; a mensagem diz qual índice e como corrigir.
+            logger.error(
+                "Index setup (%s) failed: %s", mongo_index_options["MODE"], error
+            )
+
+    app.state.db_handler = db_handler
+    app.state.health = DBHealthMonitor(
+        db_handler,
+        interval=health_options["PING_INTERVAL_SECONDS"],
+        timeout=health_options["PING_TIMEOUT_SECONDS"],
+        stale_after=health_options["STALE_AFTER_SECONDS"],
+    )
+    await app.state.health.start()
+    recipes_repository = CollectionHandler(
+        db_handler.get_db_connection(),
+        mongo_db_infos["COLLECTIONS"]["collection_recipes"],
+    )
+    app.state.recipe_index = await RecipeIndex.build(recipes_repository)
+    recipe_index_refresher = None
+    if recipe_index_options["REFRESH_SECONDS"] > 0:
+        recipe_index_refresher = RecipeIndexRefresher(
+            app.state.recipe_index,
+            recipes_repository,
+            interval=recipe_index_options["REFRESH_SECONDS"],
+        )
+        recipe_index_refresher.start()
+    app.state.caches = (
+        {
+            collection: LRUCache(
+                cache_options["MAX_SIZE"], cache_options["TTL_SECONDS"]
+            )
+            for collection in cache_options["COLLECTIONS"]
+        }
+        if cache_options["ENABLED"]
+        else {}
+    )
+
+    yield
+
+    if recipe_index_refresher is not None:
+        await recipe_index_refresher.stop()
+    await app.state.health.stop()
+    db_handler.close()
+
 
 app = FastAPI(
     title="smart kitchen",
     version="0.1.0",
     description="APP perfeito para salva as suas receitas favoritas.",
+    lifespan=lifespan,
 )
 
 app.include_router(api_router, prefix="/api")
+# Probes do load balancer ficam fora do /api.
+app.include_router(health_router, prefix="/health", tags=["Health"])
 
 origins = ["*"]
 
@@ -21,6 +108,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if monitoring_options["ENABLED"]:
+    app.add_middleware(ServerTimingMiddleware)
+
+if metrics_options["ENABLED"]:
+    # Fora do /api, onde o Prometheus espera encontrar. Adicionado por último para
+    # ser o middleware mais externo e medir também o CORS.
+    app.include_router(metrics_router)
+    app.state.metrics = MetricsRegistry()
+    app.state.metrics.preallocate(app.routes)
+    app.add_middleware(MetricsMiddleware, registry=app.state.metrics)
+
 
 if __name__ == "__main__":
     import uvicorn
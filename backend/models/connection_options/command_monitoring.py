@@ -0,0 +1,172 @@
+"""
+Monitoramento dos comandos enviados ao Mongo (pymongo.monitoring).
+
+O CommandTimer é registrado no cliente Motor e, para cada comando, anota
+duração, collection, operação e tamanho da resposta na requisição corrente
+(a `current_request`, uma ContextVar definida pelo ServerTimingMiddleware).
+O Motor executa o pymongo num pool de threads, mas copia o contexto para a
+thread, então o listener enxerga o mesmo RequestDbTiming da rota.
+
+Comandos acima de `slow_ms` vão para o logger "smartkitchen.slow_query" como
+uma linha JSON, com o formato do filtro sem os valores, ex.:
+{user_id, pantry.category_value}.
+"""
+
+import json
+import logging
+from contextvars import ContextVar
+from typing import List, NamedTuple, Optional
+
+from bson import encode
+from pymongo import monitoring
+
+slow_query_logger = logging.getLogger("smartkitchen.slow_query")
+
+
+class CommandRecord(NamedTuple):
+    operation: str
+    collection: Optional[str]
+    duration_ms: float
+    reply_bytes: int
+    failed: bool
+
+
+class RequestDbTiming:
+    """Comandos executados durante uma requisição."""
+
+    __slots__ = ("scope", "commands")
+
+    def __init__(self, scope: Optional[dict] = None) -> None:
+        self.scope = scope
+        # list.append é atômico; o listener pode rodar em várias threads ao mesmo tempo.
+        self.commands: List[CommandRecord] = []
+
+    @property
+    def db_ms(self) -> float:
+        return sum(command.duration_ms for command in self.commands)
+
+    @property
+    def route(self) -> Optional[str]:
+        # Rota com template (/api/pantry/{user_id}), sem o user_id do path.
+        route = self.scope.get("route") if self.scope else None
+        return getattr(route, "path", None)
+
+
+current_request: ContextVar[Optional[RequestDbTiming]] = ContextVar(
+    "smartkitchen_current_request", default=None
+)
+
+# Campo com o filtro em cada comando; update/delete têm uma lista de statements.
+_FILTER_FIELDS = {
+    "find": "filter",
+    "count": "query",
+    "distinct": "query",
+    "findAndModify": "query",
+}
+_BULK_FILTER_FIELDS = {"update": "updates", "delete": "deletes"}
+
+
+def command_filter(command_name: str, command) -> Optional[dict]:
+    """Filtro de um comando de leitura/escrita, ou None se não houver."""
+    if command_name in _FILTER_FIELDS:
+        return command.get(_FILTER_FIELDS[command_name])
+    if command_name in _BULK_FILTER_FIELDS:
+        statements = command.get(_BULK_FILTER_FIELDS[command_name]) or []
+        return statements[0].get("q") if statements else None
+    if command_name == "aggregate":
+        pipeline = command.get("pipeline") or []
+        if pipeline and "$match" in pipeline[0]:
+            return pipeline[0]["$match"]
+    return None
+
+
+def filter_shape(query) -> str:
+    """
+    Campos consultados, sem os valores: {"user_id": 1, "a.b": {"$in": [..]}}
+    vira "{user_id, a.b}". $and/$or/$nor e $elemMatch são percorridos.
+    """
+    if not isinstance(query, dict):
+        return "{}"
+    return "{" + ", ".join(_shape_keys(query, "")) + "}"
+
+
+def _shape_keys(query: dict, prefix: str):
+    for key, value in query.items():
+        if key in ("$and", "$or", "$nor") and isinstance(value, list):
+            yield f"{key}[{', '.join(filter_shape(clause) for clause in value)}]"
+        elif (
+            isinstance(value, dict)
+            and isinstance(value.get("$elemMatch"), dict)
+            and not key.startswith("$")
+        ):
+            yield from _shape_keys(value["$elemMatch"], f"{prefix}{key}.")
+        else:
+            yield prefix + key
+
+
+def _collection(command_name: str, command) -> Optional[str]:
+    collection = command.get(command_name)
+    if isinstance(collection, str):
+        return collection
+    # getMore traz o id do cursor no lugar do nome.
+    return command.get("collection")
+
+
+class CommandTimer(monitoring.CommandListener):
+    def __init__(self, slow_ms: float = 100.0, reply_size: bool = True) -> None:
+        self.slow_ms = slow_ms
+        # Medir a resposta exige recodificá-la em BSON; dá para desligar.
+        self.reply_size = reply_size
+        # Comandos em andamento, para o log de lentos saber o filtro e a collection.
+        self.__pending = {}
+
+    def started(self, event) -> None:
+        self.__pending[event.connection_id, event.request_id] = event.command
+
+    def succeeded(self, event) -> None:
+        self.__finish(event, event.reply, failed=False)
+
+    def failed(self, event) -> None:
+        self.__finish(event, None, failed=True)
+
+    def __finish(self, event, reply, failed: bool) -> None:
+        command = self.__pending.pop((event.connection_id, event.request_id), None)
+        if command is None:
+            return
+
+        record = CommandRecord(
+            operation=event.command_name,
+            collection=_collection(event.command_name, command),
+            duration_ms=event.duration_micros / 1000,
+            reply_bytes=len(encode(reply)) if reply and self.reply_size else 0,
+            failed=failed,
+        )
+
+        timing = current_request.get()
+        if timing is not None:
+            timing.commands.append(record)
+
+        if record.duration_ms >= self.slow_ms:
+            self.__log_slow(record, command, event.database_name, timing)
+
+    def __log_slow(self, record, command, database, timing) -> None:
+        slow_query_logger.warning(
+            json.dumps(
+                {
+                    "event": "slow_query",
+                    "database": database,
+                    "collection": record.collection,
+                    "operation": record.operation,
+                    "filter_shape": filter_shape(
+                        command_filter(record.operation, command)
+                    ),
+                    "duration_ms": round(record.duration_ms, 3),
+                    "reply_bytes": record.reply_bytes,
+                    "failed": record.failed,
+                    "route": timing.route if timing else None,
+                    "method": (
+                        timing.scope.get("method") if timing and timing.scope else None
+                    ),
+                }
+            )
+        )
@@ -0,0 +1,108 @@
+"""
+Saúde da conexão com o Mongo para o /health/ready.
+
+Uma task em background pinga o cluster a cada `interval` segundos e guarda o
+último resultado; os probes do load balancer só leem esse resultado e nunca
+chegam ao banco, por mais frequentes que sejam.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from models.connection_options.periodic_task import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+
+def _consume_error(ping: asyncio.Future) -> None:
+    # O erro de um ping que terminou depois do timeout já foi contado como falha.
+    if not ping.cancelled():
+        ping.exception()
+
+
+class DBHealthMonitor:
+    def __init__(
+        self,
+        db_handler,
+        interval: float = 5.0,
+        timeout: float = 2.0,
+        stale_after: float = 15.0,
+    ) -> None:
+        self.db_handler = db_handler
+        self.interval = interval
+        self.timeout = timeout
+        # Se a task travar ou morrer, o último "ok" deixa de valer depois disso.
+        self.stale_after = stale_after
+        self.__periodic = PeriodicTask(self.check, interval, "Database health check")
+        # Ping em andamento: enquanto ele não termina, nenhum outro é iniciado.
+        self.__ping: Optional[asyncio.Future] = None
+        self.__ok = False
+        self.__rtt: Optional[float] = None
+        self.__error: Optional[str] = None
+        self.__checked_at: Optional[float] = None
+        self.__consecutive_failures = 0
+
+    async def start(self) -> None:
+        # O primeiro ping é aguardado para o worker já subir com um estado real.
+        await self.check()
+        self.__periodic.start()
+
+    async def stop(self) -> None:
+        await self.__periodic.stop()
+        if self.__ping is not None:
+            self.__ping.cancel()
+            self.__ping = None
+
+    async def check(self) -> None:
+        # Um ping que estourou o timeout continua na thread do executor até o
+        # driver desistir; o próximo check espera por ele (shield) em vez de
+        # ocupar outra thread.
+        if self.__ping is None or self.__ping.done():
+            self.__ping = asyncio.ensure_future(self.db_handler.ping_db(self.timeout))
+            self.__ping.add_done_callback(_consume_error)
+        try:
+            rtt = await asyncio.wait_for(asyncio.shield(self.__ping), self.timeout)
+        except Exception as error:
+            # Qualquer falha (timeout, seleção de servidor, autenticação) é indisponível.
+            if self.__ok or self.__checked_at is None:
+                logger.error("Database ping failed: %r", error)
+            self.__ok = False
+            self.__rtt = None
+            self.__error = type(error).__name__
+            self.__consecutive_failures += 1
+        else:
+            if not self.__ok and self.__checked_at is not None:
+                logger.info("Database ping recovered")
+            self.__ok = True
+            self.__rtt = rtt
+            self.__error = None
+            self.__consecutive_failures = 0
+        self.__checked_at = time.monotonic()
+
+    def snapshot(self) -> dict:
+        age = (
+            time.monotonic() - self.__checked_at
+            if self.__checked_at is not None
+            else None
+        )
+        stale = age is None or age > self.stale_after
+        pool = self.db_handler.pool_stats()
+        max_pool_size = pool.get("max_pool_size")
+
+        return {
+            "ready": self.__ok and not stale,
+            "ping_ok": self.__ok,
+            "ping_rtt_ms": (
+                round(self.__rtt * 1000, 3) if self.__rtt is not None else None
+            ),
+            "error": self.__error,
+            "consecutive_failures": self.__consecutive_failures,
+            "checked_seconds_ago": round(age, 3) if age is not None else None,
+            "stale": stale,
+            **pool,
+            "pool_saturation": (
+                round(pool["checked_out"] / max_pool_size, 3) if max_pool_size else None
+            ),
+        }
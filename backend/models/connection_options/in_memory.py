@@ -0,0 +1,786 @@
+"""
+Backend em memória com a mesma interface do Motor usada pelo CollectionHandler
+(find/find_one com projeção, insert, update_one com $set/$addToSet/$pull,
+operador posicional $ e arrayFilters, bulk_write, delete, aggregate). Com
+SMARTKITCHEN_DB_BACKEND=memory a API inteira roda sem banco: útil para
+microbenchmarks, testes de carga e um modo embarcado de um nó só.
+
+Os índices do registro INDEXES (models/repository/indexes.py) viram dicts
+valor -> _ids, então buscas por user_id, username ou _id são O(1). Cada
+operação roda sem await no meio, portanto é atômica dentro do event loop.
+Limites: os dados vivem em um processo só e não há transações.
+"""
+
+import itertools
+from typing import Any, Dict, Iterable
+
+from bson import ObjectId
+from pymongo import DeleteMany, DeleteOne, InsertOne, ReplaceOne, UpdateMany, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, WriteError
+from pymongo.results import (
+    BulkWriteResult,
+    DeleteResult,
+    InsertManyResult,
+    InsertOneResult,
+    UpdateResult,
+)
+
+from models.connection_options.in_memory_query import (
+    MISSING,
+    apply_update,
+    clone,
+    equality_fields,
+    get_values,
+    matches,
+    project,
+    run_pipeline,
+    set_path,
+    sort_key,
+)
+
+# Atalho de _hashable para os tipos mais comuns nas chaves (mesmo rank de sort_key).
+_SCALAR_RANKS = {str: 3, ObjectId: 7, int: 2, float: 2}
+
+
+def _hashable(value: Any) -> Any:
+    # Chave de dict que segue a igualdade do MongoDB (Decimal128 vira Decimal e
+    # 1 == 1.0); subdocumentos e arrays não são indexáveis por hash.
+    rank = _SCALAR_RANKS.get(type(value))
+    if rank is not None:
+        return (rank, value)
+    key = sort_key(value)
+    return MISSING if key[0] in (4, 5, 10) else key
+
+
+def _key_values(document: Dict, field: str) -> list:
+    # Valores que o documento indexa em `field` (multikey; ausente conta como null).
+    values = []
+    for value in get_values(document, field.split(".")):
+        if isinstance(value, list):
+            values.extend(value or [None])
+        else:
+            values.append(value)
+    return values or [None]
+
+
+def _lookup_options(condition: Any) -> list | None:
+    # Valores exatos que uma condição aceita ($eq, $in ou literal), se houver.
+    if isinstance(condition, dict):
+        if set(condition) == {"$eq"}:
+            options = [condition["$eq"]]
+        elif set(condition) == {"$in"}:
+            options = list(condition["$in"])
+        else:
+            # Subdocumento literal ou outros operadores: sem uso do índice.
+            return None
+    else:
+        options = [condition]
+
+    if any(
+        isinstance(option, list) or _hashable(option) is MISSING for option in options
+    ):
+        return None
+    return options
+
+
+class _Index:
+    def __init__(self, name: str, keys: list[tuple[str, int]], unique: bool) -> None:
+        self.name = name
+        self.keys = keys
+        self.unique = unique
+        self.first_field = keys[0][0]
+        # Valor do primeiro campo -> _ids dos documentos com esse valor.
+        self.entries: Dict[Any, set] = {}
+        # Documentos com valores sem hash (subdocumentos) no primeiro campo.
+        self.unhashable: set = set()
+        # Chave completa -> _id, só para índices únicos.
+        self.unique_keys: Dict[tuple, Any] = {}
+        # _id -> chaves do documento, para não recalcular as antigas a cada update.
+        self.document_keys: Dict[Any, tuple[set, bool]] = {}
+
+    def _unique_keys(self, document: Dict) -> Iterable[tuple]:
+        values = [
+            [_hashable(value) for value in _key_values(document, field)]
+            for field, _ in self.keys
+        ]
+        return set(itertools.product(*values))
+
+    def conflict(self, document: Dict) -> Dict | None:
+        """keyValue da chave duplicada, se o documento violar o índice único."""
+        if not self.unique:
+            return None
+        for key in self._unique_keys(document):
+            owner = self.unique_keys.get(key, MISSING)
+            if owner is not MISSING and owner != document["_id"]:
+                return {
+                    field: _key_values(document, field)[0] for field, _ in self.keys
+                }
+        return None
+
+    def _entry_keys(self, document: Dict) -> tuple[set, bool]:
+        keys, unhashable = set(), False
+        for value in _key_values(document, self.first_field):
+            key = _hashable(value)
+            if key is MISSING:
+                unhashable = True
+            else:
+                keys.add(key)
+        return keys, unhashable
+
+    def replace(self, previous: Dict | None, document: Dict | None) -> None:
+        """
+        Troca as entradas de `previous` pelas de `document` (None = nenhum).
+        Só a diferença é aplicada: num update de um item, um índice multikey
+        sobre milhares de itens muda uma ou duas entradas.
+        """
+        _id = (document if document is not None else previous)["_id"]
+        old_keys, old_unhashable = self.document_keys.pop(_id, (set(), False))
+        if document is not None:
+            new_keys, new_unhashable = self.document_keys[_id] = self._entry_keys(
+                document
+            )
+        else:
+            new_keys, new_unhashable = set(), False
+
+        for key in old_keys - new_keys:
+            ids = self.entries.get(key)
+            if ids is not None:
+                ids.discard(_id)
+                if not ids:
+                    del self.entries[key]
+        for key in new_keys - old_keys:
+            self.entries.setdefault(key, set()).add(_id)
+
+        if new_unhashable:
+            self.unhashable.add(_id)
+        elif old_unhashable:
+            self.unhashable.discard(_id)
+
+        if self.unique:
+            old_unique = self._unique_keys(previous) if previous is not None else set()
+            new_unique = self._unique_keys(document) if document is not None else set()
+            for key in old_unique - new_unique:
+                if self.unique_keys.get(key) == _id:
+                    del self.unique_keys[key]
+            for key in new_unique - old_unique:
+                self.unique_keys[key] = _id
+
+    def lookup(self, condition: Any) -> set | None:
+        """_ids candidatos para a condição no primeiro campo (None = sem uso do índice)."""
+        options = _lookup_options(condition)
+        if options is None:
+            return None
+
+        ids = set(self.unhashable)
+        for option in options:
+            ids |= self.entries.get(_hashable(option), set())
+        return ids
+
+
+class InMemoryCursor:
+    def __init__(self, produce) -> None:
+        # `produce(sort, skip, limit)` devolve os documentos só na hora da leitura.
+        self._produce = produce
+        self._sort: list[tuple[str, int]] = []
+        self._skip = 0
+        self._limit = 0
+        self._iterator = None
+
+    def sort(self, key_or_list, direction: int = 1) -> "InMemoryCursor":
+        if isinstance(key_or_list, str):
+            self._sort = [(key_or_list, direction)]
+        else:
+            self._sort = list(key_or_list)
+        return self
+
+    def skip(self, skip: int) -> "InMemoryCursor":
+        self._skip = skip
+        return self
+
+    def limit(self, limit: int) -> "InMemoryCursor":
+        self._limit = limit
+        return self
+
+    def batch_size(self, batch_size: int) -> "InMemoryCursor":
+        return self
+
+    async def to_list(self, length: int | None = None) -> list[Dict]:
+        documents = self._produce(self._sort, self._skip, self._limit)
+        return documents if length is None else documents[:length]
+
+    def __aiter__(self) -> "InMemoryCursor":
+        return self
+
+    async def __anext__(self) -> Dict:
+        if self._iterator is None:
+            self._iterator = iter(await self.to_list())
+        try:
+            return next(self._iterator)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class InMemoryFindCursor(InMemoryCursor):
+    def __init__(
+        self, collection: "InMemoryCollection", filter_document: Dict, projection
+    ):
+        super().__init__(
+            lambda sort, skip, limit: collection._find(
+                filter_document, projection, sort, skip, limit
+            )
+        )
+        self._collection = collection
+        self._filter = filter_document
+
+    async def explain(self) -> Dict:
+        scans = self._collection._plan(self._filter)
+        if scans is None:
+            plan = {"stage": "COLLSCAN"}
+        elif len(scans) == 1 and scans[0][0] == "_id_":
+            plan = {"stage": "IDHACK"}
+        else:
+            stages = [{"stage": "IXSCAN", "indexName": name} for name, _ in scans]
+            plan = {
+                "stage": "FETCH",
+                "inputStage": (
+                    stages[0]
+                    if len(stages) == 1
+                    else {"stage": "OR", "inputStages": stages}
+                ),
+            }
+        return {
+            "queryPlanner": {
+                "namespace": self._collection.name,
+                "winningPlan": plan,
+            }
+        }
+
+
+class InMemoryCollection:
+    def __init__(self, database: "InMemoryDatabase", name: str) -> None:
+        self.database = database
+        self.name = name
+        # _id -> documento, na ordem de inserção (a ordem natural de um find).
+        self._documents: Dict[Any, Dict] = {}
+        self._indexes: Dict[str, _Index] = {}
+        # _id -> posição de inserção, para ordenar candidatos vindos dos índices.
+        self._sequence: Dict[Any, int] = {}
+        self._inserted = 0
+
+    # ---------------------------------------------------------------- índices
+
+    def _index_scan(self, filter_document: Dict) -> tuple[str, Iterable] | None:
+        # Primeiro índice (o do _id antes) cujo campo tem igualdade ou $in no filtro.
+        if "_id" in filter_document:
+            ids = _lookup_options(filter_document["_id"])
+            if ids is not None:
+                return "_id_", ids
+        for index in self._indexes.values():
+            if index.first_field in filter_document:
+                ids = index.lookup(filter_document[index.first_field])
+                if ids is not None:
+                    return index.name, ids
+        return None
+
+    def _plan(self, filter_document: Dict) -> list[tuple[str, Iterable]] | None:
+        """Índices usados pelo filtro (um por ramo de um $or) ou None para scan."""
+        scan = self._index_scan(filter_document)
+        if scan is not None:
+            return [scan]
+        if filter_document.get("$or"):
+            scans = [self._index_scan(branch) for branch in filter_document["$or"]]
+            if all(scans):
+                return scans
+        return None
+
+    def _candidates(self, filter_document: Dict) -> Iterable[Dict]:
+        plan = self._plan(filter_document)
+        if plan is None:
+            return list(self._documents.values())
+
+        ids = {_id for _, scan_ids in plan for _id in scan_ids}
+        found = [self._documents[_id] for _id in ids if _id in self._documents]
+        # Mantém a ordem natural (de inserção) entre os candidatos.
+        if len(found) > 1:
+            found.sort(key=lambda document: self._sequence[document["_id"]])
+        return found
+
+    def _matching(self, filter_document: Dict | None) -> Iterable[Dict]:
+        filter_document = filter_document or {}
+        for document in self._candidates(filter_document):
+            if matches(document, filter_document):
+                yield document
+
+    def _check_unique(self, document: Dict) -> None:
+        for index in self._indexes.values():
+            key_value = index.conflict(document)
+            if key_value is not None:
+                raise DuplicateKeyError(
+                    f"E11000 duplicate key error collection: {self.name} index: "
+                    f"{index.name} dup key: {key_value}",
+                    11000,
+                    {
+                        "index": 0,
+                        "code": 11000,
+                        "keyPattern": dict(index.keys),
+                        "keyValue": key_value,
+                        "errmsg": f"E11000 duplicate key error index: {index.name}",
+                    },
+                )
+
+    def _store(self, document: Dict, previous: Dict | None = None) -> None:
+        self._check_unique(document)
+        for index in self._indexes.values():
+            index.replace(previous, document)
+        if previous is None:
+            self._sequence[document["_id"]] = self._inserted
+            self._inserted += 1
+        self._documents[document["_id"]] = document
+
+    def _discard(self, document: Dict) -> None:
+        for index in self._indexes.values():
+            index.replace(document, None)
+        del self._documents[document["_id"]]
+        del self._sequence[document["_id"]]
+
+    async def create_index(
+        self, keys, name: str | None = None, unique: bool = False, **kwargs
+    ) -> str:
+        if isinstance(keys, str):
+            keys = [(keys, 1)]
+        keys = list(keys)
+        name = name or "_".join(f"{field}_{direction}" for field, direction in keys)
+        if name not in self._indexes:
+            index = _Index(name, keys, unique)
+            for document in self._documents.values():
+                if index.conflict(document) is not None:
+                    raise DuplicateKeyError(
+                        f"E11000 duplicate key error building index {name}", 11000
+                    )
+                index.replace(None, document)
+            self._indexes[name] = index
+        return name
+
+    async def create_indexes(self, indexes: list, session=None, **kwargs) -> list[str]:
+        names = []
+        for model in indexes:
+            document = model.document
+            names.append(
+                await self.create_index(
+                    list(document["key"].items()),
+                    name=document.get("name"),
+                    unique=document.get("unique", False),
+                )
+            )
+        return names
+
+    async def index_information(self, session=None) -> Dict:
+        information = {"_id_": {"key": [("_id", 1)]}}
+        for index in self._indexes.values():
+            information[index.name] = {"key": list(index.keys)}
+            if index.unique:
+                information[index.name]["unique"] = True
+        return information
+
+    async def drop_indexes(self, session=None) -> None:
+        self._indexes.clear()
+
+    # ---------------------------------------------------------------- leitura
+
+    def _find(
+        self,
+        filter_document: Dict | None,
+        projection: Dict | None,
+        sort: list[tuple[str, int]],
+        skip: int,
+        limit: int,
+    ) -> list[Dict]:
+        documents = list(self._matching(filter_document))
+        for field, direction in reversed(sort):
+            documents.sort(
+                key=lambda document: sort_key(
+                    (get_values(document, field.split(".")) or [MISSING])[0]
+                ),
+                reverse=direction < 0,
+            )
+        documents = documents[skip:]
+        if limit:
+            documents = documents[:limit]
+        return [
+            project(document, projection, filter_document) for document in documents
+        ]
+
+    @staticmethod
+    def _as_filter(filter_document: Any) -> Dict:
+        # Como no driver, um valor que não é dict é tratado como _id.
+        if filter_document is None:
+            return {}
+        if not isinstance(filter_document, dict):
+            return {"_id": filter_document}
+        return filter_document
+
+    def find(
+        self,
+        filter: Any = None,
+        projection: Dict | list | None = None,
+        session=None,
+        **kwargs,
+    ) -> InMemoryFindCursor:
+        if isinstance(projection, list):
+            projection = {field: 1 for field in projection}
+        cursor = InMemoryFindCursor(self, self._as_filter(filter), projection)
+        if kwargs.get("sort"):
+            cursor.sort(kwargs["sort"])
+        return cursor.skip(kwargs.get("skip", 0)).limit(kwargs.get("limit", 0))
+
+    async def find_one(
+        self, filter: Any = None, projection: Dict | None = None, session=None, **kwargs
+    ) -> Dict | None:
+        documents = await self.find(filter, projection, **kwargs).limit(1).to_list()
+        return documents[0] if documents else None
+
+    async def count_documents(self, filter: Dict, session=None, **kwargs) -> int:
+        return sum(1 for _ in self._matching(filter))
+
+    async def estimated_document_count(self, **kwargs) -> int:
+        return len(self._documents)
+
+    def aggregate(self, pipeline: list[Dict], session=None, **kwargs) -> InMemoryCursor:
+        def produce(sort, skip, limit) -> list[Dict]:
+            # Um $match inicial usa os índices, como no servidor.
+            source = self._documents.values()
+            stages = pipeline
+            if pipeline and "$match" in pipeline[0]:
+                source = list(self._matching(pipeline[0]["$match"]))
+                stages = pipeline[1:]
+            return run_pipeline(list(source), stages, self.database._lookup)
+
+        return InMemoryCursor(produce)
+
+    # ---------------------------------------------------------------- escrita
+
+    def _insert(self, document: Dict) -> Any:
+        if "_id" not in document:
+            # Como o driver, o _id gerado também fica no documento de quem chamou.
+            document["_id"] = ObjectId()
+        if document["_id"] in self._documents:
+            raise DuplicateKeyError(
+                f"E11000 duplicate key error collection: {self.name} index: _id_",
+                11000,
+                {
+                    "index": 0,
+                    "code": 11000,
+                    "keyPattern": {"_id": 1},
+                    "keyValue": {"_id": document["_id"]},
+                },
+            )
+        self._store(clone(document))
+        return document["_id"]
+
+    def _update(
+        self,
+        filter_document: Dict,
+        update: Dict | list,
+        upsert: bool,
+        array_filters: list[Dict] | None,
+        many: bool,
+    ) -> Dict:
+        if not update:
+            raise ValueError("update cannot be empty")
+        if isinstance(update, dict) and not next(iter(update)).startswith("$"):
+            raise ValueError("update only works with $ operators")
+
+        filter_document = self._as_filter(filter_document)
+        targets = list(self._matching(filter_document))
+        if not many:
+            targets = targets[:1]
+
+        modified = 0
+        for document in targets:
+            updated = clone(document)
+            if apply_update(updated, update, filter_document, array_filters):
+                self._store(updated, previous=document)
+                modified += 1
+
+        result = {"n": len(targets), "nModified": modified}
+        if not targets and upsert:
+            document = {}
+            for field, value in equality_fields(filter_document).items():
+                set_path(document, field, clone(value))
+            apply_update(
+                document, update, filter_document, array_filters, is_insert=True
+            )
+            document.setdefault("_id", ObjectId())
+            self._store(document)
+            result = {"n": 1, "nModified": 0, "upserted": document["_id"]}
+        return result
+
+    def _replace(self, filter_document: Dict, replacement: Dict, upsert: bool) -> Dict:
+        filter_document = self._as_filter(filter_document)
+        targets = list(self._matching(filter_document))[:1]
+        if targets:
+            previous = targets[0]
+            document = {"_id": previous["_id"], **clone(replacement)}
+            self._store(document, previous=previous)
+            return {"n": 1, "nModified": int(document != previous)}
+        if upsert:
+            document = clone(replacement)
+            document.setdefault("_id", filter_document.get("_id", ObjectId()))
+            self._store(document)
+            return {"n": 1, "nModified": 0, "upserted": document["_id"]}
+        return {"n": 0, "nModified": 0}
+
+    def _delete(self, filter_document: Dict, many: bool) -> int:
+        targets = list(self._matching(self._as_filter(filter_document)))
+        if not many:
+            targets = targets[:1]
+        for document in targets:
+            self._discard(document)
+        return len(targets)
+
+    async def insert_one(
+        self, document: Dict, session=None, **kwargs
+    ) -> InsertOneResult:
+        return InsertOneResult(self._insert(document), True)
+
+    async def insert_many(
+        self, documents: Iterable[Dict], ordered: bool = True, session=None, **kwargs
+    ) -> InsertManyResult:
+        documents = list(documents)
+        await self.bulk_write(
+            [InsertOne(document) for document in documents], ordered=ordered
+        )
+        return InsertManyResult([document["_id"] for document in documents], True)
+
+    async def update_one(
+        self,
+        filter: Dict,
+        update: Dict | list,
+        upsert: bool = False,
+        array_filters: list[Dict] | None = None,
+        session=None,
+        **kwargs,
+    ) -> UpdateResult:
+        return UpdateResult(
+            self._update(filter, update, upsert, array_filters, False), True
+        )
+
+    async def update_many(
+        self,
+        filter: Dict,
+        update: Dict | list,
+        upsert: bool = False,
+        array_filters: list[Dict] | None = None,
+        session=None,
+        **kwargs,
+    ) -> UpdateResult:
+        return UpdateResult(
+            self._update(filter, update, upsert, array_filters, True), True
+        )
+
+    async def replace_one(
+        self,
+        filter: Dict,
+        replacement: Dict,
+        upsert: bool = False,
+        session=None,
+        **kwargs,
+    ) -> UpdateResult:
+        return UpdateResult(self._replace(filter, replacement, upsert), True)
+
+    async def delete_one(self, filter: Dict, session=None, **kwargs) -> DeleteResult:
+        return DeleteResult({"n": self._delete(filter, False)}, True)
+
+    async def delete_many(self, filter: Dict, session=None, **kwargs) -> DeleteResult:
+        return DeleteResult({"n": self._delete(filter, True)}, True)
+
+    async def bulk_write(
+        self, requests: list, ordered: bool = True, session=None, **kwargs
+    ) -> BulkWriteResult:
+        result = {
+            "writeErrors": [],
+            "writeConcernErrors": [],
+            "nInserted": 0,
+            "nUpserted": 0,
+            "nMatched": 0,
+            "nModified": 0,
+            "nRemoved": 0,
+            "upserted": [],
+        }
+
+        for position, request in enumerate(requests):
+            try:
+                if isinstance(request, InsertOne):
+                    self._insert(request._doc)
+                    result["nInserted"] += 1
+                elif isinstance(request, (UpdateOne, UpdateMany)):
+                    outcome = self._update(
+                        request._filter,
+                        request._doc,
+                        bool(request._upsert),
+                        request._array_filters,
+                        isinstance(request, UpdateMany),
+                    )
+                    self._count(result, position, outcome)
+                elif isinstance(request, ReplaceOne):
+                    outcome = self._replace(
+                        request._filter, request._doc, bool(request._upsert)
+                    )
+                    self._count(result, position, outcome)
+                elif isinstance(request, (DeleteOne, DeleteMany)):
+                    result["nRemoved"] += self._delete(
+                        request._filter, isinstance(request, DeleteMany)
+                    )
+                else:
+                    raise TypeError(f"{request!r} is not a valid request")
+            except (WriteError, DuplicateKeyError) as error:
+                result["writeErrors"].append(
+                    {
+                        **(error.details or {}),
+                        "index": position,
+                        "code": error.code,
+                        "errmsg": str(error),
+                        "op": request,
+                    }
+                )
+                if ordered:
+                    break
+
+        if result["writeErrors"]:
+            raise BulkWriteError(result)
+        return BulkWriteResult(result, True)
+
+    @staticmethod
+    def _count(result: Dict, position: int, outcome: Dict) -> None:
+        if "upserted" in outcome:
+            result["nUpserted"] += 1
+            result["upserted"].append({"index": position, "_id": outcome["upserted"]})
+        else:
+            result["nMatched"] += outcome["n"]
+            result["nModified"] += outcome["nModified"]
+
+    async def drop(self, session=None) -> None:
+        self.database._collections.pop(self.name, None)
+
+
+class InMemoryDatabase:
+    def __init__(self, client: "InMemoryClient", name: str) -> None:
+        self.client = client
+        self.name = name
+        self._collections: Dict[str, InMemoryCollection] = {}
+
+    def get_collection(self, name: str, **kwargs) -> InMemoryCollection:
+        collection = self._collections.get(name)
+        if collection is None:
+            collection = self._collections[name] = InMemoryCollection(self, name)
+        return collection
+
+    def __getitem__(self, name: str) -> InMemoryCollection:
+        return self.get_collection(name)
+
+    def __getattr__(self, name: str) -> InMemoryCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self.get_collection(name)
+
+    def _lookup(self, collection_name: str, field: str, values: list) -> list[Dict]:
+        collection = self.get_collection(collection_name)
+        return [
+            clone(document)
+            for document in collection._matching({field: {"$in": values or [None]}})
+        ]
+
+    async def list_collection_names(self, session=None, **kwargs) -> list[str]:
+        return list(self._collections)
+
+    async def drop_collection(self, name: str, session=None) -> None:
+        self._collections.pop(name, None)
+
+    async def command(self, command: str | Dict, *args, **kwargs) -> Dict:
+        name = command if isinstance(command, str) else next(iter(command))
+        if name == "ping":
+            return {"ok": 1.0}
+        raise NotImplementedError(f"Command {name} is not supported in memory")
+
+
+class InMemoryClient:
+    def __init__(self) -> None:
+        self._databases: Dict[str, InMemoryDatabase] = {}
+
+    def __getitem__(self, name: str) -> InMemoryDatabase:
+        database = self._databases.get(name)
+        if database is None:
+            database = self._databases[name] = InMemoryDatabase(self, name)
+        return database
+
+    def get_database(self, name: str, **kwargs) -> InMemoryDatabase:
+        return self[name]
+
+    @property
+    def admin(self) -> InMemoryDatabase:
+        return self["admin"]
+
+    async def drop_database(self, name: str, session=None) -> None:
+        self._databases.pop(getattr(name, "name", name), None)
+
+    def close(self) -> None:
+        pass
+
+
+class InMemoryConnectionHandler:
+    """Mesma interface do DBConnectionHandler, sobre um InMemoryClient."""
+
+    def __init__(self, **pool_options) -> None:
+        # Não há pool: as opções são aceitas só para manter a assinatura.
+        self.__client = None
+        self.__db_connection = None
+
+    def connect_to_db(self, db_name):
+        from models.repository.indexes import INDEXES
+
+        self.__client = InMemoryClient()
+        self.__db_connection = self.__client[db_name]
+
+        # Os índices em memória são sempre criados, independente do MODE: são
+        # eles que tornam O(1) as buscas por user_id e username.
+        for collection_name, index_models in INDEXES.items():
+            collection = self.__db_connection.get_collection(collection_name)
+            for model in index_models:
+                document = model.document
+                index = _Index(
+                    document["name"],
+                    list(document["key"].items()),
+                    document.get("unique", False),
+                )
+                collection._indexes[index.name] = index
+
+    def get_db_connection(self):
+        return self.__db_connection
+
+    def get_db_client(self):
+        return self.__client
+
+    def get_connection_string(self):
+        return "memory://"
+
+    def get_pool_options(self):
+        return {}
+
+    async def warm_up_pool(self):
+        pass
+
+    async def ping_db(self, timeout: float | None = None) -> float:
+        return 0.0
+
+    def pool_stats(self) -> dict:
+        return {"checked_out": 0, "checkout_timeouts": 0, "max_pool_size": None}
+
+    def supports_transactions(self) -> bool:
+        return False
+
+    async def run_transaction(self, callback):
+        raise NotImplementedError("The in-memory backend does not support transactions")
+
+    def close(self):
+        self.__client = None
+        self.__db_connection = None
@@ -0,0 +1,988 @@
+"""
+Semântica de consulta do MongoDB sobre dicionários Python, usada pelo backend
+em memória (in_memory.py): filtros de find, projeções, expressões de
+agregação e operadores de update (incluindo $, $[] e arrayFilters).
+
+Cobre o subconjunto que a app usa; operadores fora dele levantam
+NotImplementedError em vez de serem ignorados em silêncio.
+"""
+
+import re
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, Dict
+
+from bson import Decimal128, ObjectId
+from pymongo.errors import OperationFailure, WriteError
+
+# Campo ausente (diferente de um campo com valor None).
+MISSING = object()
+
+
+# Tipos BSON imutáveis, que a cópia pode compartilhar.
+_IMMUTABLE = frozenset(
+    {str, int, float, bool, type(None), ObjectId, Decimal128, datetime, bytes}
+)
+
+
+def clone(value: Any) -> Any:
+    # Cópia profunda só de dicts e listas (o teste por type() evita chamar
+    # clone para cada escalar). Os Decimal das expressões voltam a ser
+    # Decimal128 aqui, na saída.
+    kind = type(value)
+    if kind is dict:
+        return {
+            key: item if type(item) in _IMMUTABLE else clone(item)
+            for key, item in value.items()
+        }
+    if kind is list:
+        return [item if type(item) in _IMMUTABLE else clone(item) for item in value]
+    if kind is Decimal:
+        return Decimal128(value)
+    if isinstance(value, dict):
+        return {key: clone(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [clone(item) for item in value]
+    return value
+
+
+def _is_operator_dict(value: Any) -> bool:
+    return (
+        isinstance(value, dict)
+        and bool(value)
+        and all(key.startswith("$") for key in value)
+    )
+
+
+def _normalize(value: Any) -> Any:
+    # Decimal128 não tem ordem nem hash; Decimal compara com int e float.
+    if isinstance(value, Decimal128):
+        return value.to_decimal()
+    return value
+
+
+_TYPE_ORDER = {
+    type(None): 1,
+    int: 2,
+    float: 2,
+    Decimal: 2,
+    str: 3,
+    dict: 4,
+    list: 5,
+    bytes: 6,
+    ObjectId: 7,
+    bool: 8,
+    datetime: 9,
+}
+
+
+def sort_key(value: Any) -> tuple:
+    """Chave de ordenação com a ordem de tipos do BSON (ausente = null)."""
+    value = None if value is MISSING else _normalize(value)
+    rank = _TYPE_ORDER.get(type(value), 2 if isinstance(value, (int, float)) else 10)
+    if rank in (4, 5, 10):
+        return (rank, repr(value))
+    return (rank, value)
+
+
+def type_name(value: Any) -> str:
+    if value is MISSING:
+        return "missing"
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int" if -(2**31) <= value < 2**31 else "long"
+    if isinstance(value, float):
+        return "double"
+    if isinstance(value, (Decimal128, Decimal)):
+        return "decimal"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, ObjectId):
+        return "objectId"
+    if isinstance(value, datetime):
+        return "date"
+    if isinstance(value, list):
+        return "array"
+    if isinstance(value, dict):
+        return "object"
+    return type(value).__name__
+
+
+# --------------------------------------------------------------------------
+# Filtros de find()
+# --------------------------------------------------------------------------
+
+
+def get_values(document: Any, parts: list[str]) -> list:
+    """Valores no caminho, atravessando arrays como o MongoDB (vazio = ausente)."""
+    if not parts:
+        return [document]
+
+    head, rest = parts[0], parts[1:]
+
+    if isinstance(document, dict):
+        if head not in document:
+            return []
+        return get_values(document[head], rest)
+
+    if isinstance(document, list):
+        values = []
+        if head.isdigit() and int(head) < len(document):
+            values.extend(get_values(document[int(head)], rest))
+        for element in document:
+            if isinstance(element, (dict, list)):
+                values.extend(get_values(element, parts))
+        return values
+
+    return []
+
+
+def _expanded(values: list) -> list:
+    # Um array casa pelo valor inteiro ou por qualquer um dos seus elementos.
+    expanded = []
+    for value in values:
+        expanded.append(value)
+        if isinstance(value, list):
+            expanded.extend(value)
+    return expanded
+
+
+def _equals(values: list, expected: Any) -> bool:
+    if expected is None and not values:
+        return True
+    expected = _normalize(expected)
+    return any(_normalize(value) == expected for value in _expanded(values))
+
+
+def _compare(values: list, expected: Any, accept) -> bool:
+    expected_key = sort_key(expected)
+    for value in _expanded(values):
+        key = sort_key(value)
+        # Só compara valores do mesmo grupo de tipos (números com números etc.).
+        if key[0] == expected_key[0] and accept(key, expected_key):
+            return True
+    return False
+
+
+def _element_matches(element: Any, condition: Dict) -> bool:
+    if _is_operator_dict(condition):
+        return match_values([element], condition)
+    return isinstance(element, dict) and matches(element, condition)
+
+
+def match_values(values: list, condition: Any) -> bool:
+    """Aplica a condição de um campo aos valores encontrados no caminho."""
+    if not _is_operator_dict(condition):
+        return _equals(values, condition)
+
+    for operator, argument in condition.items():
+        if operator == "$eq":
+            matched = _equals(values, argument)
+        elif operator == "$ne":
+            matched = not _equals(values, argument)
+        elif operator == "$gt":
+            matched = _compare(values, argument, lambda a, b: a > b)
+        elif operator == "$gte":
+            matched = _compare(values, argument, lambda a, b: a >= b)
+        elif operator == "$lt":
+            matched = _compare(values, argument, lambda a, b: a < b)
+        elif operator == "$lte":
+            matched = _compare(values, argument, lambda a, b: a <= b)
+        elif operator == "$in":
+            matched = any(_equals(values, option) for option in argument)
+        elif operator == "$nin":
+            matched = not any(_equals(values, option) for option in argument)
+        elif operator == "$exists":
+            matched = bool(values) == bool(argument)
+        elif operator == "$regex":
+            flags = re.IGNORECASE if "i" in condition.get("$options", "") else 0
+            pattern = re.compile(argument, flags)
+            matched = any(
+                isinstance(value, str) and pattern.search(value)
+                for value in _expanded(values)
+            )
+        elif operator == "$options":
+            continue
+        elif operator == "$elemMatch":
+            matched = any(
+                isinstance(value, list)
+                and any(_element_matches(element, argument) for element in value)
+                for value in values
+            )
+        elif operator == "$size":
+            matched = any(
+                isinstance(value, list) and len(value) == argument for value in values
+            )
+        elif operator == "$type":
+            names = argument if isinstance(argument, list) else [argument]
+            matched = any(type_name(value) in names for value in _expanded(values))
+        elif operator == "$not":
+            matched = not match_values(values, argument)
+        else:
+            raise NotImplementedError(f"Query operator {operator} is not supported")
+
+        if not matched:
+            return False
+
+    return True
+
+
+def matches(document: Dict, filter_document: Dict | None) -> bool:
+    for key, condition in (filter_document or {}).items():
+        if key == "$or":
+            matched = any(matches(document, option) for option in condition)
+        elif key == "$and":
+            matched = all(matches(document, option) for option in condition)
+        elif key == "$nor":
+            matched = not any(matches(document, option) for option in condition)
+        elif key == "$expr":
+            matched = truthy(evaluate(condition, document))
+        elif key.startswith("$"):
+            raise NotImplementedError(f"Query operator {key} is not supported")
+        else:
+            matched = match_values(get_values(document, key.split(".")), condition)
+
+        if not matched:
+            return False
+
+    return True
+
+
+def equality_fields(filter_document: Dict) -> Dict:
+    """Campos com igualdade simples no filtro (base do documento de um upsert)."""
+    fields = {}
+    for key, condition in filter_document.items():
+        if key.startswith("$"):
+            continue
+        if _is_operator_dict(condition):
+            if "$eq" in condition:
+                fields[key] = condition["$eq"]
+        else:
+            fields[key] = condition
+    return fields
+
+
+# --------------------------------------------------------------------------
+# Projeções de find()
+# --------------------------------------------------------------------------
+
+
+def _include(source: Dict, target: Dict, parts: list[str]) -> None:
+    head, rest = parts[0], parts[1:]
+    if head not in source:
+        return
+
+    value = source[head]
+    if not rest:
+        target[head] = clone(value)
+    elif isinstance(value, dict):
+        _include(value, target.setdefault(head, {}), rest)
+    elif isinstance(value, list):
+        elements = [element for element in value if isinstance(element, dict)]
+        projected = target.get(head)
+        if not isinstance(projected, list):
+            projected = target[head] = [{} for _ in elements]
+        for element, element_target in zip(elements, projected):
+            _include(element, element_target, rest)
+
+
+def _exclude(document: Any, parts: list[str]) -> None:
+    head, rest = parts[0], parts[1:]
+    if isinstance(document, list):
+        for element in document:
+            _exclude(element, parts)
+    elif isinstance(document, dict) and head in document:
+        if rest:
+            _exclude(document[head], rest)
+        else:
+            del document[head]
+
+
+def _project_positional(
+    document: Dict, target: Dict, prefix: str, filter_document: Dict
+) -> None:
+    # {"pantry.$": 1}: só o primeiro elemento de pantry que satisfez o filtro.
+    parts = prefix.split(".")
+    array = document
+    for part in parts:
+        array = array.get(part, MISSING) if isinstance(array, dict) else MISSING
+    index = (
+        _positional_match(array, prefix, filter_document)
+        if isinstance(array, list)
+        else None
+    )
+    if index is None:
+        raise OperationFailure(
+            "Executor error during find command :: caused by :: positional "
+            "operator '.$' couldn't find a matching element in the array",
+            code=51246,
+        )
+
+    for part in parts[:-1]:
+        target = target.setdefault(part, {})
+    target[parts[-1]] = [clone(array[index])]
+
+
+def project(
+    document: Dict, projection: Dict | None, filter_document: Dict | None = None
+) -> Dict:
+    """`filter_document` é o filtro do find, usado pela projeção posicional "a.$"."""
+    if not projection:
+        return clone(document)
+
+    inclusion = any(value for key, value in projection.items() if key != "_id")
+
+    if inclusion:
+        projected = {}
+        if projection.get("_id", 1) and "_id" in document:
+            projected["_id"] = document["_id"]
+        for key, value in projection.items():
+            if not value or key == "_id":
+                continue
+            if key.endswith(".$"):
+                _project_positional(
+                    document, projected, key[:-2], filter_document or {}
+                )
+            else:
+                _include(document, projected, key.split("."))
+        return projected
+
+    if any(key.endswith(".$") for key in projection):
+        raise OperationFailure(
+            "positional projection cannot be used with exclusion", code=31395
+        )
+
+    projected = clone(document)
+    for key, value in projection.items():
+        if not value:
+            _exclude(projected, key.split("."))
+    return projected
+
+
+# --------------------------------------------------------------------------
+# Expressões de agregação
+# --------------------------------------------------------------------------
+
+
+def truthy(value: Any) -> bool:
+    return value not in (False, None, 0, MISSING) or isinstance(value, Decimal128)
+
+
+def _expression_path(value: Any, parts: list[str]) -> Any:
+    # Em expressões, um caminho que atravessa um array devolve um array.
+    for index, part in enumerate(parts):
+        if isinstance(value, dict):
+            value = value.get(part, MISSING)
+        elif isinstance(value, list):
+            values = [_expression_path(element, parts[index:]) for element in value]
+            return [element for element in values if element is not MISSING]
+        else:
+            return MISSING
+        if value is MISSING:
+            return MISSING
+    return value
+
+
+def _number(value: Any) -> Any:
+    return _normalize(value) if not isinstance(value, bool) else value
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float, Decimal, Decimal128)) and not isinstance(
+        value, bool
+    )
+
+
+def _arithmetic(values: list, operation) -> Any:
+    if any(value is None or value is MISSING for value in values):
+        return None
+
+    numbers = [_number(value) for value in values]
+    if any(isinstance(number, Decimal) for number in numbers):
+        decimals = [
+            number if isinstance(number, Decimal) else Decimal(str(number))
+            for number in numbers
+        ]
+        # Fica em Decimal até a saída (clone), sem ida e volta por Decimal128.
+        return operation(decimals)
+    return operation(numbers)
+
+
+def _sum(numbers: list) -> Any:
+    total = numbers[0] if numbers else 0
+    for number in numbers[1:]:
+        total += number
+    return total
+
+
+def _product(numbers: list) -> Any:
+    total = numbers[0]
+    for number in numbers[1:]:
+        total *= number
+    return total
+
+
+def to_decimal(value: Any) -> Decimal | None:
+    if value is None or value is MISSING:
+        return None
+    if isinstance(value, Decimal128):
+        return value.to_decimal()
+    if isinstance(value, bool):
+        return Decimal(int(value))
+    return Decimal(str(value))
+
+
+def _operand_list(argument: Any, document: Dict, variables: Dict) -> list:
+    if isinstance(argument, list):
+        return [evaluate(item, document, variables) for item in argument]
+    return [evaluate(argument, document, variables)]
+
+
+def evaluate(expression: Any, document: Dict, variables: Dict | None = None) -> Any:
+    """Avalia uma expressão de agregação sobre `document` ($campo, $$variável, operadores)."""
+    variables = variables or {}
+
+    if isinstance(expression, str) and expression.startswith("$$"):
+        name, _, path = expression[2:].partition(".")
+        value = document if name in ("ROOT", "CURRENT") else variables[name]
+        return _expression_path(value, path.split(".")) if path else value
+
+    if isinstance(expression, str) and expression.startswith("$"):
+        return _expression_path(document, expression[1:].split("."))
+
+    if isinstance(expression, list):
+        return [evaluate(item, document, variables) for item in expression]
+
+    if not isinstance(expression, dict):
+        return expression
+
+    if len(expression) == 1 and next(iter(expression)).startswith("$"):
+        operator, argument = next(iter(expression.items()))
+        return _operator(operator, argument, document, variables)
+
+    evaluated = {
+        key: evaluate(value, document, variables) for key, value in expression.items()
+    }
+    return {key: value for key, value in evaluated.items() if value is not MISSING}
+
+
+def _operator(operator: str, argument: Any, document: Dict, variables: Dict) -> Any:
+    def value_of(item: Any) -> Any:
+        return evaluate(item, document, variables)
+
+    if operator == "$literal":
+        return argument
+
+    if operator in ("$filter", "$map"):
+        items = value_of(argument["input"])
+        if items is None or items is MISSING:
+            return None
+        name = argument.get("as", "this")
+        if operator == "$filter":
+            return [
+                item
+                for item in items
+                if truthy(
+                    evaluate(argument["cond"], document, {**variables, name: item})
+                )
+            ]
+        return [
+            evaluate(argument["in"], document, {**variables, name: item})
+            for item in items
+        ]
+
+    if operator == "$mergeObjects":
+        merged = {}
+        for item in _operand_list(argument, document, variables):
+            if isinstance(item, dict):
+                merged.update(item)
+        return merged
+
+    if operator == "$size":
+        items = value_of(argument)
+        if not isinstance(items, list):
+            raise WriteError("The argument to $size must be an array", code=17124)
+        return len(items)
+
+    if operator == "$sum":
+        operands = _operand_list(argument, document, variables)
+        if len(operands) == 1 and isinstance(operands[0], list):
+            operands = operands[0]
+        return _arithmetic([item for item in operands if _is_number(item)], _sum)
+
+    if operator in ("$add", "$multiply", "$subtract", "$divide"):
+        operands = _operand_list(argument, document, variables)
+        operation = {
+            "$add": _sum,
+            "$multiply": _product,
+            "$subtract": lambda numbers: numbers[0] - numbers[1],
+            "$divide": lambda numbers: numbers[0] / numbers[1],
+        }[operator]
+        return _arithmetic(operands, operation)
+
+    if operator == "$toDecimal":
+        return to_decimal(value_of(argument))
+
+    if operator == "$toString":
+        value = value_of(argument)
+        return None if value is None or value is MISSING else str(value)
+
+    if operator in ("$eq", "$ne", "$gt", "$gte", "$lt", "$lte"):
+        left, right = (
+            sort_key(item) for item in _operand_list(argument, document, variables)
+        )
+        return {
+            "$eq": left == right,
+            "$ne": left != right,
+            "$gt": left > right,
+            "$gte": left >= right,
+            "$lt": left < right,
+            "$lte": left <= right,
+        }[operator]
+
+    if operator == "$and":
+        return all(
+            truthy(item) for item in _operand_list(argument, document, variables)
+        )
+
+    if operator == "$or":
+        return any(
+            truthy(item) for item in _operand_list(argument, document, variables)
+        )
+
+    if operator == "$not":
+        return not truthy(_operand_list(argument, document, variables)[0])
+
+    if operator == "$in":
+        value, items = _operand_list(argument, document, variables)
+        return any(sort_key(value) == sort_key(item) for item in items)
+
+    if operator == "$ifNull":
+        for item in _operand_list(argument, document, variables):
+            if item is not None and item is not MISSING:
+                return item
+        return None
+
+    if operator == "$cond":
+        if isinstance(argument, list):
+            condition, then, otherwise = argument
+        else:
+            condition, then, otherwise = (
+                argument["if"],
+                argument["then"],
+                argument["else"],
+            )
+        return value_of(then) if truthy(value_of(condition)) else value_of(otherwise)
+
+    if operator == "$regexMatch":
+        text = value_of(argument["input"])
+        flags = re.IGNORECASE if "i" in argument.get("options", "") else 0
+        return isinstance(text, str) and bool(
+            re.search(value_of(argument["regex"]), text, flags)
+        )
+
+    if operator == "$type":
+        return type_name(value_of(argument))
+
+    if operator == "$concat":
+        parts = _operand_list(argument, document, variables)
+        if any(part is None or part is MISSING for part in parts):
+            return None
+        return "".join(parts)
+
+    raise NotImplementedError(f"Expression operator {operator} is not supported")
+
+
+# --------------------------------------------------------------------------
+# Operadores de update
+# --------------------------------------------------------------------------
+
+
+def _array_filter_conditions(array_filters: list[Dict] | None) -> Dict[str, list]:
+    # {"c107.category_value": 107} -> {"c107": [("category_value", 107)]}
+    conditions: Dict[str, list] = {}
+    for array_filter in array_filters or []:
+        for key, condition in array_filter.items():
+            identifier, _, path = key.partition(".")
+            conditions.setdefault(identifier, []).append((path, condition))
+    return conditions
+
+
+def _array_element_matches(element: Any, conditions: list) -> bool:
+    for path, condition in conditions:
+        if path:
+            if not (
+                isinstance(element, dict)
+                and match_values(get_values(element, path.split(".")), condition)
+            ):
+                return False
+        elif not match_values([element], condition):
+            return False
+    return True
+
+
+def _positional_match(array: list, prefix: str, filter_document: Dict) -> int | None:
+    """Índice do elemento de `prefix` que satisfez o filtro, ou None."""
+    conditions = []
+    for key, condition in filter_document.items():
+        if key.startswith(prefix + "."):
+            conditions.append({key[len(prefix) + 1 :]: condition})
+        elif key == prefix and _is_operator_dict(condition):
+            if "$elemMatch" in condition:
+                conditions.append(condition["$elemMatch"])
+            else:
+                conditions.append({"$self": condition})
+
+    def satisfies(element: Any, condition: Dict) -> bool:
+        if "$self" in condition:
+            return match_values([element], condition["$self"])
+        return _element_matches(element, condition)
+
+    if conditions:
+        for index, element in enumerate(array):
+            if all(satisfies(element, condition) for condition in conditions):
+                return index
+        for index, element in enumerate(array):
+            if satisfies(element, conditions[0]):
+                return index
+
+    return None
+
+
+def _positional_index(array: list, prefix: str, filter_document: Dict) -> int:
+    """Índice do elemento de `prefix` que satisfez o filtro (o operador $)."""
+    index = _positional_match(array, prefix, filter_document)
+    if index is not None:
+        return index
+
+    raise WriteError(
+        "The positional operator did not find the match needed from the query.",
+        code=2,
+    )
+
+
+class _UpdateContext:
+    def __init__(self, filter_document: Dict, array_filters: list[Dict] | None):
+        self.filter_document = filter_document
+        self.array_filters = _array_filter_conditions(array_filters)
+
+
+def _targets(
+    container: Any,
+    parts: list[str],
+    context: _UpdateContext,
+    create: bool,
+    prefix: str = "",
+) -> list[tuple[Any, Any]]:
+    """Pares (container, chave) que o caminho do update alcança."""
+    head, rest = parts[0], parts[1:]
+
+    if isinstance(container, list):
+        if head == "$":
+            indexes = [_positional_index(container, prefix, context.filter_document)]
+        elif head == "$[]":
+            indexes = list(range(len(container)))
+        elif head.startswith("$[") and head.endswith("]"):
+            conditions = context.array_filters.get(head[2:-1])
+            if conditions is None:
+                raise WriteError(
+                    f"No array filter found for identifier '{head[2:-1]}'", code=2
+                )
+            indexes = [
+                index
+                for index, element in enumerate(container)
+                if _array_element_matches(element, conditions)
+            ]
+        elif head.isdigit():
+            indexes = [int(head)]
+            if create:
+                while len(container) <= indexes[0]:
+                    container.append(None)
+        else:
+            raise WriteError(f"Cannot create field '{head}' in an array", code=28)
+    elif isinstance(container, dict):
+        if head.startswith("$"):
+            raise WriteError(
+                f"The positional operator did not find the match needed from the query ({head})",
+                code=2,
+            )
+        indexes = [head]
+    else:
+        raise WriteError(
+            f"Cannot create field '{head}' in element {container!r}", code=28
+        )
+
+    # O $ usa o caminho sem os operadores posicionais já resolvidos.
+    path = prefix if head.startswith("$") else f"{prefix}.{head}".lstrip(".")
+
+    if not rest:
+        return [(container, index) for index in indexes]
+
+    targets = []
+    for index in indexes:
+        if isinstance(container, dict):
+            if index not in container or container[index] is None:
+                if not create:
+                    continue
+                container[index] = {}
+            child = container[index]
+        else:
+            if container[index] is None and create:
+                container[index] = {}
+            child = container[index]
+        if isinstance(child, (dict, list)):
+            targets.extend(_targets(child, rest, context, create, path))
+        elif create:
+            raise WriteError(
+                f"Cannot create field '{rest[0]}' in element {child!r}", code=28
+            )
+    return targets
+
+
+def _get(container: Any, key: Any) -> Any:
+    if isinstance(container, dict):
+        return container.get(key, MISSING)
+    return container[key] if key < len(container) else MISSING
+
+
+def _each(value: Any) -> list:
+    if isinstance(value, dict) and "$each" in value:
+        return list(value["$each"])
+    return [value]
+
+
+def _apply_operator(operator: str, container: Any, key: Any, value: Any) -> bool:
+    current = _get(container, key)
+
+    if operator == "$set":
+        if current is not MISSING and current == value and type(current) is type(value):
+            return False
+        container[key] = clone(value)
+        return True
+
+    if operator == "$unset":
+        if current is MISSING:
+            return False
+        if isinstance(container, dict):
+            del container[key]
+        else:
+            container[key] = None
+        return True
+
+    if operator == "$inc":
+        if current is MISSING:
+            container[key] = value
+        elif not _is_number(current):
+            raise WriteError(
+                f"Cannot apply $inc to a value of non-numeric type {type_name(current)}",
+                code=14,
+            )
+        else:
+            container[key] = clone(_arithmetic([current, value], _sum))
+        return value != 0 or current is MISSING
+
+    if operator == "$currentDate":
+        container[key] = datetime.now(timezone.utc).replace(tzinfo=None)
+        return True
+
+    if operator in ("$push", "$addToSet"):
+        if current is MISSING:
+            container[key] = current = []
+        elif not isinstance(current, list):
+            raise WriteError(
+                f"The field '{key}' must be an array but is of type {type_name(current)}",
+                code=2,
+            )
+        added = False
+        for item in _each(value):
+            if operator == "$addToSet" and item in current:
+                continue
+            current.append(clone(item))
+            added = True
+        return added
+
+    if operator == "$pull":
+        if not isinstance(current, list):
+            return False
+        if isinstance(value, dict) and not _is_operator_dict(value):
+            kept = [
+                item
+                for item in current
+                if not (isinstance(item, dict) and matches(item, value))
+            ]
+        else:
+            kept = [item for item in current if not match_values([item], value)]
+        if len(kept) == len(current):
+            return False
+        container[key] = kept
+        return True
+
+    raise NotImplementedError(f"Update operator {operator} is not supported")
+
+
+def apply_update(
+    document: Dict,
+    update: Dict | list,
+    filter_document: Dict,
+    array_filters: list[Dict] | None = None,
+    is_insert: bool = False,
+) -> bool:
+    """Aplica o update no documento (no lugar) e informa se ele mudou."""
+    if isinstance(update, list):
+        updated = run_pipeline([document], update, lookup=None)[0]
+        if updated == document:
+            return False
+        document.clear()
+        document.update(updated)
+        return True
+
+    context = _UpdateContext(filter_document, array_filters)
+    modified = False
+
+    for operator, fields in update.items():
+        if operator == "$setOnInsert":
+            if not is_insert:
+                continue
+            operator = "$set"
+
+        create = operator not in ("$unset", "$pull")
+        for path, value in fields.items():
+            if path == "_id" and not is_insert and document.get("_id") != value:
+                raise WriteError(
+                    "Performing an update on the path '_id' would modify the immutable field '_id'",
+                    code=66,
+                )
+            for container, key in _targets(document, path.split("."), context, create):
+                modified |= _apply_operator(operator, container, key, value)
+
+    return modified
+
+
+# --------------------------------------------------------------------------
+# Pipelines de agregação
+# --------------------------------------------------------------------------
+
+
+def set_path(document: Dict, path: str, value: Any) -> None:
+    parts = path.split(".")
+    for part in parts[:-1]:
+        child = document.get(part)
+        if not isinstance(child, dict):
+            child = document[part] = {}
+        document = child
+    document[parts[-1]] = value
+
+
+def _project_stage(document: Dict, specification: Dict) -> Dict:
+    computed = {
+        key: value
+        for key, value in specification.items()
+        if not (isinstance(value, (bool, int)) and not isinstance(value, Decimal128))
+    }
+    flags = {key: value for key, value in specification.items() if key not in computed}
+
+    if not computed and not any(value for key, value in flags.items() if key != "_id"):
+        return project(document, flags)
+
+    projected = {}
+    if flags.get("_id", 1) and "_id" in document:
+        projected["_id"] = document["_id"]
+    for key, value in flags.items():
+        if value and key != "_id":
+            _include(document, projected, key.split("."))
+    for key, expression in computed.items():
+        value = evaluate(expression, document)
+        if value is not MISSING:
+            set_path(projected, key, value)
+    return projected
+
+
+def run_pipeline(documents: list[Dict], pipeline: list[Dict], lookup) -> list[Dict]:
+    """
+    Executa os estágios e devolve cópias dos documentos. `lookup(collection,
+    field, values)` devolve os documentos de outra collection para o $lookup.
+
+    Os estágios que só leem ($match, $project, ...) trabalham sobre os
+    documentos guardados; quem altera o documento copia antes, e a saída é
+    copiada no fim (só o que sobrou, em geral bem menor que a entrada).
+    """
+
+    for stage in pipeline:
+        ((name, specification),) = stage.items()
+
+        if name == "$match":
+            documents = [
+                document for document in documents if matches(document, specification)
+            ]
+        elif name == "$limit":
+            documents = documents[:specification]
+        elif name == "$skip":
+            documents = documents[specification:]
+        elif name == "$sort":
+            for field, direction in reversed(list(specification.items())):
+                documents.sort(
+                    key=lambda document: sort_key(
+                        _expression_path(document, field.split("."))
+                    ),
+                    reverse=direction < 0,
+                )
+        elif name == "$project":
+            documents = [
+                _project_stage(document, specification) for document in documents
+            ]
+        elif name in ("$set", "$addFields"):
+            documents = [clone(document) for document in documents]
+            for document in documents:
+                values = {
+                    key: evaluate(expression, document)
+                    for key, expression in specification.items()
+                }
+                for key, value in values.items():
+                    if value is not MISSING:
+                        set_path(document, key, value)
+        elif name == "$unset":
+            fields = (
+                [specification] if isinstance(specification, str) else specification
+            )
+            documents = [clone(document) for document in documents]
+            for document in documents:
+                for field in fields:
+                    _exclude(document, field.split("."))
+        elif name == "$lookup":
+            if "pipeline" in specification or lookup is None:
+                raise NotImplementedError(
+                    "$lookup supports localField/foreignField only"
+                )
+            documents = [{**document} for document in documents]
+            for document in documents:
+                values = get_values(document, specification["localField"].split("."))
+                document[specification["as"]] = lookup(
+                    specification["from"],
+                    specification["foreignField"],
+                    _expanded(values),
+                )
+        elif name == "$unwind":
+            path = (
+                specification
+                if isinstance(specification, str)
+                else specification["path"]
+            )
+            field = path[1:]
+            unwound = []
+            for document in documents:
+                value = _expression_path(document, field.split("."))
+                if isinstance(value, list):
+                    for item in value:
+                        copy = clone(document)
+                        set_path(copy, field, item)
+                        unwound.append(copy)
+            documents = unwound
+        elif name == "$count":
+            documents = [{specification: len(documents)}] if documents else []
+        else:
+            raise NotImplementedError(f"Aggregation stage {name} is not supported")
+
+    return [clone(document) for document in documents]
@@ -1,13 +1,88 @@
+from os import getenv
+
 mongo_db_infos = {
     "USERNAME": "lucas",
     "PASSWORD": "kl2717",
     "CLUSTER": "SmartKitchenCluster0",
     "DB_NAME": "smartkitchen",
+    # Permite apontar para outro servidor (ex.: um mongod local) sem mexer no código.
+    "CONNECTION_STRING": getenv("SMARTKITCHEN_MONGO_URI"),
+    # Transações exigem replica set (o Atlas é); desligue para um mongod standalone.
+    "TRANSACTIONS": getenv("SMARTKITCHEN_MONGO_TRANSACTIONS", "true").lower() == "true",
+    # "mongo" usa o cluster; "memory" roda sem banco (ver in_memory.py).
+    "BACKEND": getenv("SMARTKITCHEN_DB_BACKEND", "mongo"),
     "COLLECTIONS": {
         "collection_users": "users",
         "collection_pantry": "pantry",
+        "collection_pantry_items": "pantry_items",
         "collection_recipes": "recipes",
+        "collection_recipe_suggestions": "recipe_suggestions",
         "collection_shopping_cart": "shopping_cart",
         "collection_cookbook": "cookbook",
+        "collection_migrations": "migrations",
     },
 }
+
+# Configurações do pool de conexões do cliente Motor, compartilhado por toda a app.
+mongo_pool_options = {
+    "maxPoolSize": int(getenv("SMARTKITCHEN_MONGO_MAX_POOL_SIZE", "100")),
+    "minPoolSize": int(getenv("SMARTKITCHEN_MONGO_MIN_POOL_SIZE", "10")),
+    "maxIdleTimeMS": int(getenv("SMARTKITCHEN_MONGO_MAX_IDLE_TIME_MS", "300000")),
+    "waitQueueTimeoutMS": int(
+        getenv("SMARTKITCHEN_MONGO_WAIT_QUEUE_TIMEOUT_MS", "5000")
+    ),
+}
+
+# "create" cria os índices declarados no startup, "check" apenas verifica (produção)
+# e "off" ignora a etapa. Ver models/repository/indexes.py.
+mongo_index_options = {
+    "MODE": getenv("SMARTKITCHEN_INDEX_MODE", "create"),
+}
+
+# Cache por usuário (LRU + TTL) na frente das collections de despensa e carrinho.
+# Desligado por padrão para permitir medir a diferença.
+cache_options = {
+    "ENABLED": getenv("SMARTKITCHEN_CACHE_ENABLED", "false").lower() == "true",
+    "MAX_SIZE": int(getenv("SMARTKITCHEN_CACHE_MAX_SIZE", "10000")),
+    "TTL_SECONDS": float(getenv("SMARTKITCHEN_CACHE_TTL_SECONDS", "30")),
+    "COLLECTIONS": [
+        mongo_db_infos["COLLECTIONS"]["collection_pantry"],
+        mongo_db_infos["COLLECTIONS"]["collection_shopping_cart"],
+    ],
+}
+
+# Layout dos itens da despensa: "embedded" guarda os itens em pantry[].items[] do
+# documento do usuário; "items" guarda um documento por item em pantry_items.
+# Ver models/repository/item_stores.py e models/repository/migrate_pantry_items.py.
+storage_options = {
+    "PANTRY_LAYOUT": getenv("SMARTKITCHEN_PANTRY_LAYOUT", "embedded"),
+}
+
+# Métricas HTTP por rota expostas em /metrics (formato Prometheus). Ver src/api/metrics.py.
+metrics_options = {
+    "ENABLED": getenv("SMARTKITCHEN_METRICS_ENABLED", "true").lower() == "true",
+}
+
+# Monitoramento de comandos do Mongo: header Server-Timing por requisição e log de
+# comandos lentos. Ver models/connection_options/command_monitoring.py.
+monitoring_options = {
+    "ENABLED": getenv("SMARTKITCHEN_DB_MONITORING", "true").lower() == "true",
+    "SLOW_MS": float(getenv("SMARTKITCHEN_SLOW_QUERY_MS", "100")),
+    "REPLY_SIZE": getenv("SMARTKITCHEN_DB_MONITORING_REPLY_SIZE", "true").lower()
+    == "true",
+}
+
+# Probe de prontidão (/health/ready): uma task em background pinga o cluster a cada
+# INTERVAL e guarda o resultado; o resultado fica velho (não pronto) após STALE_AFTER.
+health_options = {
+    "PING_INTERVAL_SECONDS": float(getenv("SMARTKITCHEN_HEALTH_INTERVAL", "5")),
+    "PING_TIMEOUT_SECONDS": float(getenv("SMARTKITCHEN_HEALTH_TIMEOUT", "2")),
+    "STALE_AFTER_SECONDS": float(getenv("SMARTKITCHEN_HEALTH_STALE_AFTER", "15")),
+}
+
+# Índice invertido de receitas (models/repository/recipe_index.py): cada worker tem o
+# seu e o recarrega do banco a cada REFRESH_SECONDS, para ver receitas gravadas por
+# outros workers. 0 desliga o recarregamento (só serve com um worker).
+recipe_index_options = {
+    "REFRESH_SECONDS": float(getenv("SMARTKITCHEN_RECIPE_INDEX_REFRESH", "60")),
+}
@@ -0,0 +1,41 @@
+"""
+Task em background que chama uma corrotina a cada `interval` segundos, usada
+pelo DBHealthMonitor e pelo RecipeIndexRefresher.
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    def __init__(
+        self, callback: Callable[[], Awaitable[None]], interval: float, name: str
+    ) -> None:
+        self.callback = callback
+        self.interval = interval
+        self.name = name
+        self.__task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self.__task = asyncio.create_task(self.__run())
+
+    async def stop(self) -> None:
+        if self.__task is not None:
+            self.__task.cancel()
+            try:
+                await self.__task
+            except asyncio.CancelledError:
+                pass
+            self.__task = None
+
+    async def __run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.callback()
+            except Exception as error:
+                # Uma falha não encerra o ciclo; a próxima chamada tenta de novo.
+                logger.error("%s failed: %r", self.name, error)
@@ -0,0 +1,74 @@
+"""
+Uso do pool de conexões do cliente Motor (pymongo.monitoring).
+
+O pymongo não expõe quantas conexões estão em uso; o PoolUsage conta os
+eventos de check-out/check-in por servidor para o /health/ready mostrar a
+saturação do pool (conexões em uso vs. maxPoolSize).
+"""
+
+import threading
+
+from pymongo import monitoring
+
+
+class PoolUsage(monitoring.ConnectionPoolListener):
+    def __init__(self) -> None:
+        # Os eventos chegam das threads do executor do Motor.
+        self.__lock = threading.Lock()
+        self.__checked_out = {}
+        self.__checkout_timeouts = 0
+
+    def stats(self) -> dict:
+        with self.__lock:
+            return {
+                "checked_out": sum(self.__checked_out.values()),
+                # Esperas por conexão que estouraram o waitQueueTimeoutMS.
+                "checkout_timeouts": self.__checkout_timeouts,
+            }
+
+    def connection_checked_out(self, event) -> None:
+        with self.__lock:
+            self.__checked_out[event.address] = (
+                self.__checked_out.get(event.address, 0) + 1
+            )
+
+    def connection_checked_in(self, event) -> None:
+        with self.__lock:
+            # Conexões retiradas antes do pool_closed voltam depois dele: o
+            # servidor já não é contado e o check-in é ignorado. O max() cobre
+            # um pool recriado no mesmo endereço recebendo a volta de uma antiga.
+            if event.address in self.__checked_out:
+                self.__checked_out[event.address] = max(
+                    self.__checked_out[event.address] - 1, 0
+                )
+
+    def connection_check_out_failed(self, event) -> None:
+        if event.reason == monitoring.ConnectionCheckOutFailedReason.TIMEOUT:
+            with self.__lock:
+                self.__checkout_timeouts += 1
+
+    def pool_closed(self, event) -> None:
+        with self.__lock:
+            self.__checked_out.pop(event.address, None)
+
+    # Eventos sem interesse aqui, mas abstratos no ConnectionPoolListener.
+    def pool_created(self, event) -> None:
+        pass
+
+    def pool_ready(self, event) -> None:
+        pass
+
+    def pool_cleared(self, event) -> None:
+        pass
+
+    def connection_created(self, event) -> None:
+        pass
+
+    def connection_ready(self, event) -> None:
+        pass
+
+    def connection_closed(self, event) -> None:
+        pass
+
+    def connection_check_out_started(self, event) -> None:
+        pass
@@ -0,0 +1,97 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+
+class LRUCache:
+    """
+    Cache em memória do processo, limitado por tamanho (LRU) e por tempo (TTL).
+    Pensado para o loop do asyncio: não há locks porque não é compartilhado
+    entre threads.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.__max_size = max_size
+        self.__ttl_seconds = ttl_seconds
+        self.__clock = clock
+        self.__entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        # Geração por chave, incrementada a cada invalidate: uma leitura que começou
+        # antes de uma escrita não grava no cache o documento antigo (ver set).
+        # Quando o dict passa de max_size ele é zerado e a época muda, o que
+        # descarta também as leituras em andamento.
+        self.__generations: Dict[Hashable, int] = {}
+        self.__epoch = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.skipped_fills = 0
+
+    def get(self, key: Hashable) -> Any | None:
+        entry = self.__entries.get(key)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= self.__clock():
+            del self.__entries[key]
+            self.misses += 1
+            return None
+
+        self.__entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def generation(self, key: Hashable) -> tuple[int, int]:
+        """Marca a ser lida antes de buscar o valor e passada depois ao set."""
+        return self.__epoch, self.__generations.get(key, 0)
+
+    def set(
+        self, key: Hashable, value: Any, generation: tuple[int, int] | None = None
+    ) -> None:
+        if generation is not None and generation != self.generation(key):
+            # A chave foi invalidada enquanto o valor era lido: ele pode ser antigo.
+            self.skipped_fills += 1
+            return
+
+        self.__entries[key] = (self.__clock() + self.__ttl_seconds, value)
+        self.__entries.move_to_end(key)
+
+        while len(self.__entries) > self.__max_size:
+            self.__entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        self.__generations[key] = self.__generations.get(key, 0) + 1
+        if len(self.__generations) > self.__max_size:
+            self.__generations.clear()
+            self.__epoch += 1
+
+        if self.__entries.pop(key, None) is not None:
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        self.__generations.clear()
+        self.__epoch += 1
+        self.invalidations += len(self.__entries)
+        self.__entries.clear()
+
+    def stats(self) -> Dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "skipped_fills": self.skipped_fills,
+            "size": len(self.__entries),
+            "max_size": self.__max_size,
+            "ttl_seconds": self.__ttl_seconds,
+        }
@@ -1,12 +1,51 @@
-from typing import Dict
+from typing import AsyncIterator, Awaitable, Callable, Dict
 
-from pymongo.results import UpdateResult
+from bson import ObjectId
+from pymongo import ASCENDING
+from pymongo.results import BulkWriteResult, UpdateResult
 
 
 class CollectionHandler:
-    def __init__(self, db_connection, collection) -> None:
+    def __init__(
+        self, db_connection, collection, cache=None, versioned: bool = False
+    ) -> None:
         self.__collection_name = collection
         self.__db_connection = db_connection
+        # Cache opcional por user_id (ver models/repository/cache.py).
+        self.__cache = cache
+        # Coleções versionadas incrementam o campo "version" a cada escrita (ETag).
+        self.__versioned = versioned
+
+    def with_version_bump(self, request_attribute: Dict | list) -> Dict | list:
+        """Acrescenta o incremento de "version" a um update, se a coleção for versionada."""
+        if not self.__versioned:
+            return request_attribute
+
+        # Update em formato de pipeline (lista de estágios).
+        if isinstance(request_attribute, list):
+            return [
+                *request_attribute,
+                {"$set": {"version": {"$add": [{"$ifNull": ["$version", 0]}, 1]}}},
+            ]
+
+        return {
+            **request_attribute,
+            "$inc": {**request_attribute.get("$inc", {}), "version": 1},
+        }
+
+    def __invalidate(self, filter_document: Dict) -> None:
+        if self.__cache is not None and "user_id" in filter_document:
+            self.__cache.invalidate(filter_document["user_id"])
+
+    def get_collection_name(self) -> str:
+        return self.__collection_name
+
+    def has_cache(self) -> bool:
+        return self.__cache is not None
+
+    def invalidate_cache(self, user_id: ObjectId) -> None:
+        if self.__cache is not None:
+            self.__cache.invalidate(user_id)
 
     async def find_document(
         self, filter_document: Dict = {}, request_attribute: Dict = {}
@@ -16,18 +55,136 @@ class CollectionHandler:
         data = await async_cursor.to_list(length=None)
         return data
 
+    async def find_document_page(
+        self,
+        filter_document: Dict = {},
+        request_attribute: Dict = {},
+        limit: int = 100,
+        after: ObjectId | None = None,
+    ) -> tuple[list[Dict], ObjectId | None]:
+        """
+        Paginação por chave (keyset) sobre o _id: retorna no máximo `limit`
+        documentos com _id maior que `after` e o _id a ser usado como cursor da
+        próxima página (None quando não há mais documentos).
+        """
+        collection = self.__db_connection.get_collection(self.__collection_name)
+
+        if after is not None:
+            filter_document = {**filter_document, "_id": {"$gt": after}}
+
+        # O _id é sempre buscado porque é ele quem define o cursor da próxima página.
+        hide_id = request_attribute.get("_id") == 0
+        projection = {k: v for k, v in request_attribute.items() if k != "_id"}
+
+        async_cursor = (
+            collection.find(filter_document, projection or None)
+            .sort("_id", ASCENDING)
+            .limit(limit + 1)
+        )
+        data = await async_cursor.to_list(length=limit + 1)
+
+        next_cursor = None
+        if len(data) > limit:
+            data = data[:limit]
+            next_cursor = data[-1]["_id"]
+
+        if hide_id:
+            for document in data:
+                document.pop("_id", None)
+
+        return data, next_cursor
+
+    async def find_document_stream(
+        self,
+        filter_document: Dict = {},
+        request_attribute: Dict = {},
+        batch_size: int = 500,
+    ) -> AsyncIterator[Dict]:
+        """Percorre o cursor do Motor sem montar a lista completa em memória."""
+        collection = self.__db_connection.get_collection(self.__collection_name)
+        async_cursor = collection.find(filter_document, request_attribute).batch_size(
+            batch_size
+        )
+        async for document in async_cursor:
+            yield document
+
     async def find_document_one(
-        self, filter_document: Dict = {}, request_attribute: Dict = {}
+        self, filter_document: Dict = {}, request_attribute: Dict = {}, session=None
     ):
         collection = self.__db_connection.get_collection(self.__collection_name)
-        data = await collection.find_one(filter_document, request_attribute)
+        data = await collection.find_one(
+            filter_document, request_attribute, session=session
+        )
         if data:
             data = [data]
         return data
 
-    async def insert_document(self, document: Dict):
+    async def find_document_by_user(
+        self,
+        user_id: ObjectId,
+        load: Callable[[ObjectId], Awaitable[list[Dict] | None]] | None = None,
+    ):
+        """
+        Busca o documento do usuário (sem o _id) passando pelo cache, quando
+        houver. Com `load`, o documento é montado por essa função em vez de um
+        find_one. O documento retornado é compartilhado com o cache e não deve
+        ser alterado.
+        """
+        generation = None
+        if self.__cache is not None:
+            data = self.__cache.get(user_id)
+            if data is not None:
+                return [data]
+            # Uma escrita que invalide o user_id durante a leitura impede o set.
+            generation = self.__cache.generation(user_id)
+
+        if load is None:
+            data = await self.find_document_one({"user_id": user_id}, {"_id": 0})
+        else:
+            data = await load(user_id)
+
+        if data and self.__cache is not None:
+            self.__cache.set(user_id, data[0], generation)
+
+        return data
+
+    async def aggregate(self, pipeline: list[Dict], session=None) -> list[Dict]:
         collection = self.__db_connection.get_collection(self.__collection_name)
-        insert_result = await collection.insert_one(document)
+        async_cursor = collection.aggregate(pipeline, session=session)
+        data = await async_cursor.to_list(length=None)
+        return data
+
+    async def aggregate_stream(
+        self, pipeline: list[Dict], batch_size: int = 500
+    ) -> AsyncIterator[Dict]:
+        """Como find_document_stream, mas percorrendo o cursor de uma agregação."""
+        collection = self.__db_connection.get_collection(self.__collection_name)
+        async_cursor = collection.aggregate(pipeline, batchSize=batch_size)
+        async for document in async_cursor:
+            yield document
+
+    async def find_version_by_user(self, user_id: ObjectId) -> int | None:
+        """
+        Versão atual do documento do usuário, lida do cache ou com uma consulta
+        que projeta apenas o campo "version". None se o documento não existe.
+        """
+        if self.__cache is not None:
+            data = self.__cache.get(user_id)
+            if data is not None:
+                return data.get("version", 0)
+
+        data = await self.find_document_one(
+            {"user_id": user_id}, {"_id": 0, "version": 1}
+        )
+
+        return data[0].get("version", 0) if data else None
+
+    async def insert_document(self, document: Dict, session=None):
+        collection = self.__db_connection.get_collection(self.__collection_name)
+        if self.__versioned:
+            document.setdefault("version", 0)
+        insert_result = await collection.insert_one(document, session=session)
+        self.__invalidate(document)
         return insert_result
 
     # def insert_many_document(self, listDocument: List[Dict]) -> None:
@@ -40,21 +197,44 @@ class CollectionHandler:
         filter_document: Dict,
         request_attribute: Dict,
         array_filters: list[Dict] = None,
+        session=None,
     ) -> UpdateResult:
         collection = self.__db_connection.get_collection(self.__collection_name)
         update_result: UpdateResult = await collection.update_one(
-            filter_document, request_attribute, array_filters=array_filters
+            filter_document,
+            self.with_version_bump(request_attribute),
+            array_filters=array_filters,
+            session=session,
         )
+        self.__invalidate(filter_document)
         return update_result
 
-    def delete_document(self, _id: Dict):
+    async def bulk_write(
+        self, operations: list, ordered: bool = False, session=None
+    ) -> BulkWriteResult:
+        """
+        Envia várias operações em um único round trip. Com ordered=False o banco
+        continua após uma falha e os erros chegam em BulkWriteError.details.
+        """
+        collection = self.__db_connection.get_collection(self.__collection_name)
+        # As operações do bulk não expõem o filtro: quem chama invalida o cache
+        # com invalidate_cache() e monta os updates com with_version_bump().
+        bulk_result: BulkWriteResult = await collection.bulk_write(
+            operations, ordered=ordered, session=session
+        )
+        return bulk_result
+
+    async def delete_document(self, _id: Dict, session=None):
         collection = self.__db_connection.get_collection(self.__collection_name)
-        delete_result = collection.delete_one(_id)
+        delete_result = await collection.delete_one(_id, session=session)
+        self.__invalidate(_id)
         return delete_result
 
-    def delete_many(self):
+    async def delete_many(self):
         collection = self.__db_connection.get_collection(self.__collection_name)
-        collection.delete_many({})
+        await collection.delete_many({})
+        if self.__cache is not None:
+            self.__cache.clear()
 
     # def delete_many_document(self, userId: List) -> None:
     #     object_ids = [ObjectId(i) for i in userId]
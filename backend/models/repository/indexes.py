@@ -0,0 +1,237 @@
+import argparse
+import asyncio
+import logging
+from typing import Dict
+
+from bson import ObjectId
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from models.connection_options.mongo_db_config import mongo_db_infos
+
+logger = logging.getLogger(__name__)
+
+COLLECTIONS = mongo_db_infos["COLLECTIONS"]
+
+# Registro declarativo dos índices de cada collection.
+INDEXES: Dict[str, list[IndexModel]] = {
+    COLLECTIONS["collection_users"]: [
+        IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    ],
+    COLLECTIONS["collection_pantry"]: [
+        IndexModel([("user_id", ASCENDING)], name="user_id_unique", unique=True),
+        # Multikey: um registro de índice por item embutido em pantry[].items[].
+        IndexModel([("pantry.items.item_id", ASCENDING)], name="pantry_item_id"),
+    ],
+    # Layout v2 da despensa: um documento por item (ver item_stores.py).
+    COLLECTIONS["collection_pantry_items"]: [
+        IndexModel(
+            [("user_id", ASCENDING), ("category_value", ASCENDING)],
+            name="user_id_category",
+        ),
+        # Também torna idempotente o upsert da migração.
+        IndexModel(
+            [("user_id", ASCENDING), ("item_id", ASCENDING)],
+            name="user_id_item_id_unique",
+            unique=True,
+        ),
+    ],
+    COLLECTIONS["collection_recipe_suggestions"]: [
+        IndexModel([("user_id", ASCENDING)], name="user_id_unique", unique=True),
+    ],
+    COLLECTIONS["collection_shopping_cart"]: [
+        IndexModel([("user_id", ASCENDING)], name="user_id_unique", unique=True),
+        IndexModel(
+            [("shoppingCart.items.item_id", ASCENDING)], name="shopping_cart_item_id"
+        ),
+    ],
+}
+
+# Consulta representativa de cada rota, usada no relatório do explain().
+_SAMPLE_ID = ObjectId()
+
+ROUTE_QUERIES: list[tuple[str, str, Dict]] = [
+    ("GET /api/users/{user_id}", COLLECTIONS["collection_users"], {"_id": _SAMPLE_ID}),
+    (
+        "POST /api/users/",
+        COLLECTIONS["collection_users"],
+        {"$or": [{"username": ""}, {"email": ""}]},
+    ),
+    (
+        "GET /api/pantry/{user_id}",
+        COLLECTIONS["collection_pantry"],
+        {"user_id": _SAMPLE_ID},
+    ),
+    (
+        "GET /api/pantry/category/{user_id}",
+        COLLECTIONS["collection_pantry"],
+        {"user_id": _SAMPLE_ID, "pantry.category_value": 101},
+    ),
+    (
+        "DELETE /api/pantry/{item_id}",
+        COLLECTIONS["collection_pantry"],
+        {
+            "user_id": _SAMPLE_ID,
+            "pantry.category_value": 101,
+            "pantry.items.item_id": "",
+        },
+    ),
+    (
+        "GET /api/pantry/category/{user_id} (items layout)",
+        COLLECTIONS["collection_pantry_items"],
+        {"user_id": _SAMPLE_ID, "category_value": 101},
+    ),
+    (
+        "DELETE /api/pantry/{item_id} (items layout)",
+        COLLECTIONS["collection_pantry_items"],
+        {"user_id": _SAMPLE_ID, "category_value": 101, "item_id": ""},
+    ),
+    (
+        "GET /api/shopping_cart/{user_id}",
+        COLLECTIONS["collection_shopping_cart"],
+        {"user_id": _SAMPLE_ID},
+    ),
+    (
+        "GET /api/shopping_cart/category/{user_id}",
+        COLLECTIONS["collection_shopping_cart"],
+        {"user_id": _SAMPLE_ID, "shoppingCart.category_value": 101},
+    ),
+    (
+        "DELETE /api/shopping_cart/{item_id}",
+        COLLECTIONS["collection_shopping_cart"],
+        {
+            "user_id": _SAMPLE_ID,
+            "shoppingCart.category_value": 101,
+            "shoppingCart.items.item_id": "",
+        },
+    ),
+]
+
+
+class IndexVerificationError(Exception):
+    pass
+
+
+def _index_matches(existing: Dict, declared: Dict) -> bool:
+    return list(existing["key"]) == list(declared["key"].items()) and bool(
+        existing.get("unique", False)
+    ) == bool(declared.get("unique", False))
+
+
+async def missing_indexes(db_connection) -> Dict[str, list[str]]:
+    """Retorna, por collection, os índices declarados que não existem no banco."""
+    missing = {}
+
+    for collection_name, index_models in INDEXES.items():
+        collection = db_connection.get_collection(collection_name)
+        existing = (await collection.index_information()).values()
+
+        names = [
+            model.document["name"]
+            for model in index_models
+            if not any(_index_matches(index, model.document) for index in existing)
+        ]
+        if names:
+            missing[collection_name] = names
+
+    return missing
+
+
+async def ensure_indexes(db_connection, check_only: bool = False) -> None:
+    """
+    Aplica o registro INDEXES. Em modo check_only nada é criado: os índices
+    ausentes são apenas reportados, levantando IndexVerificationError.
+
+    Um índice que o banco recusa (ex.: unique sobre dados duplicados, ou um
+    índice de mesmo nome com outra definição) não impede os demais; ao final
+    as falhas são levantadas juntas, com a collection e o nome de cada uma.
+    """
+    if not check_only:
+        failures = []
+        for collection_name, index_models in INDEXES.items():
+            collection = db_connection.get_collection(collection_name)
+            # Um a um, para saber qual índice o banco recusou.
+            for model in index_models:
+                try:
+                    await collection.create_indexes([model])
+                except OperationFailure as error:
+                    failures.append(
+                        f"{collection_name}.{model.document['name']}: {error}"
+                    )
+        if failures:
+            raise IndexVerificationError(
+                "Could not create indexes: "
+                + "; ".join(failures)
+                + ". Fix the data (ex.: remove duplicates of a unique key) or "
+                "drop the conflicting index, or start with "
+                "SMARTKITCHEN_INDEX_MODE=check to only verify them."
+            )
+        return
+
+    missing = await missing_indexes(db_connection)
+    if missing:
+        raise IndexVerificationError(f"Missing indexes: {missing}")
+
+
+def _winning_stage(plan: Dict) -> tuple[str, str | None]:
+    # Desce pelos estágios do plano até o acesso à collection (IXSCAN / COLLSCAN).
+    stage = plan.get("stage")
+    if stage in ("IXSCAN", "COLLSCAN", "IDHACK", "EXPRESS_IXSCAN"):
+        return stage, plan.get("indexName", "_id_" if stage == "IDHACK" else None)
+
+    for key in ("queryPlan", "inputStage"):
+        if key in plan:
+            return _winning_stage(plan[key])
+    if plan.get("inputStages"):
+        return _winning_stage(plan["inputStages"][0])
+
+    return stage or "UNKNOWN", None
+
+
+async def explain_report(db_connection) -> list[Dict]:
+    """Roda explain() na consulta de cada rota e informa o índice escolhido."""
+    report = []
+
+    for route, collection_name, filter_document in ROUTE_QUERIES:
+        collection = db_connection.get_collection(collection_name)
+        explain = await collection.find(filter_document).explain()
+        stage, index_name = _winning_stage(explain["queryPlanner"]["winningPlan"])
+        report.append(
+            {
+                "route": route,
+                "collection": collection_name,
+                "filter": list(filter_document),
+                "stage": stage,
+                "index": index_name,
+            }
+        )
+
+    return report
+
+
+async def _main(check_only: bool, report: bool) -> None:
+    from models.connection_options.connections import DBConnectionHandler
+
+    db_handler = DBConnectionHandler()
+    db_handler.connect_to_db(mongo_db_infos["DB_NAME"])
+    db_connection = db_handler.get_db_connection()
+
+    try:
+        await ensure_indexes(db_connection, check_only=check_only)
+        print("Índices OK")
+
+        if report:
+            for line in await explain_report(db_connection):
+                print(f"{line['route']:<45} {line['stage']:<10} {line['index'] or '-'}")
+    finally:
+        db_handler.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cria ou verifica os índices.")
+    parser.add_argument("--check", action="store_true", help="Apenas verifica")
+    parser.add_argument("--report", action="store_true", help="Relatório explain()")
+    args = parser.parse_args()
+
+    asyncio.run(_main(args.check, args.report))
@@ -0,0 +1,587 @@
+import asyncio
+from collections import defaultdict
+from typing import AsyncIterator, Dict, NamedTuple
+
+from bson import ObjectId
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from models.repository.collections import CollectionHandler
+from models.repository.pipelines import (
+    category_items_pipeline,
+    item_conditions_query,
+    select_category_items,
+)
+
+# Marca os documentos de usuário cujos itens já estão na collection separada.
+SEPARATE_LAYOUT = 2
+
+
+class WriteOutcome(NamedTuple):
+    matched: int
+    modified: int
+
+
+class ItemUpdate(NamedTuple):
+    category_value: int
+    item_id: ObjectId | str
+    fields: Dict
+
+
+class EmbeddedItemStore:
+    """
+    Layout v1: os itens ficam embutidos em <array_field>[].items[] do
+    documento do usuário.
+    """
+
+    def __init__(self, repository: CollectionHandler, array_field: str) -> None:
+        self.repository = repository
+        self.array_field = array_field
+
+    def new_document_fields(self) -> Dict:
+        """Campos extras do documento de um usuário novo."""
+        return {}
+
+    async def read(self, user_id: ObjectId) -> Dict | None:
+        data = await self.repository.find_document_by_user(user_id)
+        return data[0] if data else None
+
+    async def read_page(
+        self, limit: int, after: ObjectId | None
+    ) -> tuple[list[Dict], ObjectId | None]:
+        return await self.repository.find_document_page(
+            request_attribute={"_id": 0}, limit=limit, after=after
+        )
+
+    def stream(self) -> AsyncIterator[Dict]:
+        return self.repository.find_document_stream(request_attribute={"_id": 0})
+
+    async def read_category(
+        self,
+        user_id: ObjectId,
+        category_value: int,
+        name_prefix: str | None = None,
+        min_quantity: float | None = None,
+        unit: str | None = None,
+    ) -> list[Dict]:
+        """
+        Com `unit`, `min_quantity` é comparado na unidade base; sem ela, na
+        unidade de cada item.
+
+        Lista vazia quando o usuário não existe e `array_field` vazio quando a
+        categoria não existe (mesmo formato de category_items_pipeline).
+        """
+        if self.repository.has_cache():
+            # Com o cache ativo o documento inteiro já está em memória.
+            document = await self.read(user_id)
+            if document is None:
+                return []
+            return [
+                {
+                    self.array_field: select_category_items(
+                        document[self.array_field],
+                        category_value,
+                        name_prefix,
+                        min_quantity,
+                        unit,
+                    )
+                }
+            ]
+
+        return await self._read_category_uncached(
+            user_id, category_value, name_prefix, min_quantity, unit
+        )
+
+    async def _read_category_uncached(
+        self,
+        user_id: ObjectId,
+        category_value: int,
+        name_prefix: str | None,
+        min_quantity: float | None,
+        unit: str | None,
+    ) -> list[Dict]:
+        # Uma única agregação devolve só a categoria pedida, já filtrada.
+        return await self.repository.aggregate(
+            category_items_pipeline(
+                user_id,
+                self.array_field,
+                category_value,
+                name_prefix,
+                min_quantity,
+                unit,
+            )
+        )
+
+    async def read_item(
+        self, user_id: ObjectId, category_value: int, item_id: str
+    ) -> Dict | None:
+        """Item gravado, ou None se o usuário, a categoria ou o item não existir."""
+        result_find = await self.read_category(user_id, category_value)
+        if not result_find:
+            return None
+
+        for category in result_find[0][self.array_field]:
+            for item in category["items"]:
+                if str(item["item_id"]) == item_id:
+                    return item
+        return None
+
+    async def add_items(
+        self, user_id: ObjectId, items: list[tuple[int, Dict]], session=None
+    ) -> set[int] | None:
+        """
+        Grava os pares (category_value, item) com um $push/$each por categoria,
+        em um único bulk_write. Retorna os índices dos itens que não foram
+        gravados, ou None se o documento do usuário não existe.
+        """
+        indexes_by_category: dict[int, list[int]] = defaultdict(list)
+        for index, (category_value, _) in enumerate(items):
+            indexes_by_category[category_value].append(index)
+
+        categories = list(indexes_by_category)
+        operations = [
+            UpdateOne(
+                {
+                    "user_id": user_id,
+                    f"{self.array_field}.category_value": category_value,
+                },
+                self.repository.with_version_bump(
+                    {
+                        "$push": {
+                            f"{self.array_field}.$.items": {
+                                "$each": [
+                                    items[index][1]
+                                    for index in indexes_by_category[category_value]
+                                ]
+                            }
+                        }
+                    }
+                ),
+            )
+            for category_value in categories
+        ]
+
+        failed_categories = set()
+        try:
+            bulk_result = await self.repository.bulk_write(operations, session=session)
+            matched_count = bulk_result.matched_count
+        except BulkWriteError as error:
+            # Com ordered=False as demais categorias são gravadas mesmo com erro em uma.
+            failed_categories = {
+                categories[write_error["index"]]
+                for write_error in error.details["writeErrors"]
+            }
+            matched_count = error.details["nMatched"]
+
+        self.repository.invalidate_cache(user_id)
+
+        if matched_count == 0 and not failed_categories:
+            return None
+
+        return {
+            index
+            for category_value in failed_categories
+            for index in indexes_by_category[category_value]
+        }
+
+    async def _set_items_if_version(
+        self,
+        user_id: ObjectId,
+        version: int | None,
+        updates: list[ItemUpdate],
+        session=None,
+    ) -> bool:
+        """
+        Aplica todos os `updates` em um único update, só se o documento ainda
+        estiver na `version` lida antes do cálculo. False se ele mudou.
+        """
+        fields, array_filters = {}, {}
+        for index, (category_value, item_id, item_fields) in enumerate(updates):
+            category, item = f"c{int(category_value)}", f"i{index}"
+            array_filters[category] = {f"{category}.category_value": category_value}
+            array_filters[item] = {f"{item}.item_id": item_id}
+            for field_name, value in item_fields.items():
+                path = f"{self.array_field}.$[{category}].items.$[{item}].{field_name}"
+                fields[path] = value
+
+        update_result = await self.repository.update_document(
+            {"user_id": user_id, "version": version},
+            {"$set": fields} if fields else {},
+            array_filters=list(array_filters.values()) or None,
+            session=session,
+        )
+        return update_result.matched_count > 0
+
+    async def merge_items(
+        self,
+        user_id: ObjectId,
+        version: int | None,
+        updates: list[ItemUpdate],
+        new_items: list[tuple[int, Dict]],
+        session=None,
+    ) -> set[int] | None:
+        """
+        Altera itens existentes e acrescenta `new_items` com um número fixo de
+        escritas, qualquer que seja a quantidade de itens. Retorna None se o
+        documento mudou desde a leitura em `version` (nada é gravado), senão os
+        índices de `new_items` que falharam.
+        """
+        if not await self._set_items_if_version(user_id, version, updates, session):
+            return None
+
+        if not new_items:
+            return set()
+        return await self.add_items(user_id, new_items, session=session) or set()
+
+    def _item_filter(
+        self,
+        user_id: ObjectId,
+        category_value: int,
+        item_id: str,
+        new_values: Dict | None = None,
+    ):
+        item_match = {"item_id": item_id}
+        if new_values:
+            # Só casa se algum campo for mudar: um update sem efeito não incrementa
+            # a versão (ETag) e a rota pode responder 304.
+            item_match["$or"] = [
+                {field_name: {"$ne": value}} for field_name, value in new_values.items()
+            ]
+
+        filter_document = {
+            "user_id": user_id,
+            self.array_field: {
+                "$elemMatch": {
+                    "category_value": category_value,
+                    "items": {"$elemMatch": item_match},
+                }
+            },
+        }
+        array_filters = [
+            {"category.category_value": category_value},
+            {"item.item_id": item_id},
+        ]
+        return filter_document, array_filters
+
+    async def _set_item(
+        self,
+        user_id: ObjectId,
+        category_value: int,
+        item_id: str,
+        request_attribute: Dict,
+        new_values: Dict,
+    ) -> WriteOutcome:
+        filter_document, array_filters = self._item_filter(
+            user_id, category_value, item_id, new_values
+        )
+        update_result = await self.repository.update_document(
+            filter_document=filter_document,
+            request_attribute=request_attribute,
+            array_filters=array_filters,
+        )
+        if update_result.matched_count:
+            return WriteOutcome(
+                update_result.matched_count, update_result.modified_count
+            )
+
+        # Nada casou: o item não existe ou já tem esses valores.
+        filter_document, _ = self._item_filter(user_id, category_value, item_id)
+        exists = await self.repository.find_document_one(filter_document, {"_id": 1})
+        return WriteOutcome(1 if exists else 0, 0)
+
+    async def replace_item(
+        self, user_id: ObjectId, category_value: int, item_id: str, item: Dict
+    ) -> WriteOutcome:
+        # Substitui o item no lugar, em uma única escrita: o filtro garante que o
+        # item existe na categoria e os arrayFilters apontam para a categoria e o item.
+        item = {"item_id": item_id, **item}
+        return await self._set_item(
+            user_id,
+            category_value,
+            item_id,
+            {"$set": {f"{self.array_field}.$[category].items.$[item]": item}},
+            item,
+        )
+
+    async def update_item(
+        self, user_id: ObjectId, category_value: int, item_id: str, fields: Dict
+    ) -> WriteOutcome:
+        return await self._set_item(
+            user_id,
+            category_value,
+            item_id,
+            {
+                "$set": {
+                    f"{self.array_field}.$[category].items.$[item].{field_name}": value
+                    for field_name, value in fields.items()
+                }
+            },
+            fields,
+        )
+
+    async def delete_item(
+        self, user_id: ObjectId, category_value: int, item_id: str
+    ) -> bool:
+        filter_document = {
+            "user_id": user_id,
+            f"{self.array_field}.category_value": category_value,
+            f"{self.array_field}.items.item_id": item_id,
+        }
+        update_result = await self.repository.update_document(
+            filter_document=filter_document,
+            request_attribute={
+                "$pull": {f"{self.array_field}.$[element].items": {"item_id": item_id}}
+            },
+            array_filters=[{"element.category_value": category_value}],
+        )
+        return update_result.modified_count > 0
+
+    async def delete_all(self) -> None:
+        await self.repository.delete_many()
+
+
+class SeparateItemStore(EmbeddedItemStore):
+    """
+    Layout v2: um documento pequeno por item em `items_repository`, indexado
+    por (user_id, category_value). O documento do usuário guarda apenas as
+    categorias e a versão usada no ETag, então as escritas não reescrevem mais
+    um documento que cresce sem limite.
+
+    Enquanto a migração (models/repository/migrate_pantry_items.py) não termina,
+    itens ainda embutidos continuam visíveis e podem ser alterados ou removidos.
+    """
+
+    def __init__(
+        self,
+        repository: CollectionHandler,
+        items_repository: CollectionHandler,
+        array_field: str,
+    ) -> None:
+        super().__init__(repository, array_field)
+        self.items_repository = items_repository
+
+    def new_document_fields(self) -> Dict:
+        return {"layout": SEPARATE_LAYOUT}
+
+    async def _load(self, user_id: ObjectId) -> list[Dict] | None:
+        # Documento do usuário (com a versão) antes dos itens: ver _bump_version.
+        data = await self.repository.find_document_one({"user_id": user_id}, {"_id": 0})
+        if data:
+            items = await self.items_repository.find_document(
+                {"user_id": user_id}, {"_id": 0, "user_id": 0}
+            )
+            self._merge_items(data[0], items)
+        return data
+
+    async def read(self, user_id: ObjectId) -> Dict | None:
+        data = await self.repository.find_document_by_user(user_id, load=self._load)
+        return data[0] if data else None
+
+    async def read_page(
+        self, limit: int, after: ObjectId | None
+    ) -> tuple[list[Dict], ObjectId | None]:
+        data, next_cursor = await super().read_page(limit, after)
+
+        # Os itens da página inteira vêm em uma única consulta com $in.
+        items_by_user: dict[ObjectId, list[Dict]] = defaultdict(list)
+        if data:
+            items = await self.items_repository.find_document(
+                {"user_id": {"$in": [document["user_id"] for document in data]}},
+                {"_id": 0},
+            )
+            for item in items:
+                items_by_user[item.pop("user_id")].append(item)
+
+        for document in data:
+            self._merge_items(document, items_by_user.get(document["user_id"], []))
+
+        return data, next_cursor
+
+    def _merge_items(self, document: Dict, items: list[Dict]) -> None:
+        # Mantém no formato do layout embutido; itens ainda embutidos (documento
+        # não migrado) vêm primeiro.
+        items_by_category: dict[int, list[Dict]] = defaultdict(list)
+        for item in items:
+            items_by_category[item.pop("category_value")].append(item)
+
+        for category in document[self.array_field]:
+            category["items"] = [
+                *category.get("items", []),
+                *items_by_category.get(category["category_value"], []),
+            ]
+
+    async def stream(self) -> AsyncIterator[Dict]:
+        pipeline = [
+            {"$project": {"_id": 0}},
+            {
+                "$lookup": {
+                    "from": self.items_repository.get_collection_name(),
+                    "localField": "user_id",
+                    "foreignField": "user_id",
+                    "as": "_items",
+                }
+            },
+        ]
+        async for document in self.repository.aggregate_stream(pipeline):
+            items = document.pop("_items")
+            for item in items:
+                item.pop("_id", None)
+                item.pop("user_id", None)
+            self._merge_items(document, items)
+            yield document
+
+    async def _read_category_uncached(
+        self,
+        user_id: ObjectId,
+        category_value: int,
+        name_prefix: str | None,
+        min_quantity: float | None,
+        unit: str | None,
+    ) -> list[Dict]:
+        # A categoria (com eventuais itens ainda embutidos) e depois os itens
+        # dela, buscados pelo índice (user_id, category_value). Em sequência,
+        # como em _load: a versão nunca pode ser mais nova que os itens.
+        result_find = await super()._read_category_uncached(
+            user_id, category_value, name_prefix, min_quantity, unit
+        )
+        if result_find:
+            items = await self.items_repository.find_document(
+                {
+                    "user_id": user_id,
+                    "category_value": category_value,
+                    **item_conditions_query(name_prefix, min_quantity, unit),
+                },
+                {"_id": 0, "user_id": 0},
+            )
+            self._merge_items(result_find[0], items)
+        return result_find
+
+    async def _bump_version(self, user_id: ObjectId, session=None) -> int:
+        # Atualiza a versão do documento do usuário (ETag) e invalida o cache.
+        # Acontece depois da escrita do item, e os leitores (_load,
+        # _read_category_uncached) leem a versão antes dos itens: um leitor no
+        # meio do caminho recebe no máximo o ETag antigo com o conteúdo novo,
+        # nunca o contrário.
+        update_result = await self.repository.update_document(
+            {"user_id": user_id},
+            {"$currentDate": {"updated_at": True}},
+            session=session,
+        )
+        return update_result.matched_count
+
+    async def add_items(
+        self, user_id: ObjectId, items: list[tuple[int, Dict]], session=None
+    ) -> set[int] | None:
+        if await self.repository.find_version_by_user(user_id) is None:
+            return None
+
+        operations = [
+            InsertOne({"user_id": user_id, "category_value": category_value, **item})
+            for category_value, item in items
+        ]
+
+        failed_items = set()
+        try:
+            await self.items_repository.bulk_write(operations, session=session)
+        except BulkWriteError as error:
+            failed_items = {
+                write_error["index"] for write_error in error.details["writeErrors"]
+            }
+
+        if len(failed_items) < len(items):
+            await self._bump_version(user_id, session=session)
+
+        return failed_items
+
+    async def merge_items(
+        self,
+        user_id: ObjectId,
+        version: int | None,
+        updates: list[ItemUpdate],
+        new_items: list[tuple[int, Dict]],
+        session=None,
+    ) -> set[int] | None:
+        # A versão do documento do usuário protege as duas collections; o update
+        # embutido só encontra itens de documentos ainda não migrados.
+        failed_items = await super().merge_items(
+            user_id, version, updates, new_items, session=session
+        )
+        if failed_items is None or not updates:
+            return failed_items
+
+        await self.items_repository.bulk_write(
+            [
+                UpdateOne(
+                    {
+                        "user_id": user_id,
+                        "category_value": category_value,
+                        "item_id": item_id,
+                    },
+                    {"$set": fields},
+                )
+                for category_value, item_id, fields in updates
+            ],
+            session=session,
+        )
+        return failed_items
+
+    async def _set_item_fields(
+        self, user_id: ObjectId, category_value: int, item_id: str, fields: Dict
+    ) -> WriteOutcome | None:
+        update_result = await self.items_repository.update_document(
+            {"user_id": user_id, "category_value": category_value, "item_id": item_id},
+            {"$set": fields},
+        )
+
+        # None: o item pode ainda estar embutido (documento não migrado).
+        if update_result.matched_count == 0:
+            return None
+
+        if update_result.modified_count:
+            await self._bump_version(user_id)
+
+        return WriteOutcome(update_result.matched_count, update_result.modified_count)
+
+    async def replace_item(
+        self, user_id: ObjectId, category_value: int, item_id: str, item: Dict
+    ) -> WriteOutcome:
+        outcome = await self._set_item_fields(user_id, category_value, item_id, item)
+        if outcome is None:
+            return await super().replace_item(user_id, category_value, item_id, item)
+        return outcome
+
+    async def update_item(
+        self, user_id: ObjectId, category_value: int, item_id: str, fields: Dict
+    ) -> WriteOutcome:
+        outcome = await self._set_item_fields(user_id, category_value, item_id, fields)
+        if outcome is None:
+            return await super().update_item(user_id, category_value, item_id, fields)
+        return outcome
+
+    async def delete_item(
+        self, user_id: ObjectId, category_value: int, item_id: str
+    ) -> bool:
+        # Durante a migração o item pode estar nas duas collections; removido só
+        # de pantry_items, uma nova tentativa o copiaria de volta do documento.
+        delete_result, deleted_embedded = await asyncio.gather(
+            self.items_repository.delete_document(
+                {
+                    "user_id": user_id,
+                    "category_value": category_value,
+                    "item_id": item_id,
+                }
+            ),
+            super().delete_item(user_id, category_value, item_id),
+        )
+
+        if delete_result.deleted_count == 0:
+            return deleted_embedded
+
+        # O $pull do item embutido já incrementa a versão.
+        if not deleted_embedded:
+            await self._bump_version(user_id)
+        return True
+
+    async def delete_all(self) -> None:
+        await super().delete_all()
+        await self.items_repository.delete_many()
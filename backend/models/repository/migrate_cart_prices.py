@@ -0,0 +1,116 @@
+"""
+Converte, no próprio banco, os preços do carrinho gravados como string para
+Decimal128. Cada lote é um update em formato de pipeline ($toDecimal), sem
+trazer os itens para a aplicação. Só documentos com algum preço em string
+são selecionados, então a migração pode ser interrompida e repetida.
+
+    python -m models.repository.migrate_cart_prices --batch-size 500
+"""
+
+import argparse
+import asyncio
+import logging
+from typing import Dict
+
+from pymongo import ASCENDING
+
+from models.connection_options.mongo_db_config import mongo_db_infos
+
+logger = logging.getLogger(__name__)
+
+COLLECTIONS = mongo_db_infos["COLLECTIONS"]
+ARRAY_FIELD = "shoppingCart"
+
+PENDING_FILTER = {f"{ARRAY_FIELD}.items.price": {"$type": "string"}}
+
+# Reescreve cada item trocando apenas o price; o restante fica igual.
+CONVERT_PRICES: list[Dict] = [
+    {
+        "$set": {
+            ARRAY_FIELD: {
+                "$map": {
+                    "input": f"${ARRAY_FIELD}",
+                    "as": "category",
+                    "in": {
+                        "$mergeObjects": [
+                            "$$category",
+                            {
+                                "items": {
+                                    "$map": {
+                                        "input": "$$category.items",
+                                        "as": "item",
+                                        "in": {
+                                            "$mergeObjects": [
+                                                "$$item",
+                                                {
+                                                    "price": {
+                                                        "$toDecimal": "$$item.price"
+                                                    }
+                                                },
+                                            ]
+                                        },
+                                    }
+                                }
+                            },
+                        ]
+                    },
+                }
+            }
+        }
+    }
+]
+
+
+async def migrate_cart_prices(db_connection, batch_size: int = 500) -> int:
+    """Converte os documentos pendentes em lotes. Retorna o total alterado."""
+    shopping_cart = db_connection.get_collection(
+        COLLECTIONS["collection_shopping_cart"]
+    )
+    migrated = 0
+
+    while True:
+        batch = (
+            await shopping_cart.find(PENDING_FILTER, {"_id": 1})
+            .sort("_id", ASCENDING)
+            .limit(batch_size)
+            .to_list(length=batch_size)
+        )
+        if not batch:
+            break
+
+        # O filtro é repetido: um documento já convertido não é reescrito.
+        update_result = await shopping_cart.update_many(
+            {"_id": {"$in": [document["_id"] for document in batch]}, **PENDING_FILTER},
+            CONVERT_PRICES,
+        )
+        migrated += update_result.modified_count
+        logger.info("%d carrinhos convertidos", migrated)
+
+    return migrated
+
+
+async def _main(batch_size: int) -> None:
+    from models.connection_options.connections import DBConnectionHandler
+
+    db_handler = DBConnectionHandler()
+    db_handler.connect_to_db(mongo_db_infos["DB_NAME"])
+
+    try:
+        migrated = await migrate_cart_prices(
+            db_handler.get_db_connection(), batch_size=batch_size
+        )
+        print(f"Migração concluída: {migrated} carrinhos")
+    finally:
+        db_handler.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(
+        description="Converte os preços do carrinho de string para Decimal128."
+    )
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    asyncio.run(_main(args.batch_size))
@@ -0,0 +1,197 @@
+"""
+Migração online da despensa para o layout v2 (um documento por item em
+pantry_items). Pode rodar com a app no ar (SMARTKITCHEN_PANTRY_LAYOUT=items)
+e ser interrompida a qualquer momento:
+
+- os documentos são percorridos em lotes por _id e o último _id de cada lote
+  é gravado como checkpoint na collection de migrações;
+- os itens são gravados com upsert em (user_id, item_id), então repetir um
+  documento não duplica nada nem desfaz alterações feitas pela app na cópia;
+- o documento só perde os itens embutidos se não mudou desde a leitura
+  (mesma "version"), e fica marcado com layout=2.
+
+    python -m models.repository.migrate_pantry_items --batch-size 500
+"""
+
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Dict
+
+from pymongo import ASCENDING, UpdateOne
+
+from models.connection_options.mongo_db_config import mongo_db_infos
+from models.repository.item_stores import SEPARATE_LAYOUT
+
+logger = logging.getLogger(__name__)
+
+COLLECTIONS = mongo_db_infos["COLLECTIONS"]
+MIGRATION_ID = "pantry_items_v2"
+ARRAY_FIELD = "pantry"
+MAX_ATTEMPTS = 5
+
+
+async def _migrate_document(
+    pantry, pantry_items, document_id, copied: set, session=None
+) -> bool:
+    """
+    Copia os itens embutidos de um documento e esvazia as categorias. Retorna
+    False se o documento mudou no meio do caminho (deve ser tentado de novo).
+    `copied` acumula, entre as tentativas, os item_id já copiados.
+    """
+    document = await pantry.find_one({"_id": document_id}, session=session)
+    if document is None or document.get("layout") == SEPARATE_LAYOUT:
+        return True
+
+    items = [
+        (category["category_value"], item)
+        for category in document[ARRAY_FIELD]
+        for item in category.get("items", [])
+    ]
+
+    # Itens copiados numa tentativa anterior e removidos pela app desde então:
+    # sem isso voltariam a aparecer depois da migração. Só os copiados aqui são
+    # apagados; os que a app gravou direto em pantry_items não entram em `copied`.
+    removed = copied - {item["item_id"] for _, item in items}
+    if removed:
+        await pantry_items.delete_many(
+            {"user_id": document["user_id"], "item_id": {"$in": list(removed)}},
+            session=session,
+        )
+        copied -= removed
+
+    # $setOnInsert: um item já copiado pode ter sido alterado pela app em
+    # pantry_items, que passa a ser a cópia válida; repetir não o sobrescreve.
+    operations = [
+        UpdateOne(
+            {"user_id": document["user_id"], "item_id": item["item_id"]},
+            {
+                "$setOnInsert": {
+                    "user_id": document["user_id"],
+                    "category_value": category_value,
+                    **item,
+                }
+            },
+            upsert=True,
+        )
+        for category_value, item in items
+    ]
+    if operations:
+        await pantry_items.bulk_write(operations, ordered=False, session=session)
+        copied.update(item["item_id"] for _, item in items)
+
+    # Sem alterar "version": o conteúdo visto pelos clientes é o mesmo (ETag).
+    update_result = await pantry.update_one(
+        {"_id": document_id, "version": document.get("version")},
+        {
+            "$set": {
+                ARRAY_FIELD: [
+                    {**category, "items": []} for category in document[ARRAY_FIELD]
+                ],
+                "layout": SEPARATE_LAYOUT,
+            }
+        },
+        session=session,
+    )
+    return update_result.matched_count == 1
+
+
+async def migrate_pantry_items(db_handler, batch_size: int = 500) -> int:
+    """Migra os documentos pendentes a partir do checkpoint. Retorna o total migrado."""
+    db_connection = db_handler.get_db_connection()
+    pantry = db_connection.get_collection(COLLECTIONS["collection_pantry"])
+    pantry_items = db_connection.get_collection(COLLECTIONS["collection_pantry_items"])
+    migrations = db_connection.get_collection(COLLECTIONS["collection_migrations"])
+
+    checkpoint = await migrations.find_one({"_id": MIGRATION_ID}) or {}
+    last_id = checkpoint.get("last_id")
+    migrated = checkpoint.get("migrated", 0)
+
+    async def migrate(document_id) -> None:
+        copied: set = set()
+        for _ in range(MAX_ATTEMPTS):
+            if db_handler.supports_transactions():
+                # Na transação, uma escrita concorrente da app gera conflito e o
+                # driver refaz a tentativa.
+                done = await db_handler.run_transaction(
+                    lambda session: _migrate_document(
+                        pantry, pantry_items, document_id, copied, session=session
+                    )
+                )
+            else:
+                done = await _migrate_document(
+                    pantry, pantry_items, document_id, copied
+                )
+            if done:
+                return
+        logger.warning("Documento %s alterado durante a migração", document_id)
+
+    while True:
+        filter_document: Dict = {"layout": {"$ne": SEPARATE_LAYOUT}}
+        if last_id is not None:
+            filter_document["_id"] = {"$gt": last_id}
+
+        batch = (
+            await pantry.find(filter_document, {"_id": 1})
+            .sort("_id", ASCENDING)
+            .limit(batch_size)
+            .to_list(length=batch_size)
+        )
+        if not batch:
+            break
+
+        await asyncio.gather(*(migrate(document["_id"]) for document in batch))
+
+        last_id = batch[-1]["_id"]
+        migrated += len(batch)
+        await migrations.update_one(
+            {"_id": MIGRATION_ID},
+            {
+                "$set": {
+                    "last_id": last_id,
+                    "migrated": migrated,
+                    "updated_at": datetime.now(timezone.utc),
+                }
+            },
+            upsert=True,
+        )
+        logger.info("%d documentos migrados (último _id %s)", migrated, last_id)
+
+    # Documentos que falharam depois de MAX_ATTEMPTS ficam com layout != 2 e
+    # continuam legíveis; rode com --restart para revisitá-los.
+    return migrated
+
+
+async def _main(batch_size: int, restart: bool) -> None:
+    from models.connection_options.connections import DBConnectionHandler
+
+    db_handler = DBConnectionHandler()
+    db_handler.connect_to_db(mongo_db_infos["DB_NAME"])
+
+    try:
+        if restart:
+            migrations = db_handler.get_db_connection().get_collection(
+                COLLECTIONS["collection_migrations"]
+            )
+            await migrations.delete_one({"_id": MIGRATION_ID})
+
+        migrated = await migrate_pantry_items(db_handler, batch_size=batch_size)
+        print(f"Migração concluída: {migrated} documentos")
+    finally:
+        db_handler.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(
+        description="Move os itens da despensa para a collection pantry_items."
+    )
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument(
+        "--restart", action="store_true", help="Ignora o checkpoint salvo"
+    )
+    args = parser.parse_args()
+
+    asyncio.run(_main(args.batch_size, args.restart))
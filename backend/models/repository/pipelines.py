@@ -0,0 +1,239 @@
+import re
+from typing import Dict
+
+from bson import ObjectId
+
+from src.api.schema.categories import Units
+from src.api.schema.units import base_unit, convert, item_base_quantity, to_base
+
+
+def _min_quantity_thresholds(
+    min_quantity: float, unit: str
+) -> tuple[str, float, list[tuple[str, float]]]:
+    """
+    Unidade base e quantidade mínima nela, mais o mínimo em cada unidade da
+    mesma grandeza, para itens gravados antes de base_quantity existir.
+    """
+    base_min, base = to_base(min_quantity, unit)
+    legacy = [
+        (candidate.value, convert(base_min, base, candidate))
+        for candidate in Units
+        if base_unit(candidate).value == base
+    ]
+    return base, base_min, legacy
+
+
+def _item_conditions(
+    name_prefix: str | None, min_quantity: float | None, unit: str | None = None
+) -> list:
+    conditions = []
+
+    if name_prefix:
+        conditions.append(
+            {
+                "$regexMatch": {
+                    "input": "$$item.item_name",
+                    "regex": f"^{re.escape(name_prefix)}",
+                    "options": "i",
+                }
+            }
+        )
+
+    if min_quantity is not None and unit is None:
+        # Sem unidade, o mínimo vale na unidade de cada item (comportamento anterior).
+        conditions.append({"$gte": ["$$item.quantity", min_quantity]})
+    elif min_quantity is not None:
+        # Comparado na unidade base: "500 g" atende a um mínimo de 0.5 kg.
+        base, base_min, legacy = _min_quantity_thresholds(min_quantity, unit)
+        conditions.append(
+            {
+                "$or": [
+                    {
+                        "$and": [
+                            {"$eq": ["$$item.base_unit", base]},
+                            {"$gte": ["$$item.base_quantity", base_min]},
+                        ]
+                    },
+                    *(
+                        {
+                            "$and": [
+                                {
+                                    "$eq": [
+                                        {"$ifNull": ["$$item.base_quantity", None]},
+                                        None,
+                                    ]
+                                },
+                                {"$eq": ["$$item.unit", legacy_unit]},
+                                {"$gte": ["$$item.quantity", legacy_min]},
+                            ]
+                        }
+                        for legacy_unit, legacy_min in legacy
+                    ),
+                ]
+            }
+        )
+
+    return conditions
+
+
+def category_items_pipeline(
+    user_id: ObjectId,
+    array_field: str,
+    category_value: int,
+    name_prefix: str | None = None,
+    min_quantity: float | None = None,
+    unit: str | None = None,
+) -> list[Dict]:
+    """
+    Pipeline que devolve apenas a categoria pedida do documento do usuário,
+    recortada no servidor com $filter. O resultado distingue os dois casos de
+    erro sem uma segunda consulta: lista vazia quando o usuário não existe e
+    `array_field` vazio quando a categoria não existe.
+    """
+    categories = {
+        "$filter": {
+            "input": f"${array_field}",
+            "as": "category",
+            "cond": {"$eq": ["$$category.category_value", category_value]},
+        }
+    }
+
+    conditions = _item_conditions(name_prefix, min_quantity, unit)
+    if conditions:
+        categories = {
+            "$map": {
+                "input": categories,
+                "as": "category",
+                "in": {
+                    "$mergeObjects": [
+                        "$$category",
+                        {
+                            "items": {
+                                "$filter": {
+                                    "input": "$$category.items",
+                                    "as": "item",
+                                    "cond": {"$and": conditions},
+                                }
+                            }
+                        },
+                    ]
+                },
+            }
+        }
+
+    return [
+        {"$match": {"user_id": user_id}},
+        {"$limit": 1},
+        {"$project": {"_id": 0, array_field: categories}},
+    ]
+
+
+def item_conditions_query(
+    name_prefix: str | None, min_quantity: float | None, unit: str | None = None
+) -> Dict:
+    """Mesmas condições de _item_conditions, como filtro de find()."""
+    query = {}
+
+    if name_prefix:
+        query["item_name"] = {"$regex": f"^{re.escape(name_prefix)}", "$options": "i"}
+
+    if min_quantity is not None and unit is None:
+        query["quantity"] = {"$gte": min_quantity}
+    elif min_quantity is not None:
+        base, base_min, legacy = _min_quantity_thresholds(min_quantity, unit)
+        query["$or"] = [
+            {"base_unit": base, "base_quantity": {"$gte": base_min}},
+            *(
+                {
+                    "base_quantity": None,
+                    "unit": legacy_unit,
+                    "quantity": {"$gte": legacy_min},
+                }
+                for legacy_unit, legacy_min in legacy
+            ),
+        ]
+
+    return query
+
+
+def select_category_items(
+    categories: list[Dict],
+    category_value: int,
+    name_prefix: str | None = None,
+    min_quantity: float | None = None,
+    unit: str | None = None,
+) -> list[Dict]:
+    """Mesmo recorte de category_items_pipeline, feito sobre um documento em memória."""
+    prefix = name_prefix.casefold() if name_prefix else None
+    minimum = to_base(min_quantity, unit) if unit and min_quantity is not None else None
+
+    def has_minimum(item: Dict) -> bool:
+        if minimum is None:
+            return item["quantity"] >= min_quantity
+        quantity, base = item_base_quantity(item)
+        return base == minimum[1] and quantity >= minimum[0]
+
+    return [
+        {
+            **category,
+            "items": [
+                item
+                for item in category["items"]
+                if (prefix is None or item["item_name"].casefold().startswith(prefix))
+                and (min_quantity is None or has_minimum(item))
+            ],
+        }
+        for category in categories
+        if category["category_value"] == category_value
+    ]
+
+
+def cart_totals_pipeline(user_id: ObjectId, array_field: str) -> list[Dict]:
+    """
+    Subtotal (price × quantity) de cada categoria com itens e o total geral,
+    calculados no servidor em Decimal128. O $toDecimal também aceita preços
+    ainda gravados como string (documentos não migrados).
+    """
+    return [
+        {"$match": {"user_id": user_id}},
+        {"$limit": 1},
+        {
+            "$project": {
+                "_id": 0,
+                "categories": {
+                    "$map": {
+                        "input": {
+                            "$filter": {
+                                "input": f"${array_field}",
+                                "as": "category",
+                                "cond": {"$gt": [{"$size": "$$category.items"}, 0]},
+                            }
+                        },
+                        "as": "category",
+                        "in": {
+                            "category_value": "$$category.category_value",
+                            "category_name": "$$category.category_name",
+                            "items": {"$size": "$$category.items"},
+                            "subtotal": {
+                                "$toDecimal": {
+                                    "$sum": {
+                                        "$map": {
+                                            "input": "$$category.items",
+                                            "as": "item",
+                                            "in": {
+                                                "$multiply": [
+                                                    {"$toDecimal": "$$item.price"},
+                                                    "$$item.quantity",
+                                                ]
+                                            },
+                                        }
+                                    }
+                                }
+                            },
+                        },
+                    }
+                },
+            }
+        },
+        {"$set": {"total": {"$toDecimal": {"$sum": "$categories.subtotal"}}}},
+    ]
@@ -0,0 +1,175 @@
+import heapq
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, NamedTuple, Optional
+
+from models.connection_options.periodic_task import PeriodicTask
+from models.repository.collections import CollectionHandler
+
+
+def normalize_ingredient(name: str) -> str:
+    """Chave de comparação: sem acentos, minúscula e com espaços simples."""
+    decomposed = unicodedata.normalize("NFKD", name)
+    without_accents = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(without_accents.casefold().split())
+
+
+class IndexedRecipe(NamedTuple):
+    title: str
+    # Nome normalizado -> nome como foi cadastrado (usado em "missing").
+    ingredients: Dict[str, str]
+
+
+class RecipeIndex:
+    """
+    Índice invertido em memória: ingrediente normalizado -> ids das receitas
+    que o usam. A sugestão só visita as receitas que compartilham algum
+    ingrediente com a despensa, em vez de percorrer todas.
+
+    Cada worker mantém o seu índice, carregado no startup e atualizado pelas
+    rotas de escrita de receitas desse worker. Escritas feitas por outros
+    workers só aparecem no próximo refresh (ver RecipeIndexRefresher).
+    """
+
+    def __init__(self) -> None:
+        self.__postings: Dict[str, set[str]] = defaultdict(set)
+        self.__recipes: Dict[str, IndexedRecipe] = {}
+        # add/remove feitos enquanto um refresh lê o banco; None fora dele.
+        self.__pending: Optional[list[tuple[str, Optional[Dict]]]] = None
+
+    @classmethod
+    async def build(cls, collection_repository: CollectionHandler) -> "RecipeIndex":
+        index = cls()
+        documents = collection_repository.find_document_stream(
+            request_attribute={"title": 1, "ingredients.name": 1}
+        )
+        async for document in documents:
+            index.add(str(document["_id"]), document)
+        return index
+
+    async def refresh(self, collection_repository: CollectionHandler) -> None:
+        """
+        Recarrega o índice do banco; as sugestões usam o antigo até a troca.
+        As escritas locais feitas durante a leitura são reaplicadas no novo
+        índice, senão ele as perderia até o próximo refresh.
+        """
+        self.__pending = []
+        try:
+            fresh = await RecipeIndex.build(collection_repository)
+            # Replay e troca sem await no meio: nenhuma escrita fica de fora e
+            # nenhuma requisição vê um índice pela metade.
+            for recipe_id, recipe in self.__pending:
+                if recipe is None:
+                    fresh.remove(recipe_id)
+                else:
+                    fresh.add(recipe_id, recipe)
+            self.__postings, self.__recipes = fresh.__postings, fresh.__recipes
+        finally:
+            self.__pending = None
+
+    def __len__(self) -> int:
+        return len(self.__recipes)
+
+    def __contains__(self, recipe_id: str) -> bool:
+        return recipe_id in self.__recipes
+
+    def add(self, recipe_id: str, recipe: Dict) -> None:
+        """Indexa (ou reindexa) uma receita com "title" e "ingredients"."""
+        if self.__pending is not None:
+            self.__pending.append((recipe_id, recipe))
+        self.__discard(recipe_id)
+
+        ingredients = {
+            normalize_ingredient(ingredient["name"]): ingredient["name"]
+            for ingredient in recipe.get("ingredients", [])
+        }
+        self.__recipes[recipe_id] = IndexedRecipe(recipe.get("title", ""), ingredients)
+
+        for name in ingredients:
+            self.__postings[name].add(recipe_id)
+
+    def remove(self, recipe_id: str) -> None:
+        if self.__pending is not None:
+            self.__pending.append((recipe_id, None))
+        self.__discard(recipe_id)
+
+    def __discard(self, recipe_id: str) -> None:
+        recipe = self.__recipes.pop(recipe_id, None)
+        if recipe is None:
+            return
+
+        for name in recipe.ingredients:
+            postings = self.__postings[name]
+            postings.discard(recipe_id)
+            if not postings:
+                del self.__postings[name]
+
+    def suggest(
+        self, available: Iterable[str], limit: int = 10, min_coverage: float = 0.0
+    ) -> list[Dict]:
+        """
+        Receitas ordenadas pela fração dos ingredientes presentes em
+        `available` (nomes dos itens da despensa), depois pelo número de
+        ingredientes presentes.
+        """
+        available = {normalize_ingredient(name) for name in available}
+
+        matched: Counter = Counter()
+        for name in available:
+            for recipe_id in self.__postings.get(name, ()):
+                matched[recipe_id] += 1
+
+        def rank(recipe_id: str) -> tuple[float, int]:
+            return (
+                matched[recipe_id] / len(self.__recipes[recipe_id].ingredients),
+                matched[recipe_id],
+            )
+
+        candidates = (
+            recipe_id for recipe_id in matched if rank(recipe_id)[0] >= min_coverage
+        )
+
+        suggestions = []
+        for recipe_id in heapq.nlargest(limit, candidates, key=rank):
+            recipe = self.__recipes[recipe_id]
+            coverage, count = rank(recipe_id)
+            suggestions.append(
+                {
+                    "recipe_id": recipe_id,
+                    "title": recipe.title,
+                    "coverage": round(coverage, 4),
+                    "matched": count,
+                    "total": len(recipe.ingredients),
+                    "missing": [
+                        original
+                        for name, original in recipe.ingredients.items()
+                        if name not in available
+                    ],
+                }
+            )
+
+        return suggestions
+
+
+class RecipeIndexRefresher:
+    """Chama RecipeIndex.refresh a cada `interval` segundos."""
+
+    def __init__(
+        self,
+        index: RecipeIndex,
+        collection_repository: CollectionHandler,
+        interval: float = 60.0,
+    ) -> None:
+        self.index = index
+        self.collection_repository = collection_repository
+        # Se falhar, o índice anterior continua valendo até o próximo ciclo.
+        self.__periodic = PeriodicTask(self.refresh, interval, "Recipe index refresh")
+
+    async def refresh(self) -> None:
+        await self.index.refresh(self.collection_repository)
+
+    def start(self) -> None:
+        self.__periodic.start()
+
+    async def stop(self) -> None:
+        await self.__periodic.stop()
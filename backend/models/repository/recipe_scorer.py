@@ -0,0 +1,284 @@
+"""
+Ranking de receitas em lote com NumPy, para jobs noturnos que calculam as
+sugestões de todos os usuários de uma vez (a rota /api/recipes/suggest usa o
+índice invertido de recipe_index.py, que é melhor para um usuário só).
+
+As receitas viram uma matriz esparsa no formato CSR: `indptr` delimita, em
+`indices`, os ids de ingrediente de cada receita, e `required` guarda a
+quantidade pedida de cada um. Um lote de despensas vira uma matriz densa
+usuários × ingredientes com as quantidades disponíveis na unidade base (ver
+src/api/schema/units.py). Coverage, ingredientes faltando e suficiência de
+quantidade saem de um gather nessa matriz seguido de np.add.reduceat por
+receita, sem laço em Python.
+
+    python -m models.repository.recipe_scorer --top 10 --batch-size 256
+"""
+
+import argparse
+import asyncio
+import logging
+from typing import Dict, Iterable, NamedTuple
+
+import numpy as np
+
+from models.repository.recipe_index import normalize_ingredient
+from src.api.schema.units import item_base_quantity, to_base
+
+logger = logging.getLogger(__name__)
+
+
+class ScoreBatch(NamedTuple):
+    # Todas as matrizes são usuários × receitas.
+    coverage: np.ndarray
+    missing: np.ndarray
+    sufficient: np.ndarray
+
+
+class RecipeMatrix:
+    def __init__(self, recipes: Iterable[tuple[str, Dict]]) -> None:
+        # Presença compara só o nome; suficiência compara a quantidade na
+        # unidade base, então 500 g e 1 kg de farinha são somáveis, mas 2 un
+        # não atendem a 200 g.
+        self.vocabulary: Dict[str, int] = {}
+        self.quantity_vocabulary: Dict[tuple[str, str], int] = {}
+        self.recipe_ids: list[str] = []
+        self.titles: list[str] = []
+
+        indptr = [0]
+        indices: list[int] = []
+        quantity_indices: list[int] = []
+        required: list[float] = []
+
+        for recipe_id, recipe in recipes:
+            # Ingredientes repetidos na mesma receita somam a quantidade.
+            quantities: Dict[tuple[str, str], float] = {}
+            for ingredient in recipe.get("ingredients", []):
+                quantity, unit = to_base(
+                    float(ingredient.get("quantity", 0)), ingredient.get("unit", "un")
+                )
+                key = (normalize_ingredient(ingredient["name"]), unit)
+                quantities[key] = quantities.get(key, 0) + quantity
+
+            for (name, unit), quantity in quantities.items():
+                indices.append(self.vocabulary.setdefault(name, len(self.vocabulary)))
+                quantity_indices.append(
+                    self.quantity_vocabulary.setdefault(
+                        (name, unit), len(self.quantity_vocabulary)
+                    )
+                )
+                required.append(quantity)
+
+            self.recipe_ids.append(recipe_id)
+            self.titles.append(recipe.get("title", ""))
+            indptr.append(len(indices))
+
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.quantity_indices = np.asarray(quantity_indices, dtype=np.int64)
+        self.required = np.asarray(required, dtype=np.float32)
+        self.lengths = np.diff(self.indptr)
+
+    def __len__(self) -> int:
+        return len(self.recipe_ids)
+
+    def encode_pantries(
+        self, pantries: list[list[Dict]]
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Duas matrizes por usuário: presença de cada ingrediente conhecido e
+        quantidade disponível (na unidade base) de cada par ingrediente/unidade.
+        Itens que nenhuma receita usa são ignorados.
+        """
+        present = np.zeros((len(pantries), len(self.vocabulary)), dtype=bool)
+        available = np.zeros(
+            (len(pantries), len(self.quantity_vocabulary)), dtype=np.float32
+        )
+
+        rows, columns, quantities = [], [], []
+        for row, items in enumerate(pantries):
+            for item in items:
+                name = normalize_ingredient(item["item_name"])
+                ingredient_id = self.vocabulary.get(name)
+                if ingredient_id is None:
+                    continue
+
+                quantity, unit = item_base_quantity(item)
+                if quantity > 0:
+                    present[row, ingredient_id] = True
+
+                quantity_id = self.quantity_vocabulary.get((name, unit))
+                if quantity_id is not None:
+                    rows.append(row)
+                    columns.append(quantity_id)
+                    quantities.append(quantity)
+
+        # np.add.at soma itens repetidos na mesma despensa.
+        if rows:
+            np.add.at(available, (rows, columns), quantities)
+        return present, available
+
+    def _per_recipe(self, flags: np.ndarray) -> np.ndarray:
+        # Conta os True de `flags` (usuários × nnz) dentro de cada receita. O
+        # reduceat não aceita fatias vazias: receitas sem ingredientes ficam com zero.
+        totals = np.zeros((flags.shape[0], len(self)), dtype=np.int32)
+        non_empty = self.lengths > 0
+        if flags.shape[1]:
+            totals[:, non_empty] = np.add.reduceat(
+                flags, self.indptr[:-1][non_empty], axis=1, dtype=np.int32
+            )
+        return totals
+
+    def score(self, pantries: list[list[Dict]]) -> ScoreBatch:
+        """Pontua um lote de despensas (listas de itens) contra todas as receitas."""
+        present, available = self.encode_pantries(pantries)
+
+        matched = self._per_recipe(present[:, self.indices])
+        enough = self._per_recipe(available[:, self.quantity_indices] >= self.required)
+
+        lengths = np.maximum(self.lengths, 1)
+        return ScoreBatch(
+            coverage=matched / lengths,
+            missing=self.lengths - matched,
+            sufficient=enough / lengths,
+        )
+
+    def top(self, batch: ScoreBatch, limit: int = 10) -> list[list[Dict]]:
+        """As `limit` melhores receitas de cada usuário (coverage, depois suficiência)."""
+        limit = min(limit, len(self))
+        if limit == 0:
+            return [[] for _ in range(batch.coverage.shape[0])]
+
+        # Chave única: coverage domina; a suficiência só desempata.
+        key = batch.coverage + batch.sufficient * 1e-3
+        candidates = np.argpartition(-key, limit - 1, axis=1)[:, :limit]
+
+        rankings = []
+        for row, columns in enumerate(candidates):
+            columns = columns[np.argsort(-key[row, columns], kind="stable")]
+            rankings.append(
+                [
+                    {
+                        "recipe_id": self.recipe_ids[column],
+                        "title": self.titles[column],
+                        "coverage": round(float(batch.coverage[row, column]), 4),
+                        "missing": int(batch.missing[row, column]),
+                        "sufficient": round(float(batch.sufficient[row, column]), 4),
+                    }
+                    for column in columns
+                    if batch.coverage[row, column] > 0
+                ]
+            )
+        return rankings
+
+
+def naive_score(
+    recipes: list[tuple[str, Dict]], items: list[Dict]
+) -> list[tuple[float, int, float]]:
+    """Versão com laços em Python, usada como referência no benchmark."""
+    present: set[str] = set()
+    available: Dict[tuple[str, str], float] = {}
+    for item in items:
+        name = normalize_ingredient(item["item_name"])
+        quantity, unit = item_base_quantity(item)
+        if quantity > 0:
+            present.add(name)
+        available[name, unit] = available.get((name, unit), 0) + quantity
+
+    scores = []
+    for _, recipe in recipes:
+        required: Dict[tuple[str, str], float] = {}
+        for ingredient in recipe.get("ingredients", []):
+            quantity, unit = to_base(
+                float(ingredient.get("quantity", 0)), ingredient.get("unit", "un")
+            )
+            key = (normalize_ingredient(ingredient["name"]), unit)
+            required[key] = required.get(key, 0) + quantity
+
+        matched = sum(1 for name, _ in required if name in present)
+        enough = sum(
+            1 for key, quantity in required.items() if available.get(key, 0) >= quantity
+        )
+        total = max(len(required), 1)
+        scores.append((matched / total, len(required) - matched, enough / total))
+    return scores
+
+
+async def _main(top: int, batch_size: int) -> None:
+    from pymongo import UpdateOne
+
+    from models.connection_options.connections import DBConnectionHandler
+    from models.connection_options.mongo_db_config import mongo_db_infos
+    from models.repository.collections import CollectionHandler
+    from src.api.dependencies import get_pantry_store
+
+    collections = mongo_db_infos["COLLECTIONS"]
+    db_handler = DBConnectionHandler()
+    db_handler.connect_to_db(mongo_db_infos["DB_NAME"])
+    db_connection = db_handler.get_db_connection()
+
+    def repository(key: str, **kwargs) -> CollectionHandler:
+        return CollectionHandler(db_connection, collections[key], **kwargs)
+
+    suggestions = repository("collection_recipe_suggestions")
+
+    async def save(user_ids: list, pantries: list[list[Dict]]) -> None:
+        rankings = matrix.top(matrix.score(pantries), limit=top)
+        await suggestions.bulk_write(
+            [
+                UpdateOne(
+                    {"user_id": user_id},
+                    {"$set": {"user_id": user_id, "recipes": ranking}},
+                    upsert=True,
+                )
+                for user_id, ranking in zip(user_ids, rankings)
+            ]
+        )
+
+    try:
+        recipes = [
+            (str(document["_id"]), document)
+            async for document in repository("collection_recipes").find_document_stream(
+                request_attribute={"title": 1, "ingredients": 1}
+            )
+        ]
+        matrix = RecipeMatrix(recipes)
+        logger.info("%d receitas, %d ingredientes", len(matrix), len(matrix.vocabulary))
+
+        pantry_store = get_pantry_store(
+            repository("collection_pantry", versioned=True),
+            repository("collection_pantry_items"),
+        )
+
+        user_ids, pantries, scored = [], [], 0
+        async for document in pantry_store.stream():
+            user_ids.append(document["user_id"])
+            pantries.append(
+                [item for category in document["pantry"] for item in category["items"]]
+            )
+            if len(pantries) == batch_size:
+                await save(user_ids, pantries)
+                scored += len(pantries)
+                user_ids, pantries = [], []
+                logger.info("%d usuários pontuados", scored)
+
+        if pantries:
+            await save(user_ids, pantries)
+            scored += len(pantries)
+
+        print(f"Sugestões gravadas para {scored} usuários")
+    finally:
+        db_handler.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(
+        description="Calcula as sugestões de receitas de todos os usuários."
+    )
+    parser.add_argument("--top", type=int, default=10)
+    # Memória por lote ~ usuários × total de ingredientes das receitas.
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+
+    asyncio.run(_main(args.top, args.batch_size))
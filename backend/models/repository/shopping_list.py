@@ -0,0 +1,183 @@
+import math
+from typing import Dict, Iterable, NamedTuple
+
+from bson import Decimal128, ObjectId
+
+from models.repository.item_stores import ItemUpdate
+from models.repository.recipe_index import normalize_ingredient
+from src.api.schema.units import convert, item_base_quantity, to_base
+
+# (nome normalizado, unidade base): a chave de todas as somas abaixo.
+Key = tuple[str, str]
+
+
+class Needed(NamedTuple):
+    quantity: float
+    # Nome, unidade e categoria do primeiro ingrediente visto com essa chave.
+    name: str
+    unit: str
+    category_value: int
+
+
+def required_ingredients(recipes: Iterable[tuple[Dict, float]]) -> Dict[Key, Needed]:
+    """Soma, na unidade base, os ingredientes de (receita, fator de porções)."""
+    required: Dict[Key, Needed] = {}
+
+    for recipe, factor in recipes:
+        for ingredient in recipe.get("ingredients", []):
+            quantity, base = to_base(
+                ingredient["quantity"] * factor, ingredient["unit"]
+            )
+            key = (normalize_ingredient(ingredient["name"]), base)
+
+            needed = required.get(key)
+            if needed is None:
+                required[key] = Needed(
+                    quantity,
+                    ingredient["name"],
+                    ingredient["unit"],
+                    ingredient["category_value"],
+                )
+            else:
+                required[key] = needed._replace(quantity=needed.quantity + quantity)
+
+    return required
+
+
+def available_quantities(items: Iterable[Dict]) -> Dict[Key, float]:
+    """Quantidade na unidade base de cada item (despensa ou carrinho)."""
+    available: Dict[Key, float] = {}
+    for item in items:
+        quantity, base = item_base_quantity(item)
+        key = (normalize_ingredient(item["item_name"]), base)
+        available[key] = available.get(key, 0) + quantity
+    return available
+
+
+def shortfall(
+    required: Dict[Key, Needed], *available: Dict[Key, float]
+) -> Dict[int, list[Dict]]:
+    """
+    Itens de carrinho com o que falta de cada ingrediente, agrupados por
+    categoria. Uma passada por `required` com lookups nos dicts de
+    `available`: O(ingredientes + itens), sem laços aninhados.
+    """
+    missing: Dict[int, list[Dict]] = {}
+
+    for key, needed in required.items():
+        remaining = needed.quantity - sum(source.get(key, 0) for source in available)
+        if remaining <= 0:
+            continue
+
+        # Devolve na unidade da receita; unidades inteiras arredondam para cima.
+        quantity = convert(remaining, key[1], needed.unit)
+        quantity = math.ceil(quantity) if needed.unit == "un" else round(quantity, 3)
+
+        quantity_base, base = to_base(quantity, needed.unit)
+        missing.setdefault(needed.category_value, []).append(
+            {
+                # str como nos demais caminhos de escrita: as rotas filtram por str.
+                "item_id": str(ObjectId()),
+                "item_name": needed.name,
+                "quantity": quantity,
+                "unit": needed.unit,
+                "base_quantity": quantity_base,
+                "base_unit": base,
+                # O preço fica para o usuário preencher na compra.
+                "price": Decimal128("0.00"),
+            }
+        )
+
+    return missing
+
+
+def push_by_category(
+    array_field: str, items_by_category: Dict[int, list[Dict]]
+) -> tuple[Dict, list[Dict]]:
+    """
+    Update único que faz $push/$each em várias categorias: cada uma tem o
+    seu identificador nos arrayFilters ($[c101], $[c105], ...).
+    """
+    # int(): o identificador do arrayFilter precisa do número, não do enum.
+    categories = {int(value): items for value, items in items_by_category.items()}
+    request_attribute = {
+        "$push": {
+            f"{array_field}.$[c{category_value}].items": {"$each": items}
+            for category_value, items in categories.items()
+        }
+    }
+    array_filters = [
+        {f"c{category_value}.category_value": category_value}
+        for category_value in categories
+    ]
+    return request_attribute, array_filters
+
+
+def merge_into_pantry(
+    pantry_categories: list[Dict], purchased: Iterable[tuple[int, Dict]]
+) -> tuple[list[ItemUpdate], list[tuple[int, Dict]]]:
+    """
+    Soma os itens comprados (category_value, item do carrinho) aos itens da
+    despensa com o mesmo nome e unidade base; os demais viram itens novos na
+    categoria em que estavam no carrinho. Compras repetidas do mesmo item são
+    somadas entre si. O(itens da despensa + itens comprados).
+    """
+    existing: Dict[Key, tuple[int, Dict]] = {}
+    for category in pantry_categories:
+        for item in category["items"]:
+            quantity, base = item_base_quantity(item)
+            key = (normalize_ingredient(item["item_name"]), base)
+            existing.setdefault(
+                key,
+                (
+                    category["category_value"],
+                    {**item, "base_quantity": quantity, "base_unit": base},
+                ),
+            )
+
+    changed: Dict[Key, tuple[int, Dict]] = {}
+    added: Dict[Key, tuple[int, Dict]] = {}
+
+    for category_value, item in purchased:
+        quantity, base = item_base_quantity(item)
+        key = (normalize_ingredient(item["item_name"]), base)
+
+        target = existing.get(key)
+        if target is not None:
+            changed[key] = target
+        else:
+            target = added.get(key)
+
+        if target is None:
+            added[key] = (
+                category_value,
+                {
+                    # str como nos demais caminhos de escrita: as rotas filtram por str.
+                    "item_id": str(ObjectId()),
+                    "item_name": item["item_name"],
+                    "quantity": item["quantity"],
+                    "unit": item["unit"],
+                    "base_quantity": quantity,
+                    "base_unit": base,
+                },
+            )
+            continue
+
+        # A quantidade continua na unidade em que o item já estava.
+        merged = target[1]
+        merged["base_quantity"] += quantity
+        merged["quantity"] = convert(merged["base_quantity"], base, merged["unit"])
+
+    updates = [
+        ItemUpdate(
+            category_value,
+            item["item_id"],
+            {
+                "quantity": item["quantity"],
+                "base_quantity": item["base_quantity"],
+                "base_unit": item["base_unit"],
+            },
+        )
+        for category_value, item in changed.values()
+    ]
+    return updates, list(added.values())
@@ -0,0 +1,117 @@
+from typing import Annotated
+
+from bson import ObjectId
+from fastapi import Depends, HTTPException, Query, Request, status
+
+from models.connection_options.connections import DBConnectionHandler
+from models.connection_options.mongo_db_config import mongo_db_infos, storage_options
+from models.repository.collections import CollectionHandler
+from models.repository.item_stores import EmbeddedItemStore, SeparateItemStore
+from models.repository.recipe_index import RecipeIndex
+from src.api.schema.default_answer import DefaultAnswer, StatusMsg
+
+
+def get_db_handler(request: Request) -> DBConnectionHandler:
+    # O cliente é criado uma única vez no lifespan da app (ver main.py).
+    return request.app.state.db_handler
+
+
+def collection_dependency(collection_key: str, versioned: bool = False):
+    collection = mongo_db_infos["COLLECTIONS"][collection_key]
+
+    def get_collection_repository(
+        request: Request,
+        db_handler: Annotated[DBConnectionHandler, Depends(get_db_handler)],
+    ) -> CollectionHandler:
+        return CollectionHandler(
+            db_handler.get_db_connection(),
+            collection,
+            cache=request.app.state.caches.get(collection),
+            versioned=versioned,
+        )
+
+    return get_collection_repository
+
+
+DBHandler = Annotated[DBConnectionHandler, Depends(get_db_handler)]
+
+UsersRepository = Annotated[
+    CollectionHandler, Depends(collection_dependency("collection_users"))
+]
+PantryRepository = Annotated[
+    CollectionHandler,
+    Depends(collection_dependency("collection_pantry", versioned=True)),
+]
+ShoppingCartRepository = Annotated[
+    CollectionHandler,
+    Depends(collection_dependency("collection_shopping_cart", versioned=True)),
+]
+RecipesRepository = Annotated[
+    CollectionHandler, Depends(collection_dependency("collection_recipes"))
+]
+PantryItemsRepository = Annotated[
+    CollectionHandler, Depends(collection_dependency("collection_pantry_items"))
+]
+
+
+def get_pantry_store(
+    pantry_repository: PantryRepository, items_repository: PantryItemsRepository
+) -> EmbeddedItemStore:
+    # O layout é escolhido na configuração; as rotas não dependem dele.
+    if storage_options["PANTRY_LAYOUT"] == "items":
+        return SeparateItemStore(pantry_repository, items_repository, "pantry")
+    return EmbeddedItemStore(pantry_repository, "pantry")
+
+
+PantryStore = Annotated[EmbeddedItemStore, Depends(get_pantry_store)]
+
+
+def get_shopping_cart_store(
+    shopping_cart_repository: ShoppingCartRepository,
+) -> EmbeddedItemStore:
+    # O carrinho usa sempre o layout embutido, com o mesmo caminho de escrita.
+    return EmbeddedItemStore(shopping_cart_repository, "shoppingCart")
+
+
+ShoppingCartStore = Annotated[EmbeddedItemStore, Depends(get_shopping_cart_store)]
+
+
+def get_recipe_index(request: Request) -> RecipeIndex:
+    # Carregado no lifespan da app (ver main.py).
+    return request.app.state.recipe_index
+
+
+RecipeIndexDep = Annotated[RecipeIndex, Depends(get_recipe_index)]
+
+
+class PageParams:
+    """Parâmetros de paginação por cursor usados pelas rotas de listagem."""
+
+    def __init__(
+        self,
+        limit: Annotated[
+            int, Query(ge=1, le=1000, description="Maximum documents per page")
+        ] = 100,
+        after: Annotated[
+            str | None,
+            Query(description="Cursor returned as next_cursor by the previous page"),
+        ] = None,
+        stream: Annotated[
+            bool,
+            Query(description="Stream every document as NDJSON instead of paging"),
+        ] = False,
+    ):
+        if after is not None and not ObjectId.is_valid(after):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=DefaultAnswer(
+                    status=StatusMsg.FAIL, msg="Invalid cursor"
+                ).model_dump(),
+            )
+
+        self.limit = limit
+        self.after = ObjectId(after) if after is not None else None
+        self.stream = stream
+
+
+Pagination = Annotated[PageParams, Depends()]
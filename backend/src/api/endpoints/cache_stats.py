@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Request, status
+
+from src.api.responses import answer_response
+from src.api.schema.default_answer import DefaultAnswer, StatusMsg
+
+router = APIRouter()
+
+
+@router.get("/", response_model=DefaultAnswer, status_code=status.HTTP_200_OK)
+async def read_cache_stats(request: Request):
+    caches = request.app.state.caches
+
+    data = [
+        {"collection": collection, **cache.stats()}
+        for collection, cache in caches.items()
+    ]
+
+    msg = "Cache enabled" if caches else "Cache disabled"
+
+    return answer_response(StatusMsg.SUCCESS, msg, data=data)
@@ -1,5 +1,6 @@
 from fastapi import APIRouter
 
+from src.api.dependencies import PantryStore, ShoppingCartRepository, UsersRepository
 from src.api.endpoints.pantry import delete_db_pantry
 from src.api.endpoints.shopping_cart import delete_db_shopping_cart
 from src.api.endpoints.users import delete_all_users
@@ -8,7 +9,11 @@ router = APIRouter()
 
 
 @router.delete("/")
-async def delete_all_users_route():
-    await delete_db_pantry()
-    await delete_db_shopping_cart()
-    await delete_all_users()
+async def delete_all_users_route(
+    users_repository: UsersRepository,
+    pantry_store: PantryStore,
+    shopping_cart_repository: ShoppingCartRepository,
+):
+    await delete_db_pantry(pantry_store)
+    await delete_db_shopping_cart(shopping_cart_repository)
+    await delete_all_users(users_repository)
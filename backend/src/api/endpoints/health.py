@@ -0,0 +1,28 @@
+from fastapi import APIRouter, HTTPException, Request, status
+
+from src.api.responses import answer_response
+from src.api.schema.default_answer import DefaultAnswer, StatusMsg
+
+router = APIRouter()
+
+
+@router.get("/live", response_model=DefaultAnswer, status_code=status.HTTP_200_OK)
+async def read_liveness():
+    # Só indica que o processo responde; a conexão com o banco fica no /ready.
+    return answer_response(StatusMsg.SUCCESS, "Alive")
+
+
+@router.get("/ready", response_model=DefaultAnswer, status_code=status.HTTP_200_OK)
+async def read_readiness(request: Request):
+    # Resultado em cache do DBHealthMonitor: o probe nunca consulta o banco.
+    snapshot = request.app.state.health.snapshot()
+
+    if not snapshot["ready"]:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=DefaultAnswer(
+                status=StatusMsg.FAIL, msg="Database unavailable", data=[snapshot]
+            ).model_dump(),
+        )
+
+    return answer_response(StatusMsg.SUCCESS, "Ready", data=[snapshot])
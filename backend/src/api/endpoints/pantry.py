@@ -2,49 +2,52 @@ from pprint import pp
 from typing import Annotated
 
 from bson import ObjectId
-from fastapi import APIRouter, HTTPException, Path, Query, status
+from fastapi import APIRouter, Header, HTTPException, Path, Query, status
 from httpx import request
 
-from models.connection_options.connections import DBConnectionHandler
-from models.connection_options.mongo_db_config import mongo_db_infos
 from models.repository.collections import CollectionHandler
-from src.api.schema.default_answer import DefaultAnswer, StatusMsg
-from src.api.schema.pantry import CategoryValue, ItemsIn, ItemsOut
+from models.repository.item_stores import EmbeddedItemStore
+from src.api.dependencies import Pagination, PantryStore
+from src.api.responses import (
+    answer_response,
+    etag_matches,
+    ndjson_response,
+    not_modified_response,
+    version_etag,
+)
+from src.api.schema.categories import Units, new_categories
+from src.api.schema.default_answer import DefaultAnswer, PaginatedAnswer, StatusMsg
+from src.api.schema.pantry import (
+    BulkItemsIn,
+    CategoryValue,
+    ItemsIn,
+    ItemsInUpdate,
+    ItemsOut,
+)
+from src.api.schema.units import with_base_quantity
 
 router = APIRouter()
 
 
-db_handler = DBConnectionHandler()
-db_handler.connect_to_db(mongo_db_infos["DB_NAME"])
-db_connection = db_handler.get_db_connection()
-
-collection_repository = CollectionHandler(
-    db_connection, mongo_db_infos["COLLECTIONS"]["collection_pantry"]  # type: ignore
-)
-
-
 # TODO: Obtém a despensa de todos os usuários, não sei se faz sentido ter essa rota.
-@router.get("/", response_model=DefaultAnswer, status_code=status.HTTP_200_OK)
-async def read_pantry():
+@router.get("/", response_model=PaginatedAnswer, status_code=status.HTTP_200_OK)
+async def read_pantry(pantry_store: PantryStore, pagination: Pagination):
 
-    request_attribute = {"_id": 0}
+    if pagination.stream:
+        return ndjson_response(pantry_store.stream())
 
-    data = await collection_repository.find_document(
-        request_attribute=request_attribute
+    data, next_cursor = await pantry_store.read_page(
+        limit=pagination.limit, after=pagination.after
     )
 
-    # Iterar sobre cada dicionário na lista de dados
-    for user in data:
-        # Verificar se o atributo user_id está presente e é um ObjectId
-        if "user_id" in user and isinstance(user["user_id"], ObjectId):
-            # Converter ObjectId para str e atribuir de volta ao atributo user_id
-            user["user_id"] = str(user["user_id"])
-
     if not data:
         response = DefaultAnswer(status="fail", msg="Pantry not found").model_dump()
         raise HTTPException(status_code=404, detail=response)
 
-    return DefaultAnswer(status="success", msg="Pantry found", data=data)
+    # O ObjectId de user_id é convertido pelo MongoJSONResponse.
+    return answer_response(
+        StatusMsg.SUCCESS, "Pantry found", data=data, next_cursor=next_cursor
+    )
 
 
 # Obter todas as categorias da despensa:
@@ -57,7 +60,9 @@ async def read_user_pantry(
             description="The unique identifier for the item, represented as a MongoDB ObjectId",
             regex=r"^[a-fA-F0-9]{24}$",
         ),
-    ]
+    ],
+    pantry_store: PantryStore,
+    if_none_match: Annotated[str | None, Header()] = None,
 ):
 
     if not ObjectId.is_valid(user_id):
@@ -68,31 +73,58 @@ async def read_user_pantry(
             ).model_dump(),
         )
 
-    filter_document = {"user_id": ObjectId(user_id)}
-    request_attribute = {"_id": 0, "password": 0}
+    # Revalidação: compara só a versão (projeção ou cache) antes de buscar a despensa.
+    if if_none_match is not None:
+        version = await pantry_store.repository.find_version_by_user(ObjectId(user_id))
 
-    data = await collection_repository.find_document_one(
-        filter_document, request_attribute
-    )
+        if version is not None and etag_matches(if_none_match, version_etag(version)):
+            return not_modified_response(version_etag(version))
 
-    if not data:
+    document = await pantry_store.read(ObjectId(user_id))
+
+    if document is None:
         raise HTTPException(
             status_code=404,
             detail=DefaultAnswer(
                 status=StatusMsg.FAIL, msg="Pantry not found"
             ).model_dump(),
         )
-    else:
-        data[0]["user_id"] = str(data[0]["user_id"])
 
-    return DefaultAnswer(status=StatusMsg.SUCCESS, msg="Pantry found", data=data)
+    return answer_response(
+        StatusMsg.SUCCESS,
+        "Pantry found",
+        data=[document],
+        headers={"ETag": version_etag(document.get("version", 0))},
+    )
 
 
 # Obter todos os itens de uma categoria específica:
 @router.get(
     "/category/{user_id}", response_model=DefaultAnswer, status_code=status.HTTP_200_OK
 )
-async def all_items_specific_category(user_id: str, category_value: CategoryValue):
+async def all_items_specific_category(
+    user_id: str,
+    category_value: CategoryValue,
+    pantry_store: PantryStore,
+    name_prefix: Annotated[
+        str | None,
+        Query(
+            min_length=1,
+            max_length=15,
+            description="Only items whose name starts with this (case-insensitive)",
+        ),
+    ] = None,
+    min_quantity: Annotated[
+        float | None, Query(ge=0, description="Only items with at least this quantity")
+    ] = None,
+    unit: Annotated[
+        Units | None,
+        Query(
+            description="Unit of min_quantity, compared on base quantities "
+            "(default: each item's own unit)"
+        ),
+    ] = None,
+):
 
     if not ObjectId.is_valid(user_id):
         raise HTTPException(
@@ -102,18 +134,11 @@ async def all_items_specific_category(user_id: str, category_value: CategoryValu
             ).model_dump(),
         )
 
-    filter_document = {
-        "user_id": ObjectId(user_id),
-        "pantry.category_value": category_value,
-    }
-
-    request_attribute = {"_id": 0, "pantry.$": 1}
-
-    # Verifica se o usuário existe
-    existing_user = await collection_repository.find_document_one(
-        {"user_id": ObjectId(user_id)}
+    result_find = await pantry_store.read_category(
+        ObjectId(user_id), category_value, name_prefix, min_quantity, unit
     )
-    if not existing_user:
+
+    if not result_find:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=DefaultAnswer(
@@ -121,11 +146,7 @@ async def all_items_specific_category(user_id: str, category_value: CategoryValu
             ).model_dump(),
         )
 
-    result_find = await collection_repository.find_document_one(
-        filter_document, request_attribute
-    )
-
-    if not result_find:
+    if not result_find[0]["pantry"]:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=DefaultAnswer(
@@ -133,9 +154,7 @@ async def all_items_specific_category(user_id: str, category_value: CategoryValu
             ).model_dump(),
         )
 
-    return DefaultAnswer(
-        status=StatusMsg.SUCCESS, msg="Pantry Items Found", data=result_find
-    )
+    return answer_response(StatusMsg.SUCCESS, "Pantry Items Found", data=result_find)
 
 
 # Adicionar um novo item a uma categoria:
@@ -151,6 +170,7 @@ async def create_items(
         Path(description="List of food category values, is a 3-digit integer value"),
     ],
     data_items: ItemsIn,
+    pantry_store: PantryStore,
 ):
     """
     **List of food category values**\n
@@ -180,12 +200,15 @@ async def create_items(
             ).model_dump(),
         )
 
-    result_find = await collection_repository.find_document_one(
-        filter_document={"user_id": ObjectId(user_id)},
-        request_attribute={"_id": 0, "password": 0},
+    # TODO O ID aqui é bom usar o ObjectID mesmo ou usa um incremental?
+    item_id = ObjectId()
+    data = ItemsOut(item_id=item_id, **data_items.model_dump())
+
+    failed_items = await pantry_store.add_items(
+        ObjectId(user_id), [(category_value, with_base_quantity(data.model_dump()))]
     )
 
-    if not result_find:
+    if failed_items is None:
         raise HTTPException(
             status_code=404,
             detail=DefaultAnswer(
@@ -193,31 +216,76 @@ async def create_items(
             ).model_dump(),
         )
 
-    # TODO O ID aqui é bom usar o ObjectID mesmo ou usa um incremental?
-    item_id = ObjectId()
-    data = ItemsOut(item_id=item_id, **data_items.model_dump())
+    if failed_items:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=DefaultAnswer(
+                status=StatusMsg.FAIL, msg="The item could not be added"
+            ).model_dump(),
+        )
 
-    request_attribute = {"$addToSet": {"pantry.$.items": data.model_dump()}}
+    return DefaultAnswer(
+        status=StatusMsg.SUCCESS, msg="The item was successfully added"
+    )
 
-    filter_document = {
-        "user_id": ObjectId(user_id),
-        "pantry.category_value": category_value,
-    }
 
-    update_result = await collection_repository.update_document(
-        filter_document, request_attribute
-    )
+# Adicionar vários itens, de várias categorias, em um único round trip:
+@router.post(
+    "/{user_id}/items/bulk",
+    response_model=DefaultAnswer,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_items_bulk(
+    user_id: str,
+    data_items: BulkItemsIn,
+    pantry_store: PantryStore,
+):
+
+    if not ObjectId.is_valid(user_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=DefaultAnswer(
+                status=StatusMsg.FAIL, msg="Invalid user ID"
+            ).model_dump(),
+        )
+
+    items = []
+    results = []
+
+    for item in data_items.items:
+        item_dict = item.model_dump(exclude={"category_value"})
+
+        data = with_base_quantity(
+            ItemsOut(item_id=ObjectId(), **item_dict).model_dump()
+        )
+
+        items.append((item.category_value, data))
+        results.append(
+            {
+                "item_id": data["item_id"],
+                "item_name": data["item_name"],
+                "category_value": item.category_value,
+            }
+        )
+
+    failed_items = await pantry_store.add_items(ObjectId(user_id), items)
 
-    if update_result.matched_count == 0:
+    if failed_items is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=DefaultAnswer(
-                status=StatusMsg.FAIL, msg="User or category not found"
+                status=StatusMsg.FAIL, msg="Pantry not found"
             ).model_dump(),
         )
 
-    return DefaultAnswer(
-        status=StatusMsg.SUCCESS, msg="The item was successfully added"
+    for index, result in enumerate(results):
+        result["status"] = "failed" if index in failed_items else "created"
+
+    return answer_response(
+        StatusMsg.SUCCESS,
+        "The items were processed",
+        data=results,
+        status_code=status.HTTP_201_CREATED,
     )
 
 
@@ -225,7 +293,12 @@ async def create_items(
 @router.delete(
     "/{item_id}", response_model=DefaultAnswer, status_code=status.HTTP_200_OK
 )
-async def delete_item(user_id: str, item_id: str, category_value: CategoryValue):
+async def delete_item(
+    user_id: str,
+    item_id: str,
+    category_value: CategoryValue,
+    pantry_store: PantryStore,
+):
 
     if not ObjectId.is_valid(item_id):
         raise HTTPException(
@@ -235,26 +308,9 @@ async def delete_item(user_id: str, item_id: str, category_value: CategoryValue)
             ).model_dump(),
         )
 
-    filter_document = {
-        "user_id": ObjectId(user_id),
-        "pantry.category_value": category_value,
-        "pantry.items.item_id": item_id,
-    }
+    deleted = await pantry_store.delete_item(ObjectId(user_id), category_value, item_id)
 
-    request_attribute = {"$pull": {"pantry.$[element].items": {"item_id": item_id}}}
-
-    # array_filters = [{"category.category_value": category_value}]
-    array_filters = [{"element.category_value": category_value}]
-
-    # Atualiza o documento removendo o item com o item_id especificado
-    update_result = await collection_repository.update_document(
-        filter_document=filter_document,  # Localiza o item
-        request_attribute=request_attribute,  # Aplica a ação [remover o item]
-        array_filters=array_filters,  # Condição
-        # O operador posicional $[<identifier>] irá atuar como um espaço reservado para todos os elementos do campo selecionado que correspondem às condições que foram especificadas no arrayFiltros.
-    )
-
-    if update_result.modified_count == 0:
+    if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=DefaultAnswer(
@@ -265,7 +321,6 @@ async def delete_item(user_id: str, item_id: str, category_value: CategoryValue)
     return DefaultAnswer(status=StatusMsg.SUCCESS, msg="Item deleted successfully")
 
 
-# TODO: Acabou que eu fiz uma rota em que ele adiciona um novo item após remover o id informado uma tentativa de update, mas acaba que se não houver o item a ser removido ele adiciona mesmo assim, e então uso essa rota, tanto para criar quanto para atualizar ou deixo assim porque tecnicamente eu agora tenho duas rotas iguais.
 @router.put(
     "/{user_id}/category_value/{category_value}",
     response_model=DefaultAnswer,
@@ -276,6 +331,7 @@ async def Updates_pantry_item(
     item_id: str,
     category_value: CategoryValue,
     data_items_update: ItemsIn,
+    pantry_store: PantryStore,
 ):
 
     if not ObjectId.is_valid(user_id):
@@ -286,53 +342,100 @@ async def Updates_pantry_item(
             ).model_dump(),
         )
 
-    filter_document_pull = {
-        "user_id": ObjectId(user_id),
-        "pantry.category_value": category_value,
-        "pantry.items.item_id": item_id,
-    }
-
-    # Remover o item
-    request_pull = {"$pull": {"pantry.$[element].items": {"item_id": item_id}}}
-
-    array_filters_pull = [
-        {"element.category_value": category_value},
-    ]
-
-    # Executar a remoção do item
-    pull_result = await collection_repository.update_document(
-        filter_document=filter_document_pull,
-        request_attribute=request_pull,
-        array_filters=array_filters_pull,
+    update_result = await pantry_store.replace_item(
+        ObjectId(user_id),
+        category_value,
+        item_id,
+        with_base_quantity(data_items_update.model_dump()),
     )
 
-    if pull_result.modified_count == 0:
+    if update_result.matched == 0:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=DefaultAnswer(
+                status=StatusMsg.FAIL, msg="The item was not found"
+            ).model_dump(),
+        )
+
+    if update_result.modified == 0:
         raise HTTPException(
             status_code=status.HTTP_304_NOT_MODIFIED,
             detail=DefaultAnswer(
-                status=StatusMsg.FAIL,
-                msg="The item was not found or was not removed",
+                status=StatusMsg.FAIL, msg="Item not modified"
             ).model_dump(),
         )
 
-    filter_document_addtoset = {
-        "user_id": ObjectId(user_id),
-        "pantry.category_value": category_value,
-    }
+    return DefaultAnswer(
+        status=StatusMsg.SUCCESS, msg="Item updated successfully"
+    ).model_dump()
 
-    # adiciona o item atualizado
-    request_push = {
-        "$addToSet": {
-            "pantry.$.items": {"item_id": item_id, **data_items_update.model_dump()}
-        }
-    }
 
-    # Executar a adição do item atualizado
-    addtoset_result = await collection_repository.update_document(
-        filter_document=filter_document_addtoset, request_attribute=request_push
+@router.patch(
+    "/{user_id}/category_value/{category_value}",
+    response_model=DefaultAnswer,
+    status_code=status.HTTP_200_OK,
+)
+async def Partially_updates_pantry_item(
+    user_id: str,
+    item_id: str,
+    category_value: CategoryValue,
+    data_items_update: ItemsInUpdate,
+    pantry_store: PantryStore,
+):
+
+    if not ObjectId.is_valid(user_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=DefaultAnswer(
+                status=StatusMsg.FAIL, msg="Invalid user ID"
+            ).model_dump(),
+        )
+
+    # Somente os campos enviados são alterados.
+    fields_update = data_items_update.model_dump(exclude_unset=True, exclude_none=True)
+
+    if "quantity" in fields_update or "unit" in fields_update:
+        # base_quantity depende dos dois: o que não veio é lido do item gravado,
+        # e os dois são regravados juntos.
+        if "quantity" not in fields_update or "unit" not in fields_update:
+            stored_item = await pantry_store.read_item(
+                ObjectId(user_id), category_value, item_id
+            )
+            if stored_item is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=DefaultAnswer(
+                        status=StatusMsg.FAIL, msg="The item was not found"
+                    ).model_dump(),
+                )
+            fields_update = {
+                "quantity": stored_item["quantity"],
+                "unit": stored_item["unit"],
+                **fields_update,
+            }
+        with_base_quantity(fields_update)
+
+    if not fields_update:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=DefaultAnswer(
+                status=StatusMsg.FAIL, msg="No fields to update"
+            ).model_dump(),
+        )
+
+    update_result = await pantry_store.update_item(
+        ObjectId(user_id), category_value, item_id, fields_update
     )
 
-    if addtoset_result.modified_count == 0:
+    if update_result.matched == 0:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=DefaultAnswer(
+                status=StatusMsg.FAIL, msg="The item was not found"
+            ).model_dump(),
+        )
+
+    if update_result.modified == 0:
         raise HTTPException(
             status_code=status.HTTP_304_NOT_MODIFIED,
             detail=DefaultAnswer(
@@ -345,9 +448,15 @@ async def Updates_pantry_item(
     ).model_dump()
 
 
-async def create_categories(user_id: ObjectId, username: str):
+async def create_categories(
+    pantry_store: EmbeddedItemStore,
+    user_id: ObjectId,
+    username: str,
+    session=None,
+):
     """
-    TODO Oque é melhor nessa situação, receber um modelo do banco, depois fazer um update ou enviar esses dados abaixo mesmo fazendo apenas um insert??
+    Um único insert, com as categorias copiadas do template montado no import
+    (ver src/api/schema/categories.py).
 
     '101' == 52 bytes
      101  == 28 bytes
@@ -356,57 +465,16 @@ async def create_categories(user_id: ObjectId, username: str):
     pantry_model = {
         "user_id": user_id,
         "username": username,
-        "pantry": [
-            {"category_value": 101, "category_name": "Candy", "items": []},
-            {"category_value": 102, "category_name": "Frozen", "items": []},
-            {"category_value": 103, "category_name": "Drinks", "items": []},
-            {"category_value": 104, "category_name": "Laundry", "items": []},
-            {"category_value": 105, "category_name": "Meat and Fish", "items": []},
-            {"category_value": 106, "category_name": "Dairy and Eggs", "items": []},
-            {"category_value": 107, "category_name": "Grocery Products", "items": []},
-            {"category_value": 108, "category_name": "Personal hygiene", "items": []},
-            {
-                "category_value": 109,
-                "category_name": "Grains and Cereals",
-                "items": [],
-            },
-            {
-                "category_value": 110,
-                "category_name": "Cleaning materials",
-                "items": [],
-            },
-            {
-                "category_value": 111,
-                "category_name": "Fruits and vegetables",
-                "items": [],
-            },
-            {
-                "category_value": 112,
-                "category_name": "Condiments and Sauces",
-                "items": [],
-            },
-            {
-                "category_value": 113,
-                "category_name": "Pasta and Wheat Products",
-                "items": [],
-            },
-            {
-                "category_value": 114,
-                "category_name": "Breads and Bakery Products",
-                "items": [],
-            },
-            {
-                "category_value": 115,
-                "category_name": "Canned goods and preserves",
-                "items": [],
-            },
-        ],
+        "pantry": new_categories(),
+        **pantry_store.new_document_fields(),
     }
 
-    await collection_repository.insert_document(pantry_model)
+    await pantry_store.repository.insert_document(pantry_model, session=session)
 
 
-async def update_username_pantry(user_id: str, username: str):
+async def update_username_pantry(
+    collection_repository: CollectionHandler, user_id: str, username: str
+):
 
     filter_document = {"user_id": ObjectId(user_id)}
 
@@ -415,5 +483,5 @@ async def update_username_pantry(user_id: str, username: str):
     await collection_repository.update_document(filter_document, request_attribute)
 
 
-async def delete_db_pantry():
-    collection_repository.delete_many()
+async def delete_db_pantry(pantry_store: EmbeddedItemStore):
+    await pantry_store.delete_all()
@@ -1,56 +1,182 @@
-# from typing import Dict, List
+from typing import Annotated
+
+from bson.objectid import ObjectId
+from fastapi import APIRouter, HTTPException, Query, status
+
+from src.api.dependencies import (
+    Pagination,
+    PantryStore,
+    RecipeIndexDep,
+    RecipesRepository,
+)
+from src.api.responses import answer_response, ndjson_response
+from src.api.schema.default_answer import DefaultAnswer, PaginatedAnswer, StatusMsg
+from src.api.schema.recipes import RecipeIn
 
-# from bson.objectid import ObjectId
-# from fastapi import APIRouter, HTTPException
+router = APIRouter()
 
-# from models.connection_options.connections import DBConnectionHandler
-# from models.repository.collections import CollectionHandler
 
-# router = APIRouter()
+def invalid_id(msg: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=DefaultAnswer(status=StatusMsg.FAIL, msg=msg).model_dump(),
+    )
 
-# db_name = "smartkitchien"
-# collection = "recipes"
 
-# db_handler = DBConnectionHandler()
-# db_handler.connect_to_db(db_name)
-# db_connection = db_handler.get_db_connection()
+def recipe_not_found() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=DefaultAnswer(
+            status=StatusMsg.FAIL, msg="Recipe not found"
+        ).model_dump(),
+    )
 
 
-# collection_repository = CollectionHandler(db_connection, collection)
+@router.get("/", response_model=PaginatedAnswer, status_code=status.HTTP_200_OK)
+async def read_recipes(
+    collection_repository: RecipesRepository, pagination: Pagination
+):
 
+    if pagination.stream:
+        return ndjson_response(collection_repository.find_document_stream())
+
+    data, next_cursor = await collection_repository.find_document_page(
+        limit=pagination.limit, after=pagination.after
+    )
 
-# @router.get("/")
-# async def recipes(recipe_id: str) -> List[Dict]:
-#     data = (
-#         collection_repository.find_document({}, {"_id": 0})
-#         if not recipe_id
-#         else collection_repository.find_document(
-#             {"_id": ObjectId(recipe_id)}, {"_id": 0}
-#         )
-#     )
-#     return data
+    if not data:
+        raise HTTPException(
+            status_code=404,
+            detail=DefaultAnswer(
+                status=StatusMsg.FAIL, msg="Recipes not found"
+            ).model_dump(),
+        )
 
+    return answer_response(
+        StatusMsg.SUCCESS, "Recipes found", data=data, next_cursor=next_cursor
+    )
 
-# @router.post("/")
-# async def create_recipe(data: Dict) -> Dict:
-#     try:
-#         await collection_repository.insert_document(data)
-#         return {"result": "success"}
 
-#     except:
-#         raise HTTPException(status_code=400, detail="Erro nos tipo de dados")
+# Receitas que dá para fazer com o que há na despensa:
+@router.get(
+    "/suggest/{user_id}", response_model=DefaultAnswer, status_code=status.HTTP_200_OK
+)
+async def suggest_recipes(
+    user_id: str,
+    pantry_store: PantryStore,
+    recipe_index: RecipeIndexDep,
+    limit: Annotated[int, Query(ge=1, le=50)] = 10,
+    min_coverage: Annotated[
+        float,
+        Query(ge=0, le=1, description="Minimum fraction of ingredients in the pantry"),
+    ] = 0.0,
+):
 
+    if not ObjectId.is_valid(user_id):
+        raise invalid_id("Invalid user ID")
 
-# @router.put("/{userId}")
-# def update_recipe(userid: str, data: Dict) -> str:
-#     try:
-#         collection_repository.update_document(userid, data)
-#         return "success"
-#     except:
-#         return "error"
+    pantry = await pantry_store.read(ObjectId(user_id))
 
+    if pantry is None:
+        raise HTTPException(
+            status_code=404,
+            detail=DefaultAnswer(
+                status=StatusMsg.FAIL, msg="Pantry not found"
+            ).model_dump(),
+        )
 
-# @router.delete("/{userId}")
-# def delete_recipe(id: str) -> str:
-#     collection_repository.delete_document(id)
-#     return "success"
+    item_names = [
+        item["item_name"] for category in pantry["pantry"] for item in category["items"]
+    ]
+
+    data = recipe_index.suggest(item_names, limit=limit, min_coverage=min_coverage)
+
+    return answer_response(StatusMsg.SUCCESS, "Recipes suggested", data=data)
+
+
+@router.get(
+    "/{recipe_id}", response_model=DefaultAnswer, status_code=status.HTTP_200_OK
+)
+async def read_recipe(recipe_id: str, collection_repository: RecipesRepository):
+
+    if not ObjectId.is_valid(recipe_id):
+        raise invalid_id("Invalid recipe ID")
+
+    data = await collection_repository.find_document_one({"_id": ObjectId(recipe_id)})
+
+    if not data:
+        raise recipe_not_found()
+
+    return answer_response(StatusMsg.SUCCESS, "Recipe found", data=data)
+
+
+@router.post("/", response_model=DefaultAnswer, status_code=status.HTTP_201_CREATED)
+async def create_recipe(
+    new_recipe: RecipeIn,
+    collection_repository: RecipesRepository,
+    recipe_index: RecipeIndexDep,
+):
+    document = new_recipe.model_dump()
+
+    insert_result = await collection_repository.insert_document(document)
+    recipe_id = str(insert_result.inserted_id)
+
+    recipe_index.add(recipe_id, document)
+
+    return answer_response(
+        StatusMsg.SUCCESS,
+        "Recipe created",
+        data=[{"recipe_id": recipe_id}],
+        status_code=status.HTTP_201_CREATED,
+    )
+
+
+@router.put(
+    "/{recipe_id}", response_model=DefaultAnswer, status_code=status.HTTP_200_OK
+)
+async def update_recipe(
+    recipe_id: str,
+    recipe_update: RecipeIn,
+    collection_repository: RecipesRepository,
+    recipe_index: RecipeIndexDep,
+):
+
+    if not ObjectId.is_valid(recipe_id):
+        raise invalid_id("Invalid recipe ID")
+
+    document = recipe_update.model_dump()
+
+    update_result = await collection_repository.update_document(
+        {"_id": ObjectId(recipe_id)}, {"$set": document}
+    )
+
+    if update_result.matched_count == 0:
+        raise recipe_not_found()
+
+    recipe_index.add(recipe_id, document)
+
+    return DefaultAnswer(status=StatusMsg.SUCCESS, msg="Recipe updated successfully")
+
+
+@router.delete(
+    "/{recipe_id}", response_model=DefaultAnswer, status_code=status.HTTP_200_OK
+)
+async def delete_recipe(
+    recipe_id: str,
+    collection_repository: RecipesRepository,
+    recipe_index: RecipeIndexDep,
+):
+
+    if not ObjectId.is_valid(recipe_id):
+        raise invalid_id("Invalid recipe ID")
+
+    delete_result = await collection_repository.delete_document(
+        {"_id": ObjectId(recipe_id)}
+    )
+
+    if not delete_result.deleted_count:
+        raise recipe_not_found()
+
+    recipe_index.remove(recipe_id)
+
+    return DefaultAnswer(status=StatusMsg.SUCCESS, msg="Recipe deleted successfully")
@@ -1,31 +1,96 @@
-from decimal import ROUND_DOWN, Decimal, getcontext
+import asyncio
 from pprint import pp
 from typing import Annotated
 
 from bson import ObjectId
-from fastapi import APIRouter, HTTPException, Query, status
+from fastapi import APIRouter, Header, HTTPException, Query, status
 
-from models.connection_options.connections import DBConnectionHandler
-from models.connection_options.mongo_db_config import mongo_db_infos
 from models.repository.collections import CollectionHandler
+from models.repository.pipelines import cart_totals_pipeline
+from models.repository.shopping_list import (
+    available_quantities,
+    merge_into_pantry,
+    push_by_category,
+    required_ingredients,
+    shortfall,
+)
+from src.api.dependencies import (
+    DBHandler,
+    PantryStore,
+    RecipesRepository,
+    ShoppingCartRepository,
+    ShoppingCartStore,
+)
+from src.api.responses import (
+    answer_response,
+    etag_matches,
+    not_modified_response,
+    version_etag,
+)
+from src.api.schema.categories import Units, new_categories
 from src.api.schema.default_answer import DefaultAnswer, StatusMsg
-from src.api.schema.shopping_cart import CategoryValue, ItemsIn, ItemsOut
+from src.api.schema.shopping_cart import (
+    BulkItemsIn,
+    CategoryValue,
+    CheckoutIn,
+    ItemsIn,
+    ItemsInUpdate,
+    ItemsOut,
+    ShoppingListIn,
+    price_to_decimal128,
+)
+from src.api.schema.units import with_base_quantity
 
 router = APIRouter()
 
-collection = "shopping_cart"
 
-db_handler = DBConnectionHandler()
-db_handler.connect_to_db(mongo_db_infos["DB_NAME"])
-db_connection = db_handler.get_db_connection()
+@router.get("/{user_id}", response_model=DefaultAnswer, status_code=status.HTTP_200_OK)
+async def read_shopping_cart(
+    user_id: str,
+    collection_repository: ShoppingCartRepository,
+    if_none_match: Annotated[str | None, Header()] = None,
+):
 
-collection_repository = CollectionHandler(
-    db_connection, mongo_db_infos["COLLECTIONS"]["collection_shopping_cart"]  # type: ignore
-)
+    if not ObjectId.is_valid(user_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=DefaultAnswer(
+                status=StatusMsg.FAIL, msg="Invalid user ID"
+            ).model_dump(),
+        )
 
+    # Revalidação: compara só a versão (projeção ou cache) antes de buscar o carrinho.
+    if if_none_match is not None:
+        version = await collection_repository.find_version_by_user(ObjectId(user_id))
 
-@router.get("/{user_id}", response_model=DefaultAnswer, status_code=status.HTTP_200_OK)
-async def read_shopping_cart(user_id: str):
+        if version is not None and etag_matches(if_none_match, version_etag(version)):
+            return not_modified_response(version_etag(version))
+
+    data = await collection_repository.find_document_by_user(ObjectId(user_id))
+
+    if not data:
+        raise HTTPException(
+            status_code=404,
+            detail=DefaultAnswer(
+                status=StatusMsg.FAIL, msg="shopping cart not found"
+            ).model_dump(),
+        )
+
+    return answer_response(
+        StatusMsg.SUCCESS,
+        "User found",
+        data=data,
+        headers={"ETag": version_etag(data[0].get("version", 0))},
+    )
+
+
+# Subtotais por categoria e total do carrinho, somados no banco:
+@router.get(
+    "/{user_id}/totals", response_model=DefaultAnswer, status_code=status.HTTP_200_OK
+)
+async def read_shopping_cart_totals(
+    user_id: str, collection_repository: ShoppingCartRepository
+):
 
     if not ObjectId.is_valid(user_id):
         raise HTTPException(
@@ -35,11 +100,8 @@ async def read_shopping_cart(user_id: str):
             ).model_dump(),
         )
 
-    filter_document = {"user_id": ObjectId(user_id)}
-    request_attribute = {"_id": 0}
-
-    data = await collection_repository.find_document_one(
-        filter_document, request_attribute
+    data = await collection_repository.aggregate(
+        cart_totals_pipeline(ObjectId(user_id), "shoppingCart")
     )
 
     if not data:
@@ -49,10 +111,9 @@ async def read_shopping_cart(user_id: str):
                 status=StatusMsg.FAIL, msg="shopping cart not found"
             ).model_dump(),
         )
-    else:
-        data[0]["user_id"] = str(data[0]["user_id"])
 
-    return DefaultAnswer(status=StatusMsg.SUCCESS, msg="User found", data=data)
+    # Os Decimal128 são enviados como string pelo MongoJSONResponse.
+    return answer_response(StatusMsg.SUCCESS, "Shopping cart totals", data=data)
 
 
 @router.post("/{user_id}")
@@ -63,6 +124,7 @@ async def create_cart_item(
         Query(description="List of food category values, is a 3-digit integer value"),
     ],
     data_items: ItemsIn,
+    cart_store: ShoppingCartStore,
 ):
     """
     **List of food category values**\n
@@ -92,66 +154,175 @@ async def create_cart_item(
             ).model_dump(),
         )
 
-    result_find = await collection_repository.find_document_one(
-        filter_document={"user_id": ObjectId(user_id)},
-        request_attribute={"_id": 0, "password": 0},
+    # TODO: Esse ItemOut é similar ao do /shopping_cart, e eu ainda coloquei o mesmo nome é PS.
+
+    item_id = ObjectId()
+
+    data = with_base_quantity(
+        ItemsOut(item_id=item_id, **data_items.model_dump()).model_dump()
     )
 
-    if not result_find:
+    # O preço é gravado como Decimal128, o que permite somar o carrinho no banco.
+    data["price"] = price_to_decimal128(data["price"])
+
+    failed_items = await cart_store.add_items(
+        ObjectId(user_id), [(category_value, data)]
+    )
+
+    if failed_items is None:
         raise HTTPException(
-            status_code=404,
+            status_code=status.HTTP_404_NOT_FOUND,
             detail=DefaultAnswer(
-                status=StatusMsg.FAIL, msg="shopping cart not found"
+                status=StatusMsg.FAIL, msg="User or category not found"
             ).model_dump(),
         )
 
-    # TODO: Esse ItemOut é similar ao do /shopping_cart, e eu ainda coloquei o mesmo nome é PS.
+    if failed_items:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=DefaultAnswer(
+                status=StatusMsg.FAIL, msg="The item could not be added"
+            ).model_dump(),
+        )
 
-    data_items_dict = data_items.model_dump()
+    return DefaultAnswer(status=StatusMsg.SUCCESS, msg="Item created successfully")
 
-    # Convertendo o valor de price para str, pois o DB não aceita o tipo decimal.
 
-    if isinstance(data_items.price, Decimal):
+# Obter todos os itens de uma categoria específica:
+@router.get(
+    "/category/{user_id}", response_model=DefaultAnswer, status_code=status.HTTP_200_OK
+)
+async def all_items_specific_category(
+    user_id: str,
+    category_value: CategoryValue,
+    cart_store: ShoppingCartStore,
+    name_prefix: Annotated[
+        str | None,
+        Query(
+            min_length=1,
+            max_length=15,
+            description="Only items whose name starts with this (case-insensitive)",
+        ),
+    ] = None,
+    min_quantity: Annotated[
+        float | None, Query(ge=0, description="Only items with at least this quantity")
+    ] = None,
+    unit: Annotated[
+        Units | None,
+        Query(
+            description="Unit of min_quantity, compared on base quantities "
+            "(default: each item's own unit)"
+        ),
+    ] = None,
+):
 
-        # Configurar a precisão das operações decimais para 10 dígitos
-        getcontext().prec = 10
+    if not ObjectId.is_valid(user_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=DefaultAnswer(
+                status=StatusMsg.FAIL, msg="Invalid user ID"
+            ).model_dump(),
+        )
+
+    result_find = await cart_store.read_category(
+        ObjectId(user_id), category_value, name_prefix, min_quantity, unit
+    )
 
-        data_items_dict["price"] = str(
-            data_items_dict["price"].quantize(Decimal("0.01"), ROUND_DOWN)
+    if not result_find:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=DefaultAnswer(
+                status=StatusMsg.FAIL, msg="User not found"
+            ).model_dump(),
         )
 
-    item_id = ObjectId()
+    if not result_find[0]["shoppingCart"]:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=DefaultAnswer(
+                status=StatusMsg.FAIL, msg="Category not found"
+            ).model_dump(),
+        )
 
-    data = ItemsOut(item_id=item_id, **data_items_dict)
+    return answer_response(
+        StatusMsg.SUCCESS, "shopping cart Items Found", data=result_find
+    )
 
-    request_attribute = {"$addToSet": {"shoppingCart.$.items": data.model_dump()}}
 
-    filter_document = {
-        "user_id": ObjectId(user_id),
-        "shoppingCart.category_value": category_value,
-    }
+# Adicionar vários itens, de várias categorias, em um único round trip:
+@router.post(
+    "/{user_id}/items/bulk",
+    response_model=DefaultAnswer,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_cart_items_bulk(
+    user_id: str,
+    data_items: BulkItemsIn,
+    cart_store: ShoppingCartStore,
+):
 
-    update_result = await collection_repository.update_document(
-        filter_document, request_attribute
-    )
+    if not ObjectId.is_valid(user_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=DefaultAnswer(
+                status=StatusMsg.FAIL, msg="Invalid user ID"
+            ).model_dump(),
+        )
+
+    items = []
+    results = []
 
-    # TODO: Faz sentido criar uma func. que busque pela user e outra pela categoria para ter uma resposta mais correta.?
-    if update_result.matched_count == 0:
+    for item in data_items.items:
+        item_dict = item.model_dump(exclude={"category_value"})
+
+        data = with_base_quantity(
+            ItemsOut(item_id=ObjectId(), **item_dict).model_dump()
+        )
+        data["price"] = price_to_decimal128(data["price"])
+
+        items.append((item.category_value, data))
+        results.append(
+            {
+                "item_id": data["item_id"],
+                "item_name": data["item_name"],
+                "category_value": item.category_value,
+            }
+        )
+
+    failed_items = await cart_store.add_items(ObjectId(user_id), items)
+
+    if failed_items is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=DefaultAnswer(
-                status=StatusMsg.FAIL, msg="User or category not found"
+                status=StatusMsg.FAIL, msg="shopping cart not found"
             ).model_dump(),
         )
 
-    return DefaultAnswer(status=StatusMsg.SUCCESS, msg="Item created successfully")
+    for index, result in enumerate(results):
+        result["status"] = "failed" if index in failed_items else "created"
 
+    return answer_response(
+        StatusMsg.SUCCESS,
+        "The items were processed",
+        data=results,
+        status_code=status.HTTP_201_CREATED,
+    )
 
-# Obter todos os itens de uma categoria específica:
-@router.get(
-    "/category/{user_id}", response_model=DefaultAnswer, status_code=status.HTTP_200_OK
+
+# Lista de compras: ingredientes das receitas menos o que há na despensa e no carrinho.
+@router.post(
+    "/{user_id}/from_recipes",
+    response_model=DefaultAnswer,
+    status_code=status.HTTP_201_CREATED,
 )
-async def all_items_specific_category(user_id: str, category_value: CategoryValue):
+async def create_cart_items_from_recipes(
+    user_id: str,
+    planned: ShoppingListIn,
+    collection_repository: ShoppingCartRepository,
+    recipes_repository: RecipesRepository,
+    pantry_store: PantryStore,
+):
 
     if not ObjectId.is_valid(user_id):
         raise HTTPException(
@@ -161,40 +332,206 @@ async def all_items_specific_category(user_id: str, category_value: CategoryValu
             ).model_dump(),
         )
 
-    filter_document = {
-        "user_id": ObjectId(user_id),
-        "shoppingCart.category_value": category_value,
-    }
-
-    request_attribute = {"_id": 0, "shoppingCart.$": 1}
+    recipe_ids = {planned_recipe.recipe_id for planned_recipe in planned.recipes}
 
-    # Verifica se o usuário existe
-    existing_user = await collection_repository.find_document_one(
-        {"user_id": ObjectId(user_id)}
+    # As três leituras são independentes: um round trip de latência.
+    recipes, pantry, cart = await asyncio.gather(
+        recipes_repository.find_document(
+            {"_id": {"$in": list(recipe_ids)}},
+            {"servings": 1, "ingredients": 1},
+        ),
+        pantry_store.read(ObjectId(user_id)),
+        collection_repository.find_document_by_user(ObjectId(user_id)),
     )
 
-    if not existing_user:
+    recipes_by_id = {recipe["_id"]: recipe for recipe in recipes}
+    not_found = recipe_ids - recipes_by_id.keys()
+
+    if not_found:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=DefaultAnswer(
-                status=StatusMsg.FAIL, msg="User not found"
+                status=StatusMsg.FAIL,
+                msg="Recipe not found",
+                data=[{"recipe_id": str(recipe_id)} for recipe_id in not_found],
+            ).model_dump(),
+        )
+
+    if pantry is None or not cart:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=DefaultAnswer(
+                status=StatusMsg.FAIL, msg="Pantry or shopping cart not found"
             ).model_dump(),
         )
 
-    result_find = await collection_repository.find_document_one(
-        filter_document, request_attribute
+    # Fator de porções: as pedidas sobre o rendimento da receita.
+    planned_recipes = []
+    for planned_recipe in planned.recipes:
+        recipe = recipes_by_id[planned_recipe.recipe_id]
+        recipe_servings = recipe.get("servings", 1)
+        planned_recipes.append(
+            (recipe, (planned_recipe.servings or recipe_servings) / recipe_servings)
+        )
+
+    required = required_ingredients(planned_recipes)
+
+    missing = shortfall(
+        required,
+        available_quantities(
+            item for category in pantry["pantry"] for item in category["items"]
+        ),
+        available_quantities(
+            item for category in cart[0]["shoppingCart"] for item in category["items"]
+        ),
     )
 
-    if not result_find:
+    if not missing:
+        return answer_response(StatusMsg.SUCCESS, "Nothing is missing", data=[])
+
+    # Todas as categorias em um único update (e um único incremento de versão).
+    request_attribute, array_filters = push_by_category("shoppingCart", missing)
+
+    await collection_repository.update_document(
+        {"user_id": ObjectId(user_id)}, request_attribute, array_filters=array_filters
+    )
+
+    return answer_response(
+        StatusMsg.SUCCESS,
+        "The missing items were added",
+        data=[
+            {
+                "item_id": item["item_id"],
+                "item_name": item["item_name"],
+                "quantity": item["quantity"],
+                "unit": item["unit"],
+                "category_value": category_value,
+            }
+            for category_value, items in missing.items()
+            for item in items
+        ],
+        status_code=status.HTTP_201_CREATED,
+    )
+
+
+# Checkout: move os itens comprados do carrinho para a despensa.
+@router.post(
+    "/{user_id}/checkout", response_model=DefaultAnswer, status_code=status.HTTP_200_OK
+)
+async def checkout_shopping_cart(
+    user_id: str,
+    checkout: CheckoutIn,
+    collection_repository: ShoppingCartRepository,
+    pantry_store: PantryStore,
+    db_handler: DBHandler,
+):
+
+    if not ObjectId.is_valid(user_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=DefaultAnswer(
+                status=StatusMsg.FAIL, msg="Invalid user ID"
+            ).model_dump(),
+        )
+
+    # A versão da despensa lida aqui protege a escrita: leitura sem cache.
+    pantry_store.repository.invalidate_cache(ObjectId(user_id))
+
+    cart, pantry = await asyncio.gather(
+        collection_repository.find_document_one(
+            {"user_id": ObjectId(user_id)}, {"_id": 0, "shoppingCart": 1}
+        ),
+        pantry_store.read(ObjectId(user_id)),
+    )
+
+    if not cart or pantry is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=DefaultAnswer(
-                status=StatusMsg.FAIL, msg="Category not found"
+                status=StatusMsg.FAIL, msg="Pantry or shopping cart not found"
             ).model_dump(),
         )
 
-    return DefaultAnswer(
-        status=StatusMsg.SUCCESS, msg="shopping cart Items Found", data=result_find
+    # Os item_id do carrinho são gravados como str; compara tudo como str.
+    selected = None if checkout.item_ids == "all" else set(map(str, checkout.item_ids))
+
+    purchased = [
+        (category["category_value"], item)
+        for category in cart[0]["shoppingCart"]
+        for item in category["items"]
+        if selected is None or str(item["item_id"]) in selected
+    ]
+
+    if selected is not None:
+        not_found = selected - {str(item["item_id"]) for _, item in purchased}
+        if not_found:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=DefaultAnswer(
+                    status=StatusMsg.FAIL,
+                    msg="Items not found in the shopping cart",
+                    data=[{"item_id": item_id} for item_id in sorted(not_found)],
+                ).model_dump(),
+            )
+
+    if not purchased:
+        return answer_response(StatusMsg.SUCCESS, "The shopping cart is empty", data=[])
+
+    updates, new_items = merge_into_pantry(pantry["pantry"], purchased)
+
+    async def move_items(session=None):
+        failed_items = await pantry_store.merge_items(
+            ObjectId(user_id),
+            pantry.get("version"),
+            updates,
+            new_items,
+            session=session,
+        )
+
+        if failed_items is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=DefaultAnswer(
+                    status=StatusMsg.FAIL,
+                    msg="The pantry changed during checkout, try again",
+                ).model_dump(),
+            )
+
+        if failed_items:
+            raise HTTPException(
+                status_code=500,
+                detail=DefaultAnswer(
+                    status=StatusMsg.FAIL, msg="The items could not be added"
+                ).model_dump(),
+            )
+
+        # Só os itens lidos acima: os que chegaram depois ficam no carrinho.
+        await collection_repository.update_document(
+            {"user_id": ObjectId(user_id)},
+            {
+                "$pull": {
+                    "shoppingCart.$[].items": {
+                        "item_id": {"$in": [item["item_id"] for _, item in purchased]}
+                    }
+                }
+            },
+            session=session,
+        )
+
+    if db_handler.supports_transactions():
+        await db_handler.run_transaction(move_items)
+    else:
+        # Sem transação a despensa é gravada primeiro: uma falha no meio deixa
+        # os itens também no carrinho, em vez de perdê-los.
+        await move_items()
+
+    return answer_response(
+        StatusMsg.SUCCESS,
+        "The items were moved to the pantry",
+        data=[
+            {"item_id": item["item_id"], "item_name": item["item_name"]}
+            for _, item in purchased
+        ],
     )
 
 
@@ -202,7 +539,12 @@ async def all_items_specific_category(user_id: str, category_value: CategoryValu
 @router.delete(
     "/{item_id}", response_model=DefaultAnswer, status_code=status.HTTP_200_OK
 )
-async def delete_item(user_id: str, item_id: str, category_value: CategoryValue):
+async def delete_item(
+    user_id: str,
+    item_id: str,
+    category_value: CategoryValue,
+    cart_store: ShoppingCartStore,
+):
 
     if not ObjectId.is_valid(item_id):
         raise HTTPException(
@@ -212,28 +554,9 @@ async def delete_item(user_id: str, item_id: str, category_value: CategoryValue)
             ).model_dump(),
         )
 
-    filter_document = {
-        "user_id": ObjectId(user_id),
-        "shoppingCart.category_value": category_value,
-        "shoppingCart.items.item_id": item_id,
-    }
-
-    request_attribute = {
-        "$pull": {"shoppingCart.$[element].items": {"item_id": item_id}}
-    }
-
-    # array_filters = [{"category.category_value": category_value}]
-    array_filters = [{"element.category_value": category_value}]
+    deleted = await cart_store.delete_item(ObjectId(user_id), category_value, item_id)
 
-    # Atualiza o documento removendo o item com o item_id especificado
-    update_result = await collection_repository.update_document(
-        filter_document=filter_document,  # Localiza o item
-        request_attribute=request_attribute,  # Aplica a ação [remover o item]
-        array_filters=array_filters,  # Condição
-        # O operador posicional $[<identifier>] irá atuar como um espaço reservado para todos os elementos do campo selecionado que correspondem às condições que foram especificadas no arrayFiltros.
-    )
-
-    if update_result.modified_count == 0:
+    if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=DefaultAnswer(
@@ -254,6 +577,7 @@ async def Updates_shoppingCart_item(
     item_id: str,
     category_value: CategoryValue,
     data_items_update: ItemsIn,
+    cart_store: ShoppingCartStore,
 ):
 
     if not ObjectId.is_valid(user_id):
@@ -264,65 +588,108 @@ async def Updates_shoppingCart_item(
             ).model_dump(),
         )
 
-    if isinstance(data_items_update.price, Decimal):
-
-        # Configurar a precisão das operações decimais para 10 dígitos
-        getcontext().prec = 10
+    update_result = await cart_store.replace_item(
+        ObjectId(user_id),
+        category_value,
+        item_id,
+        with_base_quantity(
+            {
+                **data_items_update.model_dump(),
+                "price": price_to_decimal128(data_items_update.price),
+            }
+        ),
+    )
 
-        data_items_update.price = str(
-            data_items_update.price.quantize(Decimal("0.01"), ROUND_DOWN)
+    if update_result.matched == 0:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=DefaultAnswer(
+                status=StatusMsg.FAIL, msg="The item was not found"
+            ).model_dump(),
         )
 
-    filter_document_pull = {
-        "user_id": ObjectId(user_id),
-        "shoppingCart.category_value": category_value,
-        "shoppingCart.items.item_id": item_id,
-    }
+    if update_result.modified == 0:
+        raise HTTPException(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            detail=DefaultAnswer(
+                status=StatusMsg.FAIL, msg="Item not modified"
+            ).model_dump(),
+        )
 
-    # Remover o item
-    request_pull = {"$pull": {"shoppingCart.$[element].items": {"item_id": item_id}}}
+    return DefaultAnswer(
+        status=StatusMsg.SUCCESS, msg="Item updated successfully"
+    ).model_dump()
 
-    array_filters_pull = [
-        {"element.category_value": category_value},
-    ]
 
-    # Executar a remoção do item
-    pull_result = await collection_repository.update_document(
-        filter_document=filter_document_pull,
-        request_attribute=request_pull,
-        array_filters=array_filters_pull,
-    )
+@router.patch(
+    "/{user_id}/category_value/{category_value}",
+    response_model=DefaultAnswer,
+    status_code=status.HTTP_200_OK,
+)
+async def Partially_updates_shoppingCart_item(
+    user_id: str,
+    item_id: str,
+    category_value: CategoryValue,
+    data_items_update: ItemsInUpdate,
+    cart_store: ShoppingCartStore,
+):
 
-    if pull_result.modified_count == 0:
+    if not ObjectId.is_valid(user_id):
         raise HTTPException(
-            status_code=status.HTTP_304_NOT_MODIFIED,
+            status_code=status.HTTP_400_BAD_REQUEST,
             detail=DefaultAnswer(
-                status=StatusMsg.FAIL,
-                msg="The item was not found or was not removed",
+                status=StatusMsg.FAIL, msg="Invalid user ID"
             ).model_dump(),
         )
 
-    filter_document_addtoset = {
-        "user_id": ObjectId(user_id),
-        "shoppingCart.category_value": category_value,
-    }
-
-    # adiciona o item atualizado
-    request_push = {
-        "$addToSet": {
-            "shoppingCart.$.items": {
-                "item_id": item_id,
-                **data_items_update.model_dump(),
+    # Somente os campos enviados são alterados.
+    fields_update = data_items_update.model_dump(exclude_unset=True, exclude_none=True)
+
+    if "price" in fields_update:
+        fields_update["price"] = price_to_decimal128(fields_update["price"])
+
+    if "quantity" in fields_update or "unit" in fields_update:
+        # base_quantity depende dos dois: o que não veio é lido do item gravado,
+        # e os dois são regravados juntos.
+        if "quantity" not in fields_update or "unit" not in fields_update:
+            stored_item = await cart_store.read_item(
+                ObjectId(user_id), category_value, item_id
+            )
+            if stored_item is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=DefaultAnswer(
+                        status=StatusMsg.FAIL, msg="The item was not found"
+                    ).model_dump(),
+                )
+            fields_update = {
+                "quantity": stored_item["quantity"],
+                "unit": stored_item["unit"],
+                **fields_update,
             }
-        }
-    }
+        with_base_quantity(fields_update)
+
+    if not fields_update:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=DefaultAnswer(
+                status=StatusMsg.FAIL, msg="No fields to update"
+            ).model_dump(),
+        )
 
-    # Executar a adição do item atualizado
-    addtoset_result = await collection_repository.update_document(
-        filter_document=filter_document_addtoset, request_attribute=request_push
+    update_result = await cart_store.update_item(
+        ObjectId(user_id), category_value, item_id, fields_update
     )
 
-    if addtoset_result.modified_count == 0:
+    if update_result.matched == 0:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=DefaultAnswer(
+                status=StatusMsg.FAIL, msg="The item was not found"
+            ).model_dump(),
+        )
+
+    if update_result.modified == 0:
         raise HTTPException(
             status_code=status.HTTP_304_NOT_MODIFIED,
             detail=DefaultAnswer(
@@ -335,62 +702,25 @@ async def Updates_shoppingCart_item(
     ).model_dump()
 
 
-async def create_shopping_cart(user_id: ObjectId, username: str):
+async def create_shopping_cart(
+    collection_repository: CollectionHandler,
+    user_id: ObjectId,
+    username: str,
+    session=None,
+):
 
     shopping_cart_model = {
         "user_id": user_id,
         "username": username,
-        "shoppingCart": [
-            {"category_value": 101, "category_name": "Candy", "items": []},
-            {"category_value": 102, "category_name": "Frozen", "items": []},
-            {"category_value": 103, "category_name": "Drinks", "items": []},
-            {"category_value": 104, "category_name": "Laundry", "items": []},
-            {"category_value": 105, "category_name": "Meat and Fish", "items": []},
-            {"category_value": 106, "category_name": "Dairy and Eggs", "items": []},
-            {"category_value": 107, "category_name": "Grocery Products", "items": []},
-            {"category_value": 108, "category_name": "Personal hygiene", "items": []},
-            {
-                "category_value": 109,
-                "category_name": "Grains and Cereals",
-                "items": [],
-            },
-            {
-                "category_value": 110,
-                "category_name": "Cleaning materials",
-                "items": [],
-            },
-            {
-                "category_value": 111,
-                "category_name": "Fruits and vegetables",
-                "items": [],
-            },
-            {
-                "category_value": 112,
-                "category_name": "Condiments and Sauces",
-                "items": [],
-            },
-            {
-                "category_value": 113,
-                "category_name": "Pasta and Wheat Products",
-                "items": [],
-            },
-            {
-                "category_value": 114,
-                "category_name": "Breads and Bakery Products",
-                "items": [],
-            },
-            {
-                "category_value": 115,
-                "category_name": "Canned goods and preserves",
-                "items": [],
-            },
-        ],
+        "shoppingCart": new_categories(),
     }
 
-    await collection_repository.insert_document(shopping_cart_model)
+    await collection_repository.insert_document(shopping_cart_model, session=session)
 
 
-async def update_username_shopping_cart(user_id: str, username: str):
+async def update_username_shopping_cart(
+    collection_repository: CollectionHandler, user_id: str, username: str
+):
 
     filter_document = {"user_id": ObjectId(user_id)}
 
@@ -399,5 +729,5 @@ async def update_username_shopping_cart(user_id: str, username: str):
     await collection_repository.update_document(filter_document, request_attribute)
 
 
-async def delete_db_shopping_cart():
-    collection_repository.delete_many()
+async def delete_db_shopping_cart(collection_repository: CollectionHandler):
+    await collection_repository.delete_many()
@@ -1,38 +1,47 @@
+import asyncio
 from typing import Annotated
 
 from bson.objectid import ObjectId
 from fastapi import APIRouter, HTTPException, Path, status
+from pymongo.errors import DuplicateKeyError
 
-from models.connection_options.connections import DBConnectionHandler
-from models.connection_options.mongo_db_config import mongo_db_infos
 from models.repository.collections import CollectionHandler
+from models.repository.item_stores import EmbeddedItemStore
+from src.api.dependencies import (
+    DBHandler,
+    Pagination,
+    PantryRepository,
+    PantryStore,
+    ShoppingCartRepository,
+    UsersRepository,
+)
 from src.api.endpoints.pantry import create_categories, update_username_pantry
 from src.api.endpoints.shopping_cart import (
     create_shopping_cart,
     update_username_shopping_cart,
 )
-from src.api.schema.default_answer import DefaultAnswer, StatusMsg
+from src.api.responses import answer_response, ndjson_response
+from src.api.schema.default_answer import DefaultAnswer, PaginatedAnswer, StatusMsg
 from src.api.schema.users import UserIn, UserInUpdate, UserOut
 
 router = APIRouter()
 
-collection = "users"
-
-db_handler = DBConnectionHandler()
-db_handler.connect_to_db(mongo_db_infos["DB_NAME"])
-db_connection = db_handler.get_db_connection()
-
-collection_repository = CollectionHandler(
-    db_connection, mongo_db_infos["COLLECTIONS"]["collection_users"]  # type: ignore
-)
-
 
-@router.get("/", response_model=DefaultAnswer, status_code=status.HTTP_200_OK)
-async def read_users():
+@router.get("/", response_model=PaginatedAnswer, status_code=status.HTTP_200_OK)
+async def read_users(collection_repository: UsersRepository, pagination: Pagination):
     request_attribute = {"_id": 0, "password": 0}
 
-    data = await collection_repository.find_document(
-        request_attribute=request_attribute
+    if pagination.stream:
+        return ndjson_response(
+            collection_repository.find_document_stream(
+                request_attribute=request_attribute
+            )
+        )
+
+    data, next_cursor = await collection_repository.find_document_page(
+        request_attribute=request_attribute,
+        limit=pagination.limit,
+        after=pagination.after,
     )
 
     if not data:
@@ -41,7 +50,9 @@ async def read_users():
         ).model_dump()
         raise HTTPException(status_code=404, detail=response)
 
-    return DefaultAnswer(status=StatusMsg.SUCCESS, msg="Users found", data=data)
+    return answer_response(
+        StatusMsg.SUCCESS, "Users found", data=data, next_cursor=next_cursor
+    )
 
 
 @router.get("/{user_id}", response_model=DefaultAnswer, status_code=status.HTTP_200_OK)
@@ -54,7 +65,8 @@ async def read_user(
             "ObjectId",
             regex=r"^[a-fA-F0-9]{24}$",
         ),
-    ]
+    ],
+    collection_repository: UsersRepository,
 ):
     if not ObjectId.is_valid(user_id):
         raise HTTPException(
@@ -79,64 +91,88 @@ async def read_user(
             ).model_dump(),
         )
 
-    return DefaultAnswer(status=StatusMsg.SUCCESS, msg="User found", data=data)
+    return answer_response(StatusMsg.SUCCESS, "User found", data=data)
 
 
 @router.post("/", response_model=DefaultAnswer, status_code=status.HTTP_201_CREATED)
-async def create_user(new_user: UserIn):
+async def create_user(
+    new_user: UserIn,
+    db_handler: DBHandler,
+    collection_repository: UsersRepository,
+    pantry_store: PantryStore,
+    shopping_cart_repository: ShoppingCartRepository,
+):
     data_user = new_user.model_dump()
 
-    filter_document_username = {"username": data_user["username"]}
-    filter_document_email = {"email": data_user["email"]}
-
-    request_attribute = {"_id": 0, "password": 0}
-
-    does_the_username_exist = await collection_repository.find_document(
-        filter_document_username, request_attribute
-    )
+    # Uma única consulta verifica username e email ao mesmo tempo.
+    filter_document = {
+        "$or": [{"username": data_user["username"]}, {"email": data_user["email"]}]
+    }
+    request_attribute = {"_id": 0, "username": 1, "email": 1}
 
-    does_the_email_exist = await collection_repository.find_document(
-        filter_document_email, request_attribute
+    existing_users = await collection_repository.find_document(
+        filter_document, request_attribute
     )
 
-    if does_the_email_exist and does_the_username_exist:
-        response = DefaultAnswer(
-            status=StatusMsg.FAIL, msg="username and email already exists"
-        ).model_dump()
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=response)
+    if existing_users:
+        raise user_conflict(
+            username_exists=any(
+                user.get("username") == data_user["username"] for user in existing_users
+            ),
+            email_exists=any(
+                user.get("email") == data_user["email"] for user in existing_users
+            ),
+        )
 
-    if does_the_username_exist:
-        response = DefaultAnswer(
-            status=StatusMsg.FAIL, msg="username already exists"
-        ).model_dump()
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=response)
+    # O _id é gerado aqui para que a despensa e o carrinho não dependam do
+    # resultado do insert do usuário.
+    user_id = ObjectId()
+    data_user["_id"] = user_id
 
-    if does_the_email_exist:
-        response = DefaultAnswer(
-            status=StatusMsg.FAIL, msg="This email already exists"
-        ).model_dump()
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=response)
+    async def insert_user_documents(session):
+        await collection_repository.insert_document(data_user, session=session)
+        await create_categories(
+            pantry_store, user_id, data_user["username"], session=session
+        )
+        await create_shopping_cart(
+            shopping_cart_repository, user_id, data_user["username"], session=session
+        )
 
-    insert_one_result = await collection_repository.insert_document(data_user)
+    try:
+        if db_handler.supports_transactions():
+            # Uma sessão não pode ser usada por duas operações ao mesmo tempo, então
+            # dentro da transação os inserts são sequenciais.
+            await db_handler.run_transaction(insert_user_documents)
+        else:
+            await insert_user_documents_concurrently(
+                user_id,
+                data_user,
+                collection_repository,
+                pantry_store,
+                shopping_cart_repository,
+            )
+    except DuplicateKeyError as error:
+        # Outra requisição cadastrou o mesmo username/email depois da consulta acima.
+        key_pattern = (error.details or {}).get("keyPattern", {})
+        raise user_conflict(
+            username_exists="username" in key_pattern,
+            email_exists="email" in key_pattern,
+        )
 
     data = [
         UserOut(username=data_user["username"], email=data_user["email"]).model_dump()
     ]
 
-    # TODO: As criações de categorias e carrinho de compras precisão ser somente chamadas se o usuário for criado ? precisa haver algum tipo de validação para elas serem chamadas ?
-    await create_categories(
-        user_id=insert_one_result.inserted_id, username=data_user["username"]
+    return answer_response(
+        StatusMsg.SUCCESS,
+        "User created",
+        data=data,
+        status_code=status.HTTP_201_CREATED,
     )
 
-    await create_shopping_cart(
-        user_id=insert_one_result.inserted_id, username=data_user["username"]
-    )
-
-    return DefaultAnswer(status=StatusMsg.SUCCESS, msg="User created", data=data)
-
 
 @router.delete("/{_id}", response_model=DefaultAnswer, status_code=status.HTTP_200_OK)
-async def del_document(_id: str):
+async def del_document(_id: str, collection_repository: UsersRepository):
     # TODO Devo chamar uma função aqui também que deleta o DB pantry do usuário porque e se ele quiser voltar a usar o App?
 
     if not ObjectId.is_valid(_id):
@@ -161,7 +197,13 @@ async def del_document(_id: str):
 
 
 @router.put("/{user_id}", response_model=DefaultAnswer, status_code=status.HTTP_200_OK)
-async def update_document(user_id: str, data_user_update: UserInUpdate):
+async def update_document(
+    user_id: str,
+    data_user_update: UserInUpdate,
+    collection_repository: UsersRepository,
+    pantry_repository: PantryRepository,
+    shopping_cart_repository: ShoppingCartRepository,
+):
 
     # TODO: Se você passar um usuário inexistente, ele tenta validar primeiro a os campos de usuário e senha para depois tentar ver se o usuário existe
 
@@ -225,8 +267,12 @@ async def update_document(user_id: str, data_user_update: UserInUpdate):
 
         # TODO: Após atualizado o usuário, no caso do username ele atualiza na collection pantry. Nesse caso ele vai atualizar mesmo que nome se a que ele já em lá logo preciso mudar essa func de lugar.
         if data_user_update.username:
-            await update_username_pantry(user_id, data_user_update.username)
-            await update_username_shopping_cart(user_id, data_user_update.username)
+            await update_username_pantry(
+                pantry_repository, user_id, data_user_update.username
+            )
+            await update_username_shopping_cart(
+                shopping_cart_repository, user_id, data_user_update.username
+            )
 
         return DefaultAnswer(
             status=StatusMsg.SUCCESS, msg="User updated successfully"
@@ -240,5 +286,47 @@ async def update_document(user_id: str, data_user_update: UserInUpdate):
         )
 
 
-async def delete_all_users():
-    collection_repository.delete_many()
+def user_conflict(username_exists: bool, email_exists: bool) -> HTTPException:
+    if username_exists and email_exists:
+        msg = "username and email already exists"
+    elif username_exists:
+        msg = "username already exists"
+    else:
+        msg = "This email already exists"
+
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=DefaultAnswer(status=StatusMsg.FAIL, msg=msg).model_dump(),
+    )
+
+
+async def insert_user_documents_concurrently(
+    user_id: ObjectId,
+    data_user: dict,
+    collection_repository: CollectionHandler,
+    pantry_store: EmbeddedItemStore,
+    shopping_cart_repository: CollectionHandler,
+):
+    """
+    Sem suporte a transações os três inserts são independentes e rodam em
+    paralelo; se algum falhar, os documentos já gravados são removidos.
+    """
+    results = await asyncio.gather(
+        collection_repository.insert_document(data_user),
+        create_categories(pantry_store, user_id, data_user["username"]),
+        create_shopping_cart(shopping_cart_repository, user_id, data_user["username"]),
+        return_exceptions=True,
+    )
+
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors:
+        await asyncio.gather(
+            collection_repository.delete_document({"_id": user_id}),
+            pantry_store.repository.delete_document({"user_id": user_id}),
+            shopping_cart_repository.delete_document({"user_id": user_id}),
+        )
+        raise errors[0]
+
+
+async def delete_all_users(collection_repository: CollectionHandler):
+    await collection_repository.delete_many()
@@ -0,0 +1,208 @@
+"""
+Métricas HTTP por rota no formato texto do Prometheus (exposto em /metrics).
+
+A rota é o template do FastAPI ("/api/pantry/{user_id}"), nunca o path com o
+user_id, para que o número de séries fique fixo. As séries de cada rota
+são criadas de antemão (preallocate) e o registro por requisição é só
+aritmética em listas e atributos: sem locks, porque tudo roda no event loop
+do worker. Cada worker do uvicorn tem o seu registro.
+"""
+
+import time
+from bisect import bisect_left
+from typing import Dict, Iterable
+
+from starlette.routing import Route
+
+# Limites superiores ("le") dos buckets dos histogramas.
+DURATION_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+# Requisições que não casaram com nenhuma rota (404 do roteador).
+UNMATCHED_ROUTE = "unmatched"
+# Métodos fora desta lista viram "OTHER", senão qualquer cliente cria séries novas.
+KNOWN_METHODS = frozenset(
+    ("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "TRACE", "CONNECT")
+)
+
+
+class RouteSeries:
+    """Contadores de um par (método, rota)."""
+
+    __slots__ = (
+        "method",
+        "route",
+        "statuses",
+        "durations",
+        "duration_sum",
+        "sizes",
+        "size_sum",
+    )
+
+    def __init__(self, method: str, route: str) -> None:
+        self.method = method
+        self.route = route
+        self.statuses: Dict[int, int] = {}
+        # Um contador por bucket, mais o +Inf; acumulados só na exportação.
+        self.durations = [0] * (len(DURATION_BUCKETS) + 1)
+        self.duration_sum = 0.0
+        self.sizes = [0] * (len(SIZE_BUCKETS) + 1)
+        self.size_sum = 0
+
+
+class MetricsRegistry:
+    def __init__(self, prefix: str = "smartkitchen") -> None:
+        self.prefix = prefix
+        self.in_flight = 0
+        # Chave (id da rota, método): lookup por identidade, sem montar strings. As
+        # rotas vivem tanto quanto a app, então o id não é reaproveitado.
+        self.__series: Dict[tuple, RouteSeries] = {}
+
+    def preallocate(self, routes: Iterable) -> None:
+        """Cria as séries de todas as rotas HTTP da app (chamar após os include_router)."""
+        for route in routes:
+            if isinstance(route, Route):
+                for method in route.methods or ():
+                    self.__series[id(route), method] = RouteSeries(method, route.path)
+
+    def series(self, route, method: str) -> RouteSeries:
+        series = self.__series.get((id(route), method))
+        if series is None:
+            # Rota sem série prévia (método não permitido, rota sem match...).
+            if method not in KNOWN_METHODS:
+                method = "OTHER"
+            series = self.__series.get((id(route), method))
+            if series is None:
+                path = getattr(route, "path", UNMATCHED_ROUTE)
+                series = self.__series[id(route), method] = RouteSeries(method, path)
+        return series
+
+    def observe(
+        self, series: RouteSeries, status: int, duration: float, size: int
+    ) -> None:
+        series.statuses[status] = series.statuses.get(status, 0) + 1
+        series.durations[bisect_left(DURATION_BUCKETS, duration)] += 1
+        series.duration_sum += duration
+        series.sizes[bisect_left(SIZE_BUCKETS, size)] += 1
+        series.size_sum += size
+
+    def render(self) -> str:
+        """Todas as métricas no formato de exposição texto do Prometheus 0.0.4."""
+        prefix = self.prefix
+        series_list = [series for series in self.__series.values() if series.statuses]
+
+        lines = [
+            f"# HELP {prefix}_http_requests_in_flight Requests being served.",
+            f"# TYPE {prefix}_http_requests_in_flight gauge",
+            f"{prefix}_http_requests_in_flight {self.in_flight}",
+            f"# HELP {prefix}_http_requests_total Requests by route and status.",
+            f"# TYPE {prefix}_http_requests_total counter",
+        ]
+        for series in series_list:
+            labels = _labels(series)
+            for status, count in sorted(series.statuses.items()):
+                lines.append(
+                    f'{prefix}_http_requests_total{{{labels},status="{status}"}} {count}'
+                )
+
+        for name, help_text, buckets, attribute, total in (
+            (
+                "http_request_duration_seconds",
+                "Request latency by route.",
+                DURATION_BUCKETS,
+                "durations",
+                "duration_sum",
+            ),
+            (
+                "http_response_size_bytes",
+                "Response body size by route.",
+                SIZE_BUCKETS,
+                "sizes",
+                "size_sum",
+            ),
+        ):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} histogram")
+            for series in series_list:
+                labels = _labels(series)
+                cumulative = 0
+                for bound, count in zip(
+                    (*(repr(float(bound)) for bound in buckets), "+Inf"),
+                    getattr(series, attribute),
+                ):
+                    cumulative += count
+                    lines.append(
+                        f'{prefix}_{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+                    )
+                lines.append(
+                    f"{prefix}_{name}_sum{{{labels}}} {getattr(series, total)}"
+                )
+                lines.append(f"{prefix}_{name}_count{{{labels}}} {cumulative}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(series: RouteSeries) -> str:
+    return f'method="{series.method}",route="{_escape(series.route)}"'
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI puro (sem BaseHTTPMiddleware, que cria uma task e copia a
+    resposta): mede do início da requisição até o último pedaço do corpo.
+    """
+
+    def __init__(self, app, registry: MetricsRegistry) -> None:
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        registry = self.registry
+        status = 500
+        size = 0
+
+        async def send_wrapper(message) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        registry.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - started
+            registry.in_flight -= 1
+            # O roteador grava a rota escolhida no próprio scope.
+            registry.observe(
+                registry.series(scope.get("route"), scope["method"]),
+                status,
+                duration,
+                size,
+            )
@@ -0,0 +1,83 @@
+from decimal import Decimal
+from typing import Any, AsyncIterator, Dict, Mapping
+
+import orjson
+from bson import Decimal128, ObjectId
+from fastapi import Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from src.api.schema.default_answer import StatusMsg
+
+
+def _encode_mongo_types(value: Any) -> Any:
+    # Chamado pelo orjson só para os tipos que ele não conhece.
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, Decimal128):
+        return str(value.to_decimal())
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps_mongo(content: Any) -> bytes:
+    return orjson.dumps(content, default=_encode_mongo_types)
+
+
+class MongoJSONResponse(JSONResponse):
+    """
+    Serializa documentos do Mongo (ObjectId, Decimal, Decimal128) direto para
+    bytes, em uma única passada. Quando a rota retorna esta resposta o FastAPI
+    não revalida o conteúdo pelo response_model, que continua documentando o
+    formato no OpenAPI.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps_mongo(content)
+
+
+def answer_response(
+    status: StatusMsg,
+    msg: str,
+    data: list[Dict] | None = None,
+    status_code: int = 200,
+    headers: Mapping[str, str] | None = None,
+    **extra: Any,
+) -> MongoJSONResponse:
+    """Monta uma resposta no formato de DefaultAnswer sem passar pelo pydantic."""
+    return MongoJSONResponse(
+        {"status": status, "msg": msg, "data": data, **extra},
+        status_code=status_code,
+        headers=headers,
+    )
+
+
+async def _encode_ndjson(documents: AsyncIterator[Dict]) -> AsyncIterator[bytes]:
+    async for document in documents:
+        yield dumps_mongo(document) + b"\n"
+
+
+def ndjson_response(documents: AsyncIterator[Dict]) -> StreamingResponse:
+    """Envia os documentos um por linha (NDJSON) conforme chegam do cursor."""
+    return StreamingResponse(
+        _encode_ndjson(documents), media_type="application/x-ndjson"
+    )
+
+
+def version_etag(version: int) -> str:
+    """ETag forte derivado do campo "version" do documento."""
+    return f'"v{version}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match usa comparação fraca e pode trazer uma lista de ETags ou "*".
+    if if_none_match.strip() == "*":
+        return True
+
+    return any(
+        tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(",")
+    )
+
+
+def not_modified_response(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
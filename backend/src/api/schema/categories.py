@@ -0,0 +1,73 @@
+from enum import Enum
+from typing import Dict
+
+
+class CategoryValue(int, Enum):
+    CANDY = 101
+    FROZEN = 102
+    DRINKS = 103
+    LAUNDRY = 104
+    MEAT_FISH = 105
+    DAIRY_EGGS = 106
+    GROCERY_PRODUCTS = 107
+    PERSONAL_HYGIENE = 108
+    GRAINS_CEREALS = 109
+    CLEANING_MATERIALS = 110
+    FRUITS_VEGETABLES = 111
+    CONDIMENTS_SAUCES = 112
+    PASTA_WHEAT_PRODUCTS = 113
+    BREADS_BAKERY_PRODUCTS = 114
+    CANNED_GOODS_PRESERVES = 115
+
+
+# TODO Deixo como opcional entre um e outro ou faço uma conversão?
+class Units(str, Enum):
+    UNITS = "un"
+    LITERS = "l"
+    MILLILITER = "ml"
+    GRAMS = "g"
+    KILO_GRAMS = "kg"
+
+    @classmethod
+    def _missing_(cls, value):
+        # Aceita variações de caixa, como o "L" que o carrinho usava.
+        if isinstance(value, str):
+            return cls._value2member_map_.get(value.lower())
+        return None
+
+
+# Fonte única dos nomes e da ordem das categorias (a ordem do dicionário é a
+# ordem em que aparecem na despensa e no carrinho).
+CATEGORY_NAMES: Dict[CategoryValue, str] = {
+    CategoryValue.CANDY: "Candy",
+    CategoryValue.FROZEN: "Frozen",
+    CategoryValue.DRINKS: "Drinks",
+    CategoryValue.LAUNDRY: "Laundry",
+    CategoryValue.MEAT_FISH: "Meat and Fish",
+    CategoryValue.DAIRY_EGGS: "Dairy and Eggs",
+    CategoryValue.GROCERY_PRODUCTS: "Grocery Products",
+    CategoryValue.PERSONAL_HYGIENE: "Personal hygiene",
+    CategoryValue.GRAINS_CEREALS: "Grains and Cereals",
+    CategoryValue.CLEANING_MATERIALS: "Cleaning materials",
+    CategoryValue.FRUITS_VEGETABLES: "Fruits and vegetables",
+    CategoryValue.CONDIMENTS_SAUCES: "Condiments and Sauces",
+    CategoryValue.PASTA_WHEAT_PRODUCTS: "Pasta and Wheat Products",
+    CategoryValue.BREADS_BAKERY_PRODUCTS: "Breads and Bakery Products",
+    CategoryValue.CANNED_GOODS_PRESERVES: "Canned goods and preserves",
+}
+
+# Busca por valor em O(1), com chaves int (como ficam gravadas no banco).
+CATEGORIES_BY_VALUE: Dict[int, str] = {
+    category.value: name for category, name in CATEGORY_NAMES.items()
+}
+
+# Montado uma vez no import; cada usuário novo recebe uma cópia rasa.
+CATEGORIES_TEMPLATE: tuple[Dict, ...] = tuple(
+    {"category_value": value, "category_name": name}
+    for value, name in CATEGORIES_BY_VALUE.items()
+)
+
+
+def new_categories() -> list[Dict]:
+    """Lista de categorias vazias para o documento de um usuário novo."""
+    return [{**category, "items": []} for category in CATEGORIES_TEMPLATE]
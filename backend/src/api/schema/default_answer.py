@@ -16,6 +16,10 @@ class DefaultAnswer(BaseModel):
     data: list[Dict] | None = None
 
 
+class PaginatedAnswer(DefaultAnswer):
+    next_cursor: str | None = None
+
+
 """
     TODO: É correto ou não cria um padrão de resposta para cada rota ?
     por exemplo eu deveria ter um padrão de resposta para o /pantry e outra para o /users
@@ -0,0 +1,20 @@
+from pydantic import BaseModel, Field
+
+from src.api.schema.categories import CategoryValue, Units
+
+
+class Ingredient(BaseModel):
+    name: str = Field(
+        ..., min_length=2, max_length=30, pattern=r"^([a-zA-Z0-9À-ÖØ-öø-ÿ ])+$"
+    )
+    quantity: float = Field(..., gt=0)
+    unit: Units
+    category_value: CategoryValue
+
+
+class RecipeIn(BaseModel):
+    title: str = Field(..., min_length=2, max_length=80)
+    description: str | None = Field(None, max_length=500)
+    servings: int = Field(1, ge=1, le=100)
+    ingredients: list[Ingredient] = Field(..., min_length=1, max_length=100)
+    instructions: list[str] = []
@@ -1,49 +1,71 @@
-from decimal import Decimal
-from enum import Enum
+from decimal import ROUND_DOWN, Context, Decimal
+from typing import Literal
 
+from bson import Decimal128
 from pydantic import BaseModel, Field, HttpUrl
 from pydantic_mongo import PydanticObjectId
 
-
-class CategoryValue(int, Enum):
-    CANDY = 101
-    FROZEN = 102
-    DRINKS = 103
-    LAUNDRY = 104
-    MEAT_FISH = 105
-    DAIRY_EGGS = 106
-    GROCERY_PRODUCTS = 107
-    PERSONAL_HYGIENE = 108
-    GRAINS_CEREALS = 109
-    CLEANING_MATERIALS = 110
-    FRUITS_VEGETABLES = 111
-    CONDIMENTS_SAUCES = 112
-    PASTA_WHEAT_PRODUCTS = 113
-    BREADS_BAKERY_PRODUCTS = 114
-    CANNED_GOODS_PRESERVES = 115
-
-
-class Units(str, Enum):
-    UNITS = "un"
-    LITERS = "L"
-    MILLILITER = "ml"
-    GRAMS = "g"
-    KILO_GRAMS = "kg"
+# Reexportados para manter os imports existentes.
+from src.api.schema.categories import CategoryValue, Units  # noqa: F401
 
 
 class ItemsIn(BaseModel):
     item_name: str = Field(
         ..., min_length=2, max_length=15, pattern=r"^([a-zA-Z0-9À-ÖØ-öø-ÿ ])+$"
     )
-    quantity: int
+    quantity: float = Field(..., ge=0)
     unit: Units
-    price: Decimal
+    # Até 8 dígitos inteiros + 2 casas: cabe na precisão de PRICE_CONTEXT.
+    price: Decimal = Field(..., ge=0, lt=Decimal("1e8"))
     # icon: HttpUrl
 
 
+class ItemsInUpdate(BaseModel):
+    item_name: str | None = Field(
+        None, min_length=2, max_length=15, pattern=r"^([a-zA-Z0-9À-ÖØ-öø-ÿ ])+$"
+    )
+    quantity: float | None = Field(None, ge=0)
+    unit: Units | None = None
+    price: Decimal | None = Field(None, ge=0, lt=Decimal("1e8"))
+
+
 class ItemsOut(ItemsIn):
     item_id: PydanticObjectId
-    price: str
+
+
+# Contexto próprio: o getcontext() global do processo não é alterado.
+PRICE_CONTEXT = Context(prec=10, rounding=ROUND_DOWN)
+CENTS = Decimal("0.01")
+
+
+def price_to_decimal128(price: Decimal) -> Decimal128:
+    """Preço com 2 casas (truncado), no tipo decimal do BSON."""
+    return Decimal128(price.quantize(CENTS, context=PRICE_CONTEXT))
+
+
+class BulkItemIn(ItemsIn):
+    category_value: CategoryValue
+
+
+class BulkItemsIn(BaseModel):
+    items: list[BulkItemIn] = Field(..., min_length=1, max_length=500)
+
+
+class PlannedRecipe(BaseModel):
+    recipe_id: PydanticObjectId
+    # Sem servings, usa o rendimento cadastrado na receita.
+    servings: int | None = Field(None, ge=1, le=100)
+
+
+class ShoppingListIn(BaseModel):
+    recipes: list[PlannedRecipe] = Field(..., min_length=1, max_length=50)
+
+
+class CheckoutIn(BaseModel):
+    # item_id dos itens comprados, ou "all" para o carrinho inteiro.
+    item_ids: list[PydanticObjectId] | Literal["all"] = Field(
+        ..., min_length=1, max_length=500
+    )
 
 
 class Categories(BaseModel):
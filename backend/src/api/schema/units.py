@@ -0,0 +1,59 @@
+from typing import Dict
+
+from src.api.schema.categories import Units
+
+# Unidade -> (unidade base da mesma grandeza, fator para a base).
+_BASE_FACTORS: Dict[Units, tuple[Units, float]] = {
+    Units.UNITS: (Units.UNITS, 1.0),
+    Units.GRAMS: (Units.GRAMS, 1.0),
+    Units.KILO_GRAMS: (Units.GRAMS, 1000.0),
+    Units.MILLILITER: (Units.MILLILITER, 1.0),
+    Units.LITERS: (Units.MILLILITER, 1000.0),
+}
+
+# Casas decimais das quantidades convertidas: 4.07 * 1000.0 dá
+# 4070.0000000000005, que perderia de um item gravado com 4070 g num $gte.
+PRECISION = 9
+
+# Fator de conversão de cada par de unidades compatíveis, calculado uma vez.
+CONVERSIONS: Dict[tuple[Units, Units], float] = {
+    (source, target): source_factor / target_factor
+    for source, (source_base, source_factor) in _BASE_FACTORS.items()
+    for target, (target_base, target_factor) in _BASE_FACTORS.items()
+    if source_base == target_base
+}
+
+
+def base_unit(unit: Units | str) -> Units:
+    return _BASE_FACTORS[Units(unit)][0]
+
+
+def convert(quantity: float, source: Units | str, target: Units | str) -> float:
+    """Converte entre unidades da mesma grandeza (ex.: kg -> g)."""
+    try:
+        return round(quantity * CONVERSIONS[Units(source), Units(target)], PRECISION)
+    except KeyError:
+        raise ValueError(f"Cannot convert {source} to {target}") from None
+
+
+def to_base(quantity: float, unit: Units | str) -> tuple[float, str]:
+    """Quantidade na unidade base (g, ml ou un) e o valor dessa unidade."""
+    base, factor = _BASE_FACTORS[Units(unit)]
+    return round(quantity * factor, PRECISION), base.value
+
+
+def with_base_quantity(item: Dict) -> Dict:
+    """
+    Acrescenta base_quantity/base_unit a um item com quantity e unit. A
+    unidade informada continua em "unit", para exibição; somas e comparações
+    usam os campos base, sem conversão item a item.
+    """
+    item["base_quantity"], item["base_unit"] = to_base(item["quantity"], item["unit"])
+    return item
+
+
+def item_base_quantity(item: Dict) -> tuple[float, str]:
+    """Campos base de um item gravado, calculando-os se ele for anterior a eles."""
+    if "base_quantity" in item:
+        return item["base_quantity"], item["base_unit"]
+    return to_base(item.get("quantity", 0), item["unit"])
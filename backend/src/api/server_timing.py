@@ -0,0 +1,46 @@
+"""
+Header Server-Timing por requisição: tempo gasto no Mongo (soma dos comandos
+anotados pelo CommandTimer) e o restante, gasto no Python. Ex.:
+Server-Timing: db;dur=4.210;desc="3 commands", app;dur=1.032
+"""
+
+import time
+
+from starlette.datastructures import MutableHeaders
+
+from models.connection_options.command_monitoring import (
+    RequestDbTiming,
+    current_request,
+)
+
+
+class ServerTimingMiddleware:
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestDbTiming(scope)
+        started = time.perf_counter()
+
+        async def send_wrapper(message) -> None:
+            if message["type"] == "http.response.start":
+                total_ms = (time.perf_counter() - started) * 1000
+                db_ms = timing.db_ms
+                # Comandos concorrentes (gather) podem somar mais que o tempo total.
+                app_ms = max(total_ms - db_ms, 0.0)
+                MutableHeaders(scope=message).append(
+                    "Server-Timing",
+                    f'db;dur={db_ms:.3f};desc="{len(timing.commands)} commands", '
+                    f"app;dur={app_ms:.3f}",
+                )
+            await send(message)
+
+        token = current_request.set(timing)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request.reset(token)
@@ -0,0 +1,34 @@
+import os
+
+# Antes de importar a app: a configuração é lida na importação.
+os.environ["SMARTKITCHEN_DB_BACKEND"] = "memory"
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from main import app  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    # Cada lifespan cria um banco em memória novo, então os testes não se enxergam.
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def user_id(client) -> str:
+    response = client.post(
+        "/api/users/",
+        json={
+            "username": "tester",
+            "email": "tester@example.com",
+            "password": "Secret123!",
+        },
+    )
+    assert response.status_code == 201, response.text
+
+    # A API não devolve o _id do usuário; busca direto no banco da app.
+    users = app.state.db_handler.get_db_connection()["users"]
+    user = client.portal.call(users.find_one, {"username": "tester"})
+    return str(user["_id"])
@@ -0,0 +1,41 @@
+import asyncio
+
+from bson import ObjectId
+
+from models.repository.cache import LRUCache
+from models.repository.collections import CollectionHandler
+
+
+def test_read_started_before_a_write_does_not_fill_the_cache():
+    cache = LRUCache(max_size=10, ttl_seconds=60)
+    repository = CollectionHandler(None, "pantry", cache=cache)
+    user_id = ObjectId()
+
+    async def load_then_concurrent_write(_):
+        # A escrita termina (e invalida) enquanto a leitura ainda está em andamento.
+        repository.invalidate_cache(user_id)
+        return [{"user_id": user_id, "version": 1}]
+
+    data = asyncio.run(
+        repository.find_document_by_user(user_id, load=load_then_concurrent_write)
+    )
+
+    assert data == [{"user_id": user_id, "version": 1}]
+    assert cache.get(user_id) is None
+    assert cache.stats()["skipped_fills"] == 1
+
+
+def test_generation_survives_the_counter_reset():
+    cache = LRUCache(max_size=2, ttl_seconds=60)
+    generation = cache.generation("a")
+
+    cache.invalidate("a")
+    # Estoura o limite de gerações guardadas: o dict é zerado.
+    cache.invalidate("b")
+    cache.invalidate("c")
+
+    cache.set("a", "stale", generation)
+    assert cache.get("a") is None
+
+    cache.set("a", "fresh", cache.generation("a"))
+    assert cache.get("a") == "fresh"
@@ -0,0 +1,30 @@
+from generatorDataFake import COLLECTIONS, generate_batch
+from main import app
+
+
+def test_generated_items_can_be_patched_and_deleted(client):
+    documents = generate_batch(
+        seed=0, batch=0, batch_size=5, total_users=5, heavy_ratio=1.0, max_items=20
+    )
+    db_connection = app.state.db_handler.get_db_connection()
+    for name, docs in documents.items():
+        client.portal.call(db_connection.get_collection(name).insert_many, docs)
+
+    pantry = documents[COLLECTIONS["collection_pantry"]][0]
+    user_id = str(pantry["user_id"])
+    category, item = next(
+        (category, item) for category in pantry["pantry"] for item in category["items"]
+    )
+
+    response = client.patch(
+        f"/api/pantry/{user_id}/category_value/{category['category_value']}",
+        params={"item_id": item["item_id"]},
+        json={"quantity": item["quantity"] + 1, "unit": item["unit"]},
+    )
+    assert response.status_code == 200, response.text
+
+    response = client.delete(
+        f"/api/pantry/{item['item_id']}",
+        params={"user_id": user_id, "category_value": category["category_value"]},
+    )
+    assert response.status_code == 200, response.text
@@ -0,0 +1,40 @@
+import asyncio
+
+from models.connection_options.health import DBHealthMonitor
+
+
+class HangingDB:
+    """ping_db que só responde quando o teste libera."""
+
+    def __init__(self) -> None:
+        self.release = asyncio.Event()
+        self.timeouts = []
+
+    async def ping_db(self, timeout=None) -> float:
+        self.timeouts.append(timeout)
+        await self.release.wait()
+        return 0.001
+
+    def pool_stats(self) -> dict:
+        return {"checked_out": 0, "checkout_timeouts": 0, "max_pool_size": 10}
+
+
+def test_a_hanging_ping_is_not_started_again():
+    async def scenario():
+        db = HangingDB()
+        monitor = DBHealthMonitor(db, timeout=0.01)
+
+        await monitor.check()
+        await monitor.check()
+        failed = monitor.snapshot()
+
+        db.release.set()
+        await monitor.check()
+        return db.timeouts, failed, monitor.snapshot()
+
+    timeouts, failed, recovered = asyncio.run(scenario())
+    # Um único ping para os três checks, com o limite repassado ao driver.
+    assert timeouts == [0.01]
+    assert failed["ready"] is False
+    assert failed["consecutive_failures"] == 2
+    assert recovered["ready"] is True
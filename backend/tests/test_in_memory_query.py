@@ -0,0 +1,197 @@
+import asyncio
+from decimal import Decimal
+
+import pytest
+from bson import Decimal128, ObjectId
+from pymongo.errors import OperationFailure, WriteError
+
+from models.connection_options.in_memory import InMemoryConnectionHandler
+from models.connection_options.in_memory_query import (
+    apply_update,
+    project,
+    run_pipeline,
+)
+from models.repository.pipelines import cart_totals_pipeline, category_items_pipeline
+
+
+def pantry_document() -> dict:
+    return {
+        "_id": ObjectId(),
+        "user_id": ObjectId(),
+        "version": 0,
+        "pantry": [
+            {
+                "category_value": 106,
+                "category_name": "Dairy and Eggs",
+                "items": [
+                    {"item_id": "a", "item_name": "milk", "quantity": 2, "unit": "l"},
+                    {"item_id": "b", "item_name": "eggs", "quantity": 12, "unit": "un"},
+                ],
+            },
+            {"category_value": 109, "category_name": "Grains", "items": []},
+        ],
+    }
+
+
+# ------------------------------------------------------------ updates
+
+
+def test_set_and_inc():
+    document = pantry_document()
+
+    assert apply_update(
+        document, {"$set": {"owner.name": "ana"}, "$inc": {"version": 1}}, {}
+    )
+    assert document["owner"] == {"name": "ana"}
+    assert document["version"] == 1
+
+    # Mesmo valor: o documento não muda.
+    assert not apply_update(document, {"$set": {"owner.name": "ana"}}, {})
+
+
+def test_add_to_set_and_pull():
+    document = {"tags": ["a"]}
+
+    assert apply_update(document, {"$addToSet": {"tags": {"$each": ["a", "b"]}}}, {})
+    assert document["tags"] == ["a", "b"]
+    assert not apply_update(document, {"$addToSet": {"tags": "b"}}, {})
+
+    assert apply_update(document, {"$pull": {"tags": "a"}}, {})
+    assert document["tags"] == ["b"]
+
+
+def test_pull_with_condition():
+    document = pantry_document()
+
+    apply_update(
+        document,
+        {"$pull": {"pantry.$[category].items": {"item_id": "a"}}},
+        {},
+        array_filters=[{"category.category_value": 106}],
+    )
+    assert [item["item_id"] for item in document["pantry"][0]["items"]] == ["b"]
+
+
+def test_positional_operator_uses_the_filter_match():
+    document = pantry_document()
+    filter_document = {"pantry": {"$elemMatch": {"category_value": 109}}}
+
+    apply_update(
+        document, {"$set": {"pantry.$.category_name": "Cereals"}}, filter_document
+    )
+    assert [category["category_name"] for category in document["pantry"]] == [
+        "Dairy and Eggs",
+        "Cereals",
+    ]
+
+    with pytest.raises(WriteError):
+        apply_update(document, {"$set": {"pantry.$.category_name": "x"}}, {})
+
+
+def test_array_filters_reach_nested_items():
+    document = pantry_document()
+
+    apply_update(
+        document,
+        {"$inc": {"pantry.$[category].items.$[item].quantity": 1}},
+        {},
+        array_filters=[{"category.category_value": 106}, {"item.item_id": "b"}],
+    )
+    assert [item["quantity"] for item in document["pantry"][0]["items"]] == [2, 13]
+
+
+# ---------------------------------------------------------- projeções
+
+
+def test_inclusion_and_exclusion_projections():
+    document = pantry_document()
+
+    assert project(document, {"_id": 0, "pantry.category_value": 1}) == {
+        "pantry": [{"category_value": 106}, {"category_value": 109}]
+    }
+    excluded = project(document, {"pantry": 0, "version": 0})
+    assert set(excluded) == {"_id", "user_id"}
+
+
+def test_positional_projection_returns_the_matched_element():
+    document = pantry_document()
+
+    projected = project(
+        document, {"_id": 0, "pantry.$": 1}, {"pantry.category_value": 109}
+    )
+    assert projected == {"pantry": [document["pantry"][1]]}
+
+    with pytest.raises(OperationFailure):
+        project(document, {"pantry.$": 1}, {"user_id": document["user_id"]})
+
+
+def test_find_applies_positional_projection():
+    document = pantry_document()
+
+    async def find():
+        db_handler = InMemoryConnectionHandler()
+        db_handler.connect_to_db("test")
+        pantry = db_handler.get_db_connection().get_collection("pantry")
+        await pantry.insert_one(document)
+        return await pantry.find_one(
+            {"user_id": document["user_id"], "pantry.category_value": 106},
+            {"_id": 0, "pantry.$": 1},
+        )
+
+    assert asyncio.run(find()) == {"pantry": [document["pantry"][0]]}
+
+
+# ------------------------------------------------------------ pipelines
+
+
+def test_category_items_pipeline():
+    document = pantry_document()
+
+    (result,) = run_pipeline(
+        [document],
+        category_items_pipeline(document["user_id"], "pantry", 106, name_prefix="MI"),
+        lookup=None,
+    )
+    assert result == {
+        "pantry": [
+            {**document["pantry"][0], "items": [document["pantry"][0]["items"][0]]}
+        ]
+    }
+
+    # Usuário inexistente: nenhum documento; categoria inexistente: array vazio.
+    assert (
+        run_pipeline(
+            [document], category_items_pipeline(ObjectId(), "pantry", 106), None
+        )
+        == []
+    )
+    assert run_pipeline(
+        [document], category_items_pipeline(document["user_id"], "pantry", 101), None
+    ) == [{"pantry": []}]
+
+
+def test_cart_totals_pipeline():
+    document = {
+        "user_id": ObjectId(),
+        "shoppingCart": [
+            {
+                "category_value": 106,
+                "category_name": "Dairy and Eggs",
+                "items": [
+                    {"price": Decimal128("4.50"), "quantity": 2},
+                    # Preço ainda gravado como string (documento não migrado).
+                    {"price": "1.25", "quantity": 4},
+                ],
+            },
+            {"category_value": 109, "category_name": "Grains", "items": []},
+        ],
+    }
+
+    (result,) = run_pipeline(
+        [document], cart_totals_pipeline(document["user_id"], "shoppingCart"), None
+    )
+    (category,) = result["categories"]
+    assert category["category_value"] == 106
+    assert category["items"] == 2
+    assert category["subtotal"].to_decimal() == Decimal("14.00")
+    assert result["total"].to_decimal() == Decimal("14.00")
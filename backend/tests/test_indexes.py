@@ -0,0 +1,38 @@
+import asyncio
+
+import pytest
+
+from models.connection_options.in_memory import InMemoryConnectionHandler
+from models.repository.indexes import (
+    COLLECTIONS,
+    IndexVerificationError,
+    ensure_indexes,
+    missing_indexes,
+)
+
+
+def test_rejected_index_is_named_and_the_others_are_created():
+    async def scenario():
+        db_handler = InMemoryConnectionHandler()
+        db_handler.connect_to_db("test")
+        db_connection = db_handler.get_db_connection()
+        users = db_connection.get_collection(COLLECTIONS["collection_users"])
+        # O backend em memória cria os índices ao conectar; aqui os dados
+        # duplicados chegam antes deles, como num banco já existente.
+        await users.drop_indexes()
+        await users.insert_many(
+            [
+                {"username": "ana", "email": "ana@example.com"},
+                {"username": "ana", "email": "ana2@example.com"},
+            ]
+        )
+
+        with pytest.raises(IndexVerificationError) as error:
+            await ensure_indexes(db_connection)
+
+        return str(error.value), await missing_indexes(db_connection)
+
+    message, missing = asyncio.run(scenario())
+    assert f"{COLLECTIONS['collection_users']}.username_unique" in message
+    assert "SMARTKITCHEN_INDEX_MODE=check" in message
+    assert missing == {COLLECTIONS["collection_users"]: ["username_unique"]}
@@ -0,0 +1,57 @@
+import asyncio
+
+from bson import ObjectId
+
+from models.connection_options.in_memory import InMemoryConnectionHandler
+from models.repository.collections import CollectionHandler
+from models.repository.item_stores import SEPARATE_LAYOUT, SeparateItemStore
+
+
+def test_separate_store_reads_the_version_before_the_items():
+    async def scenario():
+        db_handler = InMemoryConnectionHandler()
+        db_handler.connect_to_db("test")
+        db_connection = db_handler.get_db_connection()
+        store = SeparateItemStore(
+            CollectionHandler(db_connection, "pantry", versioned=True),
+            CollectionHandler(db_connection, "pantry_items"),
+            "pantry",
+        )
+        user_id = ObjectId()
+        await db_connection.get_collection("pantry").insert_one(
+            {
+                "user_id": user_id,
+                "version": 0,
+                "layout": SEPARATE_LAYOUT,
+                "pantry": [{"category_value": 109, "items": []}],
+            }
+        )
+
+        events = []
+        find_document = store.items_repository.find_document
+
+        def user_document(read):
+            async def wrapper(*args, **kwargs):
+                # Cede o loop: lida em paralelo, a consulta dos itens começaria aqui.
+                await asyncio.sleep(0)
+                result = await read(*args, **kwargs)
+                events.append("user document")
+                return result
+
+            return wrapper
+
+        async def items(*args, **kwargs):
+            events.append("items")
+            return await find_document(*args, **kwargs)
+
+        store.repository.find_document_one = user_document(
+            store.repository.find_document_one
+        )
+        store.repository.aggregate = user_document(store.repository.aggregate)
+        store.items_repository.find_document = items
+
+        await store.read(user_id)
+        await store.read_category(user_id, 109)
+        return events
+
+    assert asyncio.run(scenario()) == ["user document", "items"] * 2
@@ -0,0 +1,62 @@
+import asyncio
+
+from bson import ObjectId
+
+from models.connection_options.in_memory import InMemoryConnectionHandler
+from models.repository.item_stores import SEPARATE_LAYOUT
+from models.repository.migrate_pantry_items import COLLECTIONS, migrate_pantry_items
+
+
+def item(name: str) -> dict:
+    return {"item_id": str(ObjectId()), "item_name": name, "quantity": 1, "unit": "un"}
+
+
+def test_item_deleted_during_the_copy_is_not_migrated():
+    async def scenario():
+        db_handler = InMemoryConnectionHandler()
+        db_handler.connect_to_db("test")
+        db_connection = db_handler.get_db_connection()
+        pantry = db_connection.get_collection(COLLECTIONS["collection_pantry"])
+        pantry_items = db_connection.get_collection(
+            COLLECTIONS["collection_pantry_items"]
+        )
+
+        user_id = ObjectId()
+        kept, deleted = item("rice"), item("beans")
+        await pantry.insert_one(
+            {
+                "user_id": user_id,
+                "version": 0,
+                "pantry": [{"category_value": 109, "items": [kept, deleted]}],
+            }
+        )
+
+        bulk_write = pantry_items.bulk_write
+
+        async def copy_then_app_deletes(*args, **kwargs):
+            # A app remove um item embutido entre a cópia e o esvaziamento.
+            result = await bulk_write(*args, **kwargs)
+            if pantry_items.bulk_write is copy_then_app_deletes:
+                pantry_items.bulk_write = bulk_write
+                await pantry.update_one(
+                    {"user_id": user_id},
+                    {
+                        "$pull": {"pantry.$[].items": {"item_id": deleted["item_id"]}},
+                        "$inc": {"version": 1},
+                    },
+                )
+            return result
+
+        pantry_items.bulk_write = copy_then_app_deletes
+
+        await migrate_pantry_items(db_handler)
+
+        document = await pantry.find_one({"user_id": user_id})
+        migrated = await pantry_items.find({"user_id": user_id}).to_list(length=None)
+        return document, migrated, kept
+
+    document, migrated, kept = asyncio.run(scenario())
+
+    assert document["layout"] == SEPARATE_LAYOUT
+    assert document["pantry"][0]["items"] == []
+    assert [row["item_id"] for row in migrated] == [kept["item_id"]]
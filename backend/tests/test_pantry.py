@@ -0,0 +1,161 @@
+import asyncio
+
+from bson import ObjectId
+
+from models.connection_options.in_memory import InMemoryConnectionHandler
+from models.repository.pipelines import (
+    category_items_pipeline,
+    item_conditions_query,
+    select_category_items,
+)
+from src.api.schema.units import with_base_quantity
+
+
+def category_names(client, user_id, **params):
+    response = client.get(
+        f"/api/pantry/category/{user_id}", params={"category_value": 109, **params}
+    )
+    assert response.status_code == 200, response.text
+    (category,) = response.json()["data"][0]["pantry"]
+    return sorted(item["item_name"] for item in category["items"])
+
+
+def test_min_quantity_compares_base_quantities(client, user_id):
+    response = client.post(
+        f"/api/pantry/{user_id}/items/bulk",
+        json={
+            "items": [
+                {
+                    "item_name": name,
+                    "quantity": quantity,
+                    "unit": unit,
+                    "category_value": 109,
+                }
+                for name, quantity, unit in (
+                    ("flour", 1, "kg"),
+                    ("sugar", 500, "g"),
+                    ("milk", 2, "l"),
+                )
+            ]
+        },
+    )
+    assert response.status_code == 201, response.text
+
+    assert category_names(client, user_id, min_quantity=600, unit="g") == ["flour"]
+    assert category_names(client, user_id, min_quantity=0.5, unit="kg") == [
+        "flour",
+        "sugar",
+    ]
+
+    # Sem unit, o mínimo vale na unidade de cada item, como antes.
+    assert category_names(client, user_id, min_quantity=2) == ["milk", "sugar"]
+
+
+def test_patch_with_only_quantity_or_unit_keeps_base_quantity_in_sync(client, user_id):
+    response = client.post(
+        f"/api/pantry/{user_id}/category/109",
+        json={"item_name": "flour", "quantity": 1, "unit": "kg"},
+    )
+    assert response.status_code == 201, response.text
+    (category,) = client.get(
+        f"/api/pantry/category/{user_id}", params={"category_value": 109}
+    ).json()["data"][0]["pantry"]
+    item_id = category["items"][0]["item_id"]
+
+    def patch(fields):
+        return client.patch(
+            f"/api/pantry/{user_id}/category_value/109",
+            params={"item_id": item_id},
+            json=fields,
+        )
+
+    # Só a quantidade: a unidade gravada (kg) entra no base_quantity.
+    assert patch({"quantity": 2}).status_code == 200
+    assert category_names(client, user_id, min_quantity=1500, unit="g") == ["flour"]
+
+    # Só a unidade: 2 kg vira 2 g.
+    assert patch({"unit": "g"}).status_code == 200
+    assert category_names(client, user_id, min_quantity=1500, unit="g") == []
+    assert category_names(client, user_id, min_quantity=2, unit="g") == ["flour"]
+
+    response = client.patch(
+        f"/api/pantry/{user_id}/category_value/109",
+        params={"item_id": "missing"},
+        json={"quantity": 3},
+    )
+    assert response.status_code == 404
+
+
+def test_min_quantity_matches_items_without_base_quantity():
+    # Itens gravados antes de base_quantity existir só têm quantity e unit.
+    document = {
+        "user_id": ObjectId(),
+        "pantry": [
+            {
+                "category_value": 109,
+                "items": [
+                    {"item_name": "flour", "quantity": 1, "unit": "kg"},
+                    {"item_name": "sugar", "quantity": 500, "unit": "g"},
+                ],
+            }
+        ],
+    }
+    pipeline = category_items_pipeline(
+        document["user_id"], "pantry", 109, min_quantity=600, unit="g"
+    )
+
+    async def aggregate():
+        db_handler = InMemoryConnectionHandler()
+        db_handler.connect_to_db("test")
+        pantry = db_handler.get_db_connection().get_collection("pantry")
+        await pantry.insert_one(document)
+        return await pantry.aggregate(pipeline).to_list(None)
+
+    (aggregated,) = asyncio.run(aggregate())
+    selected = select_category_items(
+        document["pantry"], 109, min_quantity=600, unit="g"
+    )
+
+    for result in (aggregated["pantry"], selected):
+        assert [item["item_name"] for item in result[0]["items"]] == ["flour"]
+
+
+def test_min_quantity_boundary_survives_float_conversion():
+    # 4.07 * 1000.0 == 4070.0000000000005 sem arredondar.
+    items = [
+        with_base_quantity({"item_name": "flour", "quantity": 4070, "unit": "g"}),
+        {"item_name": "sugar", "quantity": 4.07, "unit": "kg"},
+    ]
+    document = {
+        "user_id": ObjectId(),
+        "pantry": [{"category_value": 109, "items": items}],
+    }
+
+    async def query():
+        db_handler = InMemoryConnectionHandler()
+        db_handler.connect_to_db("test")
+        db_connection = db_handler.get_db_connection()
+        pantry = db_connection.get_collection("pantry")
+        await pantry.insert_one(document)
+        pantry_items = db_connection.get_collection("pantry_items")
+        await pantry_items.insert_many(
+            [{**item, "item_id": str(ObjectId())} for item in items]
+        )
+
+        (aggregated,) = await pantry.aggregate(
+            category_items_pipeline(
+                document["user_id"], "pantry", 109, min_quantity=4.07, unit="kg"
+            )
+        ).to_list(None)
+        found = await pantry_items.find(
+            item_conditions_query(None, 4.07, "kg")
+        ).to_list(None)
+        return aggregated["pantry"][0]["items"], found
+
+    aggregated, found = asyncio.run(query())
+    selected = select_category_items(
+        document["pantry"], 109, min_quantity=4.07, unit="kg"
+    )[0]["items"]
+
+    for result in (aggregated, found, selected):
+        assert sorted(item["item_name"] for item in result) == ["flour", "sugar"]
@@ -0,0 +1,24 @@
+from types import SimpleNamespace
+
+from models.connection_options.pool_monitoring import PoolUsage
+
+ADDRESS = ("localhost", 27017)
+EVENT = SimpleNamespace(address=ADDRESS)
+
+
+def test_check_ins_after_pool_closed_are_ignored():
+    usage = PoolUsage()
+    usage.connection_checked_out(EVENT)
+    usage.connection_checked_out(EVENT)
+    assert usage.stats()["checked_out"] == 2
+
+    usage.pool_closed(EVENT)
+    usage.connection_checked_in(EVENT)
+    usage.connection_checked_in(EVENT)
+    assert usage.stats()["checked_out"] == 0
+
+    # Pool recriado no mesmo endereço recebendo a volta de uma conexão antiga.
+    usage.connection_checked_out(EVENT)
+    usage.connection_checked_in(EVENT)
+    usage.connection_checked_in(EVENT)
+    assert usage.stats()["checked_out"] == 0
@@ -0,0 +1,66 @@
+import asyncio
+
+from models.connection_options.in_memory import InMemoryConnectionHandler
+from models.repository.collections import CollectionHandler
+from models.repository.recipe_index import RecipeIndex, RecipeIndexRefresher
+
+
+def recipe(title: str, *ingredients: str) -> dict:
+    return {"title": title, "ingredients": [{"name": name} for name in ingredients]}
+
+
+def test_refresh_picks_up_recipes_written_by_other_workers():
+    async def scenario():
+        db_handler = InMemoryConnectionHandler()
+        db_handler.connect_to_db("test")
+        recipes = db_handler.get_db_connection().get_collection("recipes")
+        await recipes.insert_one(recipe("Arroz", "arroz", "sal"))
+
+        repository = CollectionHandler(db_handler.get_db_connection(), "recipes")
+        index = await RecipeIndex.build(repository)
+        refresher = RecipeIndexRefresher(index, repository, interval=0.01)
+        refresher.start()
+
+        # Gravada direto no banco, como faria outro worker.
+        await recipes.insert_one(recipe("Feijão", "feijão", "sal"))
+        await asyncio.sleep(0.05)
+        await refresher.stop()
+
+        return index.suggest(["sal"])
+
+    titles = sorted(suggestion["title"] for suggestion in asyncio.run(scenario()))
+    assert titles == ["Arroz", "Feijão"]
+
+
+def test_local_writes_during_a_refresh_are_kept():
+    class SlowRepository:
+        # Fica no meio da leitura até o teste liberar.
+        def __init__(self):
+            self.reading = asyncio.Event()
+            self.release = asyncio.Event()
+
+        async def find_document_stream(self, request_attribute):
+            yield {"_id": "old", **recipe("Arroz", "arroz", "sal")}
+            self.reading.set()
+            await self.release.wait()
+            yield {"_id": "gone", **recipe("Sopa", "sal")}
+
+    async def scenario():
+        index = RecipeIndex()
+        index.add("old", recipe("Arroz", "arroz", "sal"))
+        index.add("gone", recipe("Sopa", "sal"))
+
+        repository = SlowRepository()
+        refresh = asyncio.create_task(index.refresh(repository))
+        await repository.reading.wait()
+
+        # Escritas deste worker enquanto o refresh ainda lê o banco.
+        index.add("new", recipe("Feijão", "feijão", "sal"))
+        index.remove("gone")
+        repository.release.set()
+        await refresh
+
+        return index.suggest(["sal"])
+
+    titles = sorted(suggestion["title"] for suggestion in asyncio.run(scenario()))
+    assert titles == ["Arroz", "Feijão"]
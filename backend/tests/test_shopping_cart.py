@@ -0,0 +1,133 @@
+def create_recipe(client, ingredients) -> str:
+    response = client.post(
+        "/api/recipes/",
+        json={"title": "Arroz simples", "servings": 2, "ingredients": ingredients},
+    )
+    assert response.status_code == 201, response.text
+    return response.json()["data"][0]["recipe_id"]
+
+
+def cart_items(client, user_id):
+    cart = client.get(f"/api/shopping_cart/{user_id}").json()["data"][0]
+    return {
+        item["item_id"]: (category["category_value"], item)
+        for category in cart["shoppingCart"]
+        for item in category["items"]
+    }
+
+
+def test_items_from_recipes_can_be_patched_and_deleted(client, user_id):
+    recipe_id = create_recipe(
+        client,
+        [
+            {"name": "rice", "quantity": 500, "unit": "g", "category_value": 109},
+            {"name": "salt", "quantity": 10, "unit": "g", "category_value": 112},
+        ],
+    )
+
+    response = client.post(
+        f"/api/shopping_cart/{user_id}/from_recipes",
+        json={"recipes": [{"recipe_id": recipe_id}]},
+    )
+    assert response.status_code == 201, response.text
+    created = {item["item_name"]: item for item in response.json()["data"]}
+    assert set(created) == {"rice", "salt"}
+
+    items = cart_items(client, user_id)
+    rice_id = created["rice"]["item_id"]
+    salt_id = created["salt"]["item_id"]
+    assert set(items) == {rice_id, salt_id}
+
+    response = client.patch(
+        f"/api/shopping_cart/{user_id}/category_value/109",
+        params={"item_id": rice_id},
+        json={"quantity": 1, "unit": "kg"},
+    )
+    assert response.status_code == 200, response.text
+    assert cart_items(client, user_id)[rice_id][1]["quantity"] == 1
+
+    response = client.delete(
+        f"/api/shopping_cart/{salt_id}",
+        params={"user_id": user_id, "category_value": 112},
+    )
+    assert response.status_code == 200, response.text
+    assert set(cart_items(client, user_id)) == {rice_id}
+
+
+def test_unchanged_update_keeps_the_etag(client, user_id):
+    response = client.post(
+        f"/api/shopping_cart/{user_id}",
+        params={"category_value": 107},
+        json={"item_name": "rice", "quantity": 1, "unit": "kg", "price": "3.50"},
+    )
+    assert response.status_code == 200, response.text
+    item_id = next(iter(cart_items(client, user_id)))
+    etag = client.get(f"/api/shopping_cart/{user_id}").headers["ETag"]
+
+    def patch(fields):
+        return client.patch(
+            f"/api/shopping_cart/{user_id}/category_value/107",
+            params={"item_id": item_id},
+            json=fields,
+        )
+
+    assert patch({"quantity": 1, "unit": "kg", "price": "3.50"}).status_code == 304
+    assert client.get(f"/api/shopping_cart/{user_id}").headers["ETag"] == etag
+
+    assert patch({"price": "4.00"}).status_code == 200
+    assert client.get(f"/api/shopping_cart/{user_id}").headers["ETag"] != etag
+
+    # Só a quantidade: a unidade gravada entra no base_quantity.
+    assert patch({"quantity": 2}).status_code == 200
+    item = cart_items(client, user_id)[item_id][1]
+    assert (item["quantity"], item["unit"], item["base_quantity"]) == (2, "kg", 2000)
+
+    response = client.patch(
+        f"/api/shopping_cart/{user_id}/category_value/107",
+        params={"item_id": "000000000000000000000000"},
+        json={"price": "4.00"},
+    )
+    assert response.status_code == 404
+
+
+def test_bulk_items_are_read_back_by_category(client, user_id):
+    response = client.post(
+        f"/api/shopping_cart/{user_id}/items/bulk",
+        json={
+            "items": [
+                {
+                    "item_name": name,
+                    "quantity": 1,
+                    "unit": "un",
+                    "price": "1.00",
+                    "category_value": category_value,
+                }
+                for name, category_value in (
+                    ("milk", 106),
+                    ("eggs", 106),
+                    ("soap", 108),
+                )
+            ]
+        },
+    )
+    assert response.status_code == 201, response.text
+    assert {result["status"] for result in response.json()["data"]} == {"created"}
+
+    response = client.get(
+        f"/api/shopping_cart/category/{user_id}",
+        params={"category_value": 106, "name_prefix": "mi"},
+    )
+    assert response.status_code == 200, response.text
+    (category,) = response.json()["data"][0]["shoppingCart"]
+    assert [item["item_name"] for item in category["items"]] == ["milk"]
+
+    milk_id = category["items"][0]["item_id"]
+    response = client.delete(
+        f"/api/shopping_cart/{milk_id}",
+        params={"user_id": user_id, "category_value": 106},
+    )
+    assert response.status_code == 200, response.text
+    assert [item["item_name"] for _, item in cart_items(client, user_id).values()] == [
+        "eggs",
+        "soap",
+    ]